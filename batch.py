@@ -0,0 +1,168 @@
+"""
+Answer a file of questions with the Self-RAG graph.
+
+    uv run python batch.py questions.jsonl -o answers.jsonl --concurrency 8
+
+Input is JSONL ({"question": ..., "id": ..., "filter": {...}} or a bare JSON
+string per line) or CSV with a "question" column and optional "id" and
+"filter" columns, the filter written as a JSON object.
+Answers are appended to the output JSONL as they complete, and throughput and
+latency percentiles are printed at the end.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph.state import CompiledStateGraph
+
+from graph.chunk_store import get_documents
+from graph.graph import build_graph
+
+
+def parse_filter(value: Any, row: int) -> Dict[str, Any]:
+    """A row's metadata filter; CSV cells hold it as a JSON string."""
+    if isinstance(value, str):
+        if not value.strip():
+            return {}
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Row {row}: filter is not valid JSON: {e}") from e
+    if not value:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"Row {row}: filter must be a JSON object, got {value!r}")
+    return value
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    questions = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    for i, row in enumerate(rows):
+        if isinstance(row, str):
+            row = {"question": row}
+        if not row.get("question"):
+            print(f"⚠️ Skipping row {i + 1} without a question")
+            continue
+        questions.append(
+            {
+                "id": row.get("id") or str(i + 1),
+                "question": row["question"],
+                "filter": parse_filter(row.get("filter"), i + 1),
+            }
+        )
+    return questions
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def answer_record(item: Dict[str, Any], result: Any, latency: float) -> Dict[str, Any]:
+    record = {"id": item["id"], "question": item["question"], "latency_s": round(latency, 3)}
+    if isinstance(result, Exception):
+        return {**record, "error": repr(result)}
+    return {
+        **record,
+        "generation": result.get("generation"),
+        "web_search": result.get("web_search", False),
+        "sources": [doc.metadata.get("source", "web search") for doc in get_documents(result)],
+    }
+
+
+async def run_batch(
+    questions: List[Dict[str, Any]],
+    output: str,
+    concurrency: int,
+    graph: Optional[CompiledStateGraph] = None,
+) -> Tuple[List[float], int, float]:
+    """
+    Run all questions through one graph, writing each answer as it completes.
+
+    No LLM cache is shared across the batch: a cached generation or
+    hallucination verdict would make every "not supported" retry repeat the
+    same answer until the retry cap.
+
+    Returns:
+        Tuple of (latencies of answered questions, number of errors, wall time)
+    """
+    # one graph and chunk store shared by every question in the batch
+    graph = graph or build_graph()
+
+    async def timed_invoke(item: Dict[str, Any]) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        try:
+            result = await graph.ainvoke({"question": item["question"], "filter": item["filter"]})
+        except Exception as e:
+            result = e
+        return result, time.perf_counter() - start
+
+    runner = RunnableLambda(timed_invoke)
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    with open(output, "w", encoding="utf-8") as out:
+        async for index, (result, latency) in runner.abatch_as_completed(
+            questions, config={"max_concurrency": concurrency}
+        ):
+            record = answer_record(questions[index], result, latency)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if "error" in record:
+                errors += 1
+                print(f"❌ [{record['id']}] {record['error']}")
+            else:
+                latencies.append(latency)
+                print(f"✅ [{record['id']}] answered in {latency:.1f}s")
+    return latencies, errors, time.perf_counter() - started
+
+
+def print_summary(latencies: List[float], errors: int, wall_time: float) -> None:
+    answered = len(latencies)
+    print(
+        f"📊 {answered} answered, {errors} failed in {wall_time:.1f}s "
+        f"({(answered + errors) / wall_time if wall_time else 0:.2f} questions/s)"
+    )
+    print(
+        "⏱️ latency "
+        + ", ".join(f"p{p}={percentile(latencies, p):.2f}s" for p in (50, 90, 99))
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Answer a file of questions with Self-RAG")
+    parser.add_argument("input", help="questions as .jsonl or .csv")
+    parser.add_argument("-o", "--output", default="answers.jsonl")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        questions = load_questions(args.input)
+    except ValueError as e:
+        raise SystemExit(f"❌ {args.input}: {e}")
+    print(f"📥 Loaded {len(questions)} question(s) from {args.input}")
+    latencies, errors, wall_time = asyncio.run(
+        run_batch(questions, args.output, args.concurrency)
+    )
+    print_summary(latencies, errors, wall_time)
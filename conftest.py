@@ -0,0 +1,19 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def web_search_key(monkeypatch):
+    # importing the graph nodes builds the web search client
+    monkeypatch.setenv("TAVILY_API_KEY", "test")
+
+
+@pytest.fixture
+def nodes(web_search_key):
+    return importlib.import_module("graph.nodes")
+
+
+@pytest.fixture
+def graph_module(web_search_key):
+    return importlib.import_module("graph.graph")
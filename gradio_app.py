@@ -8,18 +8,31 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import gradio as gr
+from graph import warmup
+from graph.checkpoint import one_off_config
+from graph.chunk_store import get_documents
+from graph.config import WARM_START
 from graph.graph import app as c_rag_app
+from graph.serving import ServerBusy, get_frontend_pool
 
 
 
-def process_question(question: str, show_details: bool = True, progress=gr.Progress()):
+def process_question(
+    question: str,
+    show_details: bool = True,
+    progress=gr.Progress(),
+    request: gr.Request = None,
+):
     """
     Process a question through the C-RAG system and return formatted results.
+    Runs go through the shared frontend pool, so a busy app answers right
+    away instead of piling up runs.
     
     Args:
         question: User's question
         show_details: Whether to show detailed workflow information
         progress: Gradio progress tracker
+        request: Gradio request, whose session identifies the user
         
     Returns:
         Tuple of (answer, details, sources)
@@ -31,13 +44,19 @@ def process_question(question: str, show_details: bool = True, progress=gr.Progr
     
     # Run the C-RAG graph
     progress(0.3, desc="Running Retrieval & Grading (this may take a moment)...")
-    result = c_rag_app.invoke(input={"question": question})
+    user = request.session_hash if request is not None else "anonymous"
+    try:
+        result, queue_wait = get_frontend_pool().run(
+            user, c_rag_app.invoke, input={"question": question}, config=one_off_config()
+        )
+    except ServerBusy as e:
+        return str(e), "", ""
     
     progress(0.9, desc="Formatting Results...")
     
     # Extract information
     answer = result.get("generation", "No answer generated")
-    documents = result.get("documents", [])
+    documents = get_documents(result)
     web_search_used = result.get("web_search", False)
     
     # Format the main answer
@@ -59,6 +78,8 @@ def process_question(question: str, show_details: bool = True, progress=gr.Progr
         
         # Grading summary
         details_parts.append(f"✓ **Relevant Documents:** {len(documents)}")
+
+        details_parts.append(f"⏱️ **Queue Wait:** {queue_wait:.1f}s")
         
         details_text = "\n\n".join(details_parts)
     
@@ -178,7 +199,12 @@ def create_ui():
 
 
 if __name__ == "__main__":
+    if WARM_START:
+        # warms the default index the module-level graph retrieves from
+        warmup.warm_up()
     demo = create_ui()
+    # admission is left to the frontend pool, which sheds load with a busy answer
+    demo.queue(default_concurrency_limit=None)
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -4,166 +4,43 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
-from typing import Any, Dict
 
-from graph.chains.generation import generation_chain
-from graph.chains.retrieval_grader import retrieval_grader
-from graph.chains.hallucination_grader import hallucination_grader
-from graph.chains.answer_grader import answer_grader
-from graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
-from graph.state import GraphState
+from graph.chat import run_chat_turn
+from graph.chunk_store import get_documents
+from graph.checkpoint import get_checkpointer
+from graph.graph import build_graph
+from graph.serving import ServerBusy, get_frontend_pool
+from graph.vectors import QueryCachingEmbeddings
+
+from ingest.snapshot import latest_snapshot, open_vectorstore
 
-from langgraph.graph import END, StateGraph
 from langchain_openai import OpenAIEmbeddings
 from langchain_endee import EndeeVectorStore
-from langchain_core.documents import Document
-from langchain_tavily import TavilySearch
 
 base_url = os.getenv("ENDEE_BASE_URL", "http://localhost:8080/api/v1")
 
-vector_store = EndeeVectorStore(
-    index_name="rag_endee",
-    embedding=OpenAIEmbeddings(),
-    dimension=1536,
-    space_type="cosine",
-    precision="int8",
-    base_url=base_url,
-)
-endee_retriever = vector_store.as_retriever(search_kwargs={"k": 4})
-
-web_search_tool = TavilySearch(max_result=3)
-
-
-def retrieve(state: GraphState) -> Dict[str, Any]:
-    print("⬇️ Retrieving documents from Endee...")
-    question = state["question"]
-    documents = endee_retriever.invoke(question)
-    return {"documents": documents, "question": question}
-
-
-def grade_documents(state: GraphState) -> Dict[str, Any]:
-    print("🔍 CHECK DOCUMENT RELEVANCE TO QUESTION...")
-    question = state["question"]
-    documents = state["documents"]
-
-    filtered_docs = []
-    web_search = False
-    for i, doc in enumerate(documents):
-        score = retrieval_grader.invoke(
-            {"question": question, "document": doc.page_content}
-        )
-        grade = score.binary_score
-        if grade.lower() == "yes":
-            print(f"GRADE: ✅ DOCUMENT({i+1}) RELEVANT ")
-            filtered_docs.append(doc)
-        else:
-            print("GRADE: ❌ DOCUMENT NOT RELEVANT ")
-            web_search = True
-            continue
-    print("▶️ FINISHED CHECKING DOCUMENT RELEVANCE TO QUESTION...")
-    return {"document": filtered_docs, "question": question, "web_search": web_search}
-
-
-def generate(state: GraphState) -> Dict[str, Any]:
-    print("🤖 Generating...")
-    question = state["question"]
-    documents = state["documents"]
-    retry_count = state.get("retry_count", 0) + 1
-    if retry_count >= 3:
-        generation = "I could not find a reliable answer in the uploaded documents for this question."
-    else:
-        generation = generation_chain.invoke({"question": question, "context": documents})
-    return {"documents": documents, "question": question, "generation": generation, "retry_count": retry_count}
-
-
-def web_search(state: GraphState) -> Dict[str, Any]:
-    print("🔍 Searching web for relevant documents...")
-    question = state["question"]
-    documents = state["documents"]
-
-    tavily_results = web_search_tool.invoke({"query": question})["results"]
-    joined_tavily_result = "\n".join(
-        [tavily_result["content"] for tavily_result in tavily_results]
+# the index published by ingestion_endee.py; older setups used a fixed index name
+snapshot = latest_snapshot("rag_endee")
+embedding = QueryCachingEmbeddings(OpenAIEmbeddings())
+if snapshot is not None:
+    vector_store = open_vectorstore(snapshot, embedding)
+else:
+    vector_store = EndeeVectorStore(
+        index_name="rag_endee",
+        embedding=embedding,
+        dimension=1536,
+        space_type="cosine",
+        precision="int8",
+        base_url=base_url,
     )
-    web_results = Document(page_content=joined_tavily_result)
-    if documents is not None:
-        documents.append(web_results)
-    else:
-        documents = [web_results]
-
-
-def decide_to_generate(state):
-    print("🔍 ASSESS GRADED DOCUMENTS...")
-
-    if state["web_search"]:
-        print(
-            "DECISION: ⭕ NOT ALL DOCUMENTS ARE RELEVANT TO QUESTION, INCLUDE WEB_SEARCH"
-        )
-        return WEBSEARCH
-    else:
-        print("🤖 DECISION: GENERATE...")
-        return GENERATE
-
-
-def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-    retry_count = state.get("retry_count", 0)
-    if retry_count >= 3:
-        print("⛔ MAX RETRIES REACHED. FORCING END.")
-        return "useful"
-
-    print("🔍 CHECK HALLUCINATION...")
-    question = state["question"]
-    documents = state["documents"]
-    generation = state["generation"]
-
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
-    grade = score.binary_score
-    if grade.lower() == "yes":
-        print("✅ DECISION: GENERATION IS GROUNDED IN DOCUMENTS")
-        print("🔍 GRADE GENERATION VS QUESTION...")
-        score = answer_grader.invoke({"question": question, "generation": generation})
-        grade = score.binary_score
-        if grade.lower() == "yes":
-            print("✅ GRADE: GENERATION IS ANSWER TO QUESTION")
-            return "useful"
-        else:
-            print("⭕ GRADE: GENERATION IS NOT ANSWER TO QUESTION")
-            return "not useful"
-    else:
-        print("⭕ DECISION : GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY...")
-        return "not supported"
-
-
-workflow = StateGraph(GraphState)
-
-workflow.add_node(RETRIEVE, retrieve)
-workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-workflow.add_node(GENERATE, generate)
-workflow.add_node(WEBSEARCH, web_search)
-
-workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
-
-workflow.add_conditional_edges(
-    GRADE_DOCUMENTS,
-    decide_to_generate,
-    {WEBSEARCH: WEBSEARCH, GENERATE: GENERATE},
-)
+endee_retriever = vector_store.as_retriever(search_kwargs={"k": 4})
 
-workflow.add_conditional_edges(
-    GENERATE,
-    grade_generation_grounded_in_documents_and_question,
-    {"useful": END, "not useful": WEBSEARCH, "not supported": GENERATE},
+# chat history lives in the checkpointer, keyed by the Gradio session
+app = build_graph(
+    retriever=endee_retriever,
+    checkpointer=get_checkpointer(in_memory_fallback=True),
 )
 
-workflow.add_edge(WEBSEARCH, GENERATE)
-workflow.add_edge(GENERATE, END)
-
-workflow.set_entry_point(RETRIEVE)
-
-app = workflow.compile()
-
 
 def format_documents(documents):
     if not documents:
@@ -177,19 +54,24 @@ def format_documents(documents):
     return "\n\n---\n\n".join(formatted)
 
 
-def process_question(message, history):
+def process_question(message, history, request: gr.Request):
     try:
-        result = app.invoke(input={"question": message, "retry_count": 0})
+        result, queue_wait = get_frontend_pool().run(
+            request.session_hash, run_chat_turn, app, message, thread_id=request.session_hash
+        )
 
         generation = result.get("generation", "No answer generated.")
-        documents = result.get("documents", [])
+        documents = get_documents(result)
         web_search_triggered = result.get("web_search", False)
 
         response = f"**Answer:**\n{generation}\n\n"
 
         response += "---\n\n**Workflow Information:**\n"
+        if result.get("asked_question"):
+            response += f"- Standalone Question: {result['question']}\n"
         response += f"- Web Search Triggered: {'Yes ✅' if web_search_triggered else 'No ❌'}\n"
-        response += f"- Documents Retrieved: {len(documents)}\n\n"
+        response += f"- Documents Retrieved: {len(documents)}\n"
+        response += f"- Queue Wait: {queue_wait:.1f}s\n\n"
 
         if documents:
             response += "---\n\n**Retrieved Documents:**\n\n"
@@ -197,6 +79,8 @@ def process_question(message, history):
 
         return response
 
+    except ServerBusy as e:
+        return str(e)
     except Exception as e:
         return f"❌ **Error:** {str(e)}\n\nPlease check that the Endee server is running and try again."
 
@@ -259,6 +143,8 @@ if __name__ == "__main__":
     print("🚀 Starting Self-RAG Gradio Interface (Endee)...")
     print("📊 Loading LangGraph workflow...")
 
+    # admission is left to the frontend pool, which sheds load with a busy answer
+    demo.queue(default_concurrency_limit=None)
     demo.launch(
         server_name="0.0.0.0",
         server_port=7861,
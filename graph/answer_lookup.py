@@ -0,0 +1,151 @@
+"""
+Precomputed answers checked before retrieval.
+
+`python -m ingest.precompute` stores verified answers to likely questions
+in the snapshot directory (answers.json, see ingest/precompute.py). With
+SELF_RAG_ANSWER_LOOKUP set, the graph starts with a lookup node: a question
+matching a stored one (after normalization, or by question embedding
+similarity of at least ANSWER_LOOKUP_MIN_SIMILARITY) is answered from the
+store and the run ends without retrieval, grading or generation.
+
+Answers live in the snapshot they were verified against, so re-ingesting a
+corpus never serves an answer whose chunks changed: precompute carries an
+answer over to a new snapshot only when all of its chunks are still there.
+A graph looks up the answers of the snapshot(s) behind its own retriever
+(every shard's with SELF_RAG_INDEX_SHARDS, none for stores not opened from
+a snapshot), and embeds questions with the retriever's embeddings, so a
+miss leaves the query vector cached for retrieval.
+"""
+import json
+import os
+import re
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from graph import metrics
+from graph.chunk_store import chunk_store, replace_chunk_ids
+from graph.config import ANSWER_LOOKUP_MIN_SIMILARITY
+from graph.state import GraphState
+from ingest.precompute import ANSWERS_FILE
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(PUNCTUATION.sub(" ", question.lower()).split())
+
+
+class AnswerLookup:
+    """Verified answers keyed by normalized question, with question vectors."""
+
+    def __init__(self, entries: List[Dict[str, Any]], embedding: Optional[Embeddings] = None):
+        self.entries = entries
+        self.embedding = embedding
+        self.by_question = {normalize_question(e["question"]): e for e in entries}
+        vectors = [e.get("vector") for e in entries]
+        self.vectors = (
+            np.asarray(vectors, dtype=np.float32)
+            if entries and all(v is not None for v in vectors)
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(
+        self, question: str, min_similarity: float = ANSWER_LOOKUP_MIN_SIMILARITY
+    ) -> Optional[Dict[str, Any]]:
+        entry = self.by_question.get(normalize_question(question))
+        if entry is not None or self.vectors is None or self.embedding is None:
+            return entry
+        if min_similarity >= 1:
+            return None
+        query = np.asarray(self.embedding.embed_query(question), dtype=np.float32)
+        if query.shape[0] != self.vectors.shape[1]:
+            # stored with another embedding model than the retriever's
+            return None
+        norms = np.linalg.norm(self.vectors, axis=1) * (np.linalg.norm(query) or 1)
+        similarities = self.vectors @ query / np.where(norms == 0, 1, norms)
+        best = int(np.argmax(similarities))
+        return self.entries[best] if similarities[best] >= min_similarity else None
+
+    @classmethod
+    def load(cls, path: str, embedding: Optional[Embeddings] = None) -> "AnswerLookup":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), embedding)
+
+
+_lookups: "weakref.WeakKeyDictionary[VectorStore, AnswerLookup]" = weakref.WeakKeyDictionary()
+_lookup_lock = threading.Lock()
+
+
+def load_answer_lookup(vectorstore: VectorStore) -> AnswerLookup:
+    """Answers of the snapshots behind a vector store (empty when none were precomputed)."""
+    from ingest.snapshot import snapshots_behind
+
+    entries: List[Dict[str, Any]] = []
+    for snapshot in snapshots_behind(vectorstore):
+        path = os.path.join(snapshot.path, ANSWERS_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                entries += json.load(f)
+    if entries:
+        print(f"📒 Loaded {len(entries)} precomputed answers")
+    return AnswerLookup(entries, vectorstore.embeddings)
+
+
+def get_answer_lookup(retriever: Optional[BaseRetriever] = None) -> AnswerLookup:
+    """Answers for a retriever's snapshots, loaded once per vector store."""
+    from graph.nodes.retrieve import get_default_retriever
+
+    vectorstore = getattr(retriever or get_default_retriever(), "vectorstore", None)
+    if vectorstore is None:
+        # retrievers not backed by a vector store have no snapshot answers
+        return AnswerLookup([])
+    with _lookup_lock:
+        lookup = _lookups.get(vectorstore)
+        if lookup is None:
+            lookup = _lookups[vectorstore] = load_answer_lookup(vectorstore)
+        return lookup
+
+
+def lookup_answer(
+    state: GraphState,
+    lookup: Optional[AnswerLookup] = None,
+    retriever: Optional[BaseRetriever] = None,
+) -> Dict[str, Any]:
+    """
+    Answer from the precomputed answers when the question matches one.
+    Filtered questions always go through retrieval.
+    Args:
+        state (dict): the current graph state
+        lookup: answers to check, defaults to those of the retriever's snapshots
+        retriever: the graph's retriever, defaults to the served index
+
+    :return:
+        state (dict): the stored answer and its chunks on a hit, else nothing
+    """
+    if state.get("filter"):
+        return {}
+    lookup = get_answer_lookup(retriever) if lookup is None else lookup
+    entry = lookup.match(state["question"]) if len(lookup) else None
+    if entry is None:
+        metrics.increment("answer_lookups", "miss")
+        return {}
+    print(f"📒 Answered from precomputed answers: {entry['question']!r}")
+    metrics.increment("answer_lookups", "hit")
+    ids = chunk_store.put_many(
+        Document(page_content=c["text"], metadata=c["metadata"]) for c in entry["chunks"]
+    )
+    return {
+        "generation": entry["answer"],
+        "chunk_ids": replace_chunk_ids(ids),
+        "web_search": False,
+    }
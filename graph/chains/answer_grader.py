@@ -3,7 +3,7 @@ from dotenv import load_dotenv
 load_dotenv()
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+from graph.chains.llm import get_chat_model
 from langchain_core.runnables import RunnableSequence
 
 
@@ -13,7 +13,7 @@ class GradeAnswer(BaseModel):
     binary_score: str = Field(description="Answer is correct, 'yes' or 'no'")
 
 
-llm = ChatOpenAI(model="gpt-4.1-nano")
+llm = get_chat_model()
 structured_llm_grader = llm.with_structured_output(GradeAnswer)
 
 system = """you are a grader assessing whether an answer addresses / resolves a question. \n
@@ -1,8 +1,8 @@
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from graph.chains.llm import get_chat_model
 
-llm = ChatOpenAI(model="gpt-4.1-nano")
+llm = get_chat_model()
 
 # RAG prompt template
 prompt = ChatPromptTemplate.from_messages([
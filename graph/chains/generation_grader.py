@@ -0,0 +1,37 @@
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from graph.chains.llm import get_chat_model
+from langchain_core.runnables import RunnableSequence
+
+llm = get_chat_model()
+
+
+class GradeGeneration(BaseModel):
+    """Binary scores for grounding and usefulness of a generation, graded in one call."""
+
+    grounded: str = Field(
+        description="Answer is grounded in the facts, 'yes' or 'no'"
+    )
+    answers_question: str = Field(
+        description="Answer addresses / resolves the question, 'yes' or 'no'"
+    )
+
+
+structured_llm_grader = llm.with_structured_output(GradeGeneration)
+
+system = """You are a grader assessing an LLM generation against a set of retrieved facts and a user question. \n
+     First decide whether the generation is grounded in / supported by the retrieved facts: 'yes' or 'no'. \n
+     Then decide whether the generation addresses / resolves the question: 'yes' or 'no'. \n
+     Grade both independently."""
+
+generation_grader_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        (
+            "human",
+            "Retrieved facts: \n\n {documents} \n\n User question: {question} \n\n LLM generation: {generation}",
+        ),
+    ]
+)
+
+generation_grader: RunnableSequence = generation_grader_prompt | structured_llm_grader
@@ -1,9 +1,9 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+from graph.chains.llm import get_chat_model
 from langchain_core.runnables import RunnableSequence
 
-llm = ChatOpenAI(model="gpt-4.1-nano")
+llm = get_chat_model()
 
 
 class GradeHallucination(BaseModel):
@@ -0,0 +1,23 @@
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from graph.config import FAKE_MODELS
+
+
+def get_chat_model(model: str = "gpt-4.1-nano") -> BaseChatModel:
+    """Chat model for the chains; a local fake when SELF_RAG_FAKE_MODELS is set."""
+    if FAKE_MODELS:
+        from graph.fakes import FakeChatModel
+
+        return FakeChatModel()
+    return ChatOpenAI(model=model)
+
+
+def get_embeddings() -> Embeddings:
+    """Embedding model for indexes; a local fake when SELF_RAG_FAKE_MODELS is set."""
+    if FAKE_MODELS:
+        from graph.fakes import fake_embeddings
+
+        return fake_embeddings()
+    return OpenAIEmbeddings()
@@ -0,0 +1,18 @@
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+from graph.chains.llm import get_chat_model
+
+llm = get_chat_model()
+
+system = """You rewrite the follow-up question of a conversation into a standalone question. \n
+     Resolve references such as "it", "that" or "the second one" from the conversation, keep everything the user asked for and add nothing else. \n
+     If the question already stands on its own, return it unchanged. Return only the question."""
+condense_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Conversation:\n\n{history}\n\nFollow-up question: {question}"),
+    ]
+)
+
+question_condenser: RunnableSequence = condense_prompt | llm | StrOutputParser()
@@ -0,0 +1,31 @@
+from typing import List
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+from pydantic import BaseModel, Field
+from graph.chains.llm import get_chat_model
+
+llm = get_chat_model()
+
+
+class LikelyQuestions(BaseModel):
+    """Questions users are likely to ask that the text answers."""
+
+    questions: List[str] = Field(
+        description="Self-contained questions answered by the text"
+    )
+
+
+structured_llm_generator = llm.with_structured_output(LikelyQuestions)
+
+system = """You write the questions users of a documentation assistant are most likely to ask about a section of text. \n
+     Each question must be answered by the text, make sense without seeing it, and be phrased the way a user would ask. \n
+     Return at most {count} questions, most likely first."""
+question_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Section: {section}\n\nText:\n\n{text}"),
+    ]
+)
+
+question_generator: RunnableSequence = question_prompt | structured_llm_generator
@@ -0,0 +1,21 @@
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from graph.chains.llm import get_chat_model
+from langchain_core.runnables import RunnableSequence
+
+llm = get_chat_model()
+
+system = """You are a question re-writer that converts an input question to a better version that is optimized \n
+     for vectorstore retrieval. Look at the input and try to reason about the underlying semantic intent / meaning. \n
+     Return only the improved question."""
+re_write_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        (
+            "human",
+            "Here is the initial question: \n\n {question} \n Formulate an improved question.",
+        ),
+    ]
+)
+
+question_rewriter: RunnableSequence = re_write_prompt | llm | StrOutputParser()
@@ -0,0 +1,42 @@
+from typing import List
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+from pydantic import BaseModel, Field
+from graph.chains.llm import get_chat_model
+
+llm = get_chat_model()
+
+
+class ReflectiveGeneration(BaseModel):
+    """Answer with its own reflection: chunk relevance, support and usefulness, in one call."""
+
+    relevant_chunks: List[int] = Field(
+        description="Numbers of the context chunks relevant to the question"
+    )
+    answer: str = Field(
+        description="Answer to the question using only the relevant chunks"
+    )
+    grounded: str = Field(
+        description="Answer is fully supported by the relevant chunks, 'yes' or 'no'"
+    )
+    answers_question: str = Field(
+        description="Answer addresses / resolves the question, 'yes' or 'no'"
+    )
+
+
+structured_llm_generator = llm.with_structured_output(ReflectiveGeneration)
+
+system = """You are an assistant for question-answering tasks that reflects on its own work. \n
+     First list the numbers of the context chunks that contain keyword(s) or semantic meaning related to the question. \n
+     Then answer the question using only those chunks. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise. \n
+     Finally judge your answer: is it fully supported by the relevant chunks ('yes' or 'no'), and does it address / resolve the question ('yes' or 'no')? Be strict."""
+
+reflective_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Question: {question}\n\nContext chunks:\n\n{context}"),
+    ]
+)
+
+reflective_generation: RunnableSequence = reflective_prompt | structured_llm_generator
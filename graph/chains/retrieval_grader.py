@@ -1,8 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+from graph.chains.llm import get_chat_model
 
-llm = ChatOpenAI(model="gpt-4.1-nano")
+llm = get_chat_model()
 
 
 class GradeDocuments(BaseModel):
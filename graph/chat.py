@@ -0,0 +1,92 @@
+from typing import Any, Dict, List, Optional
+
+from graph.checkpoint import thread_config
+from graph.chunk_store import get_documents, replace_chunk_ids
+from graph.config import REUSE_FOLLOW_UP_CHUNKS
+
+
+def turn_messages(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The user/assistant messages of the finished turn held in a state."""
+    if not state.get("generation"):
+        return []
+    sources = [doc.metadata.get("source", "web search") for doc in get_documents(state)]
+    return [
+        {"role": "user", "content": state.get("asked_question") or state["question"]},
+        {
+            "role": "assistant",
+            "content": state["generation"],
+            "web_search": state.get("web_search", False),
+            "sources": sources,
+        },
+    ]
+
+
+def reusable_chunk_ids(
+    previous: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """
+    Relevant chunks of the previous turn a follow-up may reuse: only from an
+    answered turn that stayed on the local index under the same filter.
+    Retrieval keeps those it returns again; the others are dropped.
+    """
+    if (
+        not REUSE_FOLLOW_UP_CHUNKS
+        or not previous.get("generation")
+        or previous.get("web_search")
+        or (previous.get("filter") or {}) != (metadata_filter or {})
+    ):
+        return []
+    return list(previous.get("chunk_ids") or [])
+
+
+def turn_input(
+    question: str, previous: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Input for a new turn on a checkpointed thread. The previous turn is folded
+    into chat_history and per-turn fields (including the metadata filter) are
+    reset so they don't leak into the routing of the new question; its
+    relevant chunks are offered to the new turn as prior_chunk_ids.
+    """
+    prior = reusable_chunk_ids(previous, metadata_filter)
+    previous_scores = previous.get("scores") or {}
+    return {
+        "question": question,
+        "filter": metadata_filter or {},
+        "generation": "",
+        "chunk_ids": replace_chunk_ids([]),
+        "scores": {key: previous_scores[key] for key in prior if key in previous_scores},
+        "web_search": False,
+        "graded_count": 0,
+        "retry_count": 0,
+        "generation_retries": 0,
+        "query_rewrites": 0,
+        "rewritten_question": "",
+        "reflection": {},
+        "asked_question": "",
+        "prior_chunk_ids": prior,
+        "carried_chunk_ids": [],
+        "chat_history": turn_messages(previous),
+    }
+
+
+def get_chat_history(app: Any, thread_id: str) -> List[Dict[str, Any]]:
+    """All messages of a chat session, read from the graph's checkpointer."""
+    state = app.get_state(thread_config(thread_id)).values
+    return list(state.get("chat_history", [])) + turn_messages(state)
+
+
+def run_chat_turn(
+    app: Any,
+    question: str,
+    thread_id: str,
+    metadata_filter: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    config = thread_config(thread_id)
+    previous = app.get_state(config).values
+    return app.invoke(turn_input(question, previous, metadata_filter), config)
+
+
+def resume_run(app: Any, thread_id: str) -> Dict[str, Any]:
+    """Continue an interrupted run from its last checkpoint; finished nodes are not re-run."""
+    return app.invoke(None, thread_config(thread_id))
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import uuid
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from graph.config import CHECKPOINT_DB
+
+
+def get_checkpointer(
+    path: str = CHECKPOINT_DB, in_memory_fallback: bool = False
+) -> Optional[BaseCheckpointSaver]:
+    """
+    Build the checkpointer for compiled graphs.
+
+    Args:
+        path: SQLite file to persist checkpoints to ("" disables persistence)
+        in_memory_fallback: use an in-process saver when no path is configured,
+            for chat frontends that need per-session history either way
+
+    Returns:
+        A checkpointer, or None when checkpointing is disabled
+    """
+    if path:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        print(f"💾 Checkpointing graph runs to {path}")
+        conn = sqlite3.connect(path, check_same_thread=False)
+        return SqliteSaver(conn)
+    if in_memory_fallback:
+        return InMemorySaver()
+    return None
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def one_off_config() -> Dict[str, Any]:
+    """A fresh thread for a single run: checkpointed graphs need a thread id."""
+    return thread_config(str(uuid.uuid4()))
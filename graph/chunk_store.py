@@ -0,0 +1,175 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from langchain_core.documents import Document
+
+from graph.config import CHECKPOINT_DB, CHUNK_STORE_SIZE, CHUNK_STORE_TTL
+
+ChunkIdsUpdate = Union[List[str], Dict[str, List[str]]]
+
+
+def chunk_id(doc: Document) -> str:
+    """Content-addressed id, so the same chunk from two retrievals dedups."""
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:16]
+
+
+class ChunkNotFound(LookupError):
+    """A graph state refers to chunk ids the chunk store does not have."""
+
+
+class ChunkStore:
+    """
+    Thread-safe store of the chunks graph runs refer to by id. Graph state
+    only carries ids and scores; text is looked up here when a prompt is
+    built.
+
+    Every chunk is written through to a SQLite table and the most recently
+    used max_chunks are kept in memory. With a checkpoint database the table
+    lives next to the checkpoints, so runs resumed in a new process and
+    chat turns loaded from the checkpointer find their chunks; otherwise it
+    is a temporary file for the life of the process, so evicting a chunk
+    from memory never loses it for a run still using it.
+
+    Rows record when a run last put or read them, and rows unused for ttl
+    seconds are pruned (at most every prune_interval seconds, on put).
+    Content-identical chunks share an id; the latest copy's metadata wins,
+    in memory and in the table alike, as the run that just retrieved it
+    expects.
+    """
+
+    prune_interval = 60.0
+
+    def __init__(
+        self,
+        max_chunks: int = CHUNK_STORE_SIZE,
+        path: Optional[str] = None,
+        ttl: float = CHUNK_STORE_TTL,
+    ):
+        self.max_chunks = max_chunks
+        self.ttl = ttl
+        self._chunks: "OrderedDict[str, Document]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pruned_at = time.time()
+        if not path:
+            fd, path = tempfile.mkstemp(prefix="self-rag-chunks-", suffix=".sqlite")
+            os.close(fd)
+            atexit.register(os.remove, path)
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks "
+            "(id TEXT PRIMARY KEY, text TEXT, metadata TEXT, used_at REAL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(chunks)")]
+        if "used_at" not in columns:
+            # tables written before pruning; their rows count as unused
+            self._db.execute("ALTER TABLE chunks ADD COLUMN used_at REAL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_used_at ON chunks (used_at)")
+        self._db.commit()
+
+    def _cache(self, key: str, doc: Document) -> None:
+        self._chunks[key] = doc
+        self._chunks.move_to_end(key)
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+
+    def put(self, doc: Document) -> str:
+        return self.put_many([doc])[0]
+
+    def put_many(self, docs: Iterable[Document]) -> List[str]:
+        docs = list(docs)
+        keys = [chunk_id(doc) for doc in docs]
+        now = time.time()
+        rows = [
+            (key, doc.page_content, json.dumps(doc.metadata, default=str), now)
+            for key, doc in zip(keys, docs)
+        ]
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO chunks VALUES (?, ?, ?, ?) ON CONFLICT(id) DO UPDATE "
+                    "SET metadata = excluded.metadata, used_at = excluded.used_at",
+                    rows,
+                )
+                if now - self._pruned_at >= self.prune_interval:
+                    self._prune(now)
+            for key, doc in zip(keys, docs):
+                self._cache(key, doc)
+        return keys
+
+    def _prune(self, now: float) -> None:
+        self._pruned_at = now
+        deleted = self._db.execute(
+            "DELETE FROM chunks WHERE used_at < ?", (now - self.ttl,)
+        ).rowcount
+        if deleted:
+            print(f"🧹 Pruned {deleted} unused chunks from the chunk store")
+
+    def materialize(self, ids: Iterable[str]) -> List[Document]:
+        """
+        Documents for the given ids, from memory or the SQLite table.
+
+        Raises:
+            ChunkNotFound: for ids that were never put in this store
+        """
+        ids = list(ids)
+        with self._lock:
+            found = {key: self._chunks[key] for key in ids if key in self._chunks}
+            missing = [key for key in dict.fromkeys(ids) if key not in found]
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._db.execute(
+                    f"SELECT id, text, metadata FROM chunks WHERE id IN ({placeholders})",
+                    missing,
+                ).fetchall()
+                for key, text, metadata in rows:
+                    found[key] = Document(page_content=text, metadata=json.loads(metadata))
+            unknown = [key for key in missing if key not in found]
+            if unknown:
+                raise ChunkNotFound(f"Chunks not in the chunk store: {', '.join(unknown)}")
+            if found:
+                with self._db:
+                    placeholders = ",".join("?" * len(found))
+                    self._db.execute(
+                        f"UPDATE chunks SET used_at = ? WHERE id IN ({placeholders})",
+                        [time.time(), *found],
+                    )
+            for key in ids:
+                self._cache(key, found[key])
+        return [found[key] for key in ids]
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+chunk_store = ChunkStore(path=CHECKPOINT_DB or None)
+
+
+def replace_chunk_ids(ids: List[str]) -> Dict[str, List[str]]:
+    """Update for the chunk_ids channel that replaces the list instead of extending it."""
+    return {"replace": list(ids)}
+
+
+def merge_chunk_ids(current: List[str], update: ChunkIdsUpdate) -> List[str]:
+    """
+    Reducer for GraphState.chunk_ids. A list update appends ids not yet
+    present; replace_chunk_ids(...) replaces the list. Always returns a new list.
+    """
+    if isinstance(update, dict):
+        return list(dict.fromkeys(update["replace"]))
+    return list(dict.fromkeys([*(current or []), *update]))
+
+
+def get_documents(state: Dict[str, Any]) -> List[Document]:
+    """Materialize the documents a graph state (or final result) refers to."""
+    return chunk_store.materialize(state.get("chunk_ids") or [])
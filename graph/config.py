@@ -0,0 +1,161 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# How many times a question may be rewritten and re-retrieved from the local
+# index before the graph falls back to web search. 0 disables transform_query.
+MAX_QUERY_REWRITES = int(os.getenv("SELF_RAG_MAX_QUERY_REWRITES", "1"))
+
+# Policy decide_to_generate uses to judge whether the graded documents are
+# enough to answer: "all" (every retrieved document must be relevant, the
+# original behaviour), "min_relevant", "fraction" or "score".
+ROUTING_POLICY = os.getenv("SELF_RAG_ROUTING_POLICY", "min_relevant")
+MIN_RELEVANT_DOCUMENTS = int(os.getenv("SELF_RAG_MIN_RELEVANT", "2"))
+MIN_RELEVANT_FRACTION = float(os.getenv("SELF_RAG_MIN_RELEVANT_FRACTION", "0.5"))
+# Sum of vector store relevance scores (0..1) of the relevant documents.
+MIN_RELEVANCE_SCORE = float(os.getenv("SELF_RAG_MIN_RELEVANCE_SCORE", "1.0"))
+
+# Consume retrieval grader verdicts as they complete and stop grading once
+# GRADING_SUFFICIENT_RELEVANT chunks are relevant and the routing policy is
+# satisfied by the verdicts so far; the remaining grader calls are cancelled.
+STREAMING_GRADING = env_flag("SELF_RAG_STREAMING_GRADING")
+GRADING_SUFFICIENT_RELEVANT = int(
+    os.getenv("SELF_RAG_GRADING_SUFFICIENT_RELEVANT", str(MIN_RELEVANT_DOCUMENTS))
+)
+
+# Learned local relevance grader (graph/local_grader.py). GRADER_LOG is a
+# JSONL file LLM grader verdicts are appended to as training data.
+# GRADING_MODE is "llm", "shadow" (LLM grades, the local model's agreement
+# is measured) or "local" (the local model grades when at least
+# LOCAL_GRADER_CONFIDENCE sure, the LLM grades the rest).
+GRADER_LOG = os.getenv("SELF_RAG_GRADER_LOG", "")
+GRADING_MODE = os.getenv("SELF_RAG_GRADING_MODE", "llm")
+LOCAL_GRADER_MODEL = os.getenv("SELF_RAG_LOCAL_GRADER_MODEL", "./grader_model.npz")
+LOCAL_GRADER_CONFIDENCE = float(os.getenv("SELF_RAG_LOCAL_GRADER_CONFIDENCE", "0.9"))
+
+# How a generation is critiqued: "sequential" (hallucination grader, then
+# answer grader), "concurrent" (both graders at once) or "combined" (a single
+# structured call returning both verdicts).
+CRITIQUE_MODE = os.getenv("SELF_RAG_CRITIQUE_MODE", "sequential")
+
+# How the first answer is produced: "multi_call" (grade each chunk, generate,
+# then critique with separate grader calls) or "reflective" (one structured
+# call returns chunk relevance, the answer and its support / usefulness
+# verdicts; retries, rewrites and web search use the multi-call path).
+GENERATION_MODE = os.getenv("SELF_RAG_GENERATION_MODE", "multi_call")
+
+# Check generated sentences for grounding while the answer streams and abort
+# the generation as soon as one is unsupported. Sentences whose word overlap
+# with the context falls between the two thresholds are sent to the
+# hallucination grader.
+STREAMING_GROUNDING = env_flag("SELF_RAG_STREAMING_GROUNDING")
+GROUNDING_SUPPORTED_OVERLAP = float(os.getenv("SELF_RAG_GROUNDING_SUPPORTED", "0.6"))
+GROUNDING_UNSUPPORTED_OVERLAP = float(os.getenv("SELF_RAG_GROUNDING_UNSUPPORTED", "0.2"))
+STREAMING_GENERATION_ATTEMPTS = int(os.getenv("SELF_RAG_STREAMING_ATTEMPTS", "2"))
+
+# Confidence-gated fast path (graph/fast_path.py): a first generation from
+# at least FAST_PATH_MIN_RELEVANT local chunks, all graded relevant and all
+# with a retrieval relevance score of FAST_PATH_MIN_SCORE or more, skips the
+# synchronous critique. FAST_PATH_AUDIT_RATE of those answers are critiqued
+# in the background; outcomes go to FAST_PATH_AUDIT_LOG (JSONL) if set.
+FAST_PATH = env_flag("SELF_RAG_FAST_PATH")
+FAST_PATH_MIN_RELEVANT = int(os.getenv("SELF_RAG_FAST_PATH_MIN_RELEVANT", "2"))
+FAST_PATH_MIN_SCORE = float(os.getenv("SELF_RAG_FAST_PATH_MIN_SCORE", "0.8"))
+FAST_PATH_AUDIT_RATE = float(os.getenv("SELF_RAG_FAST_PATH_AUDIT_RATE", "0.1"))
+FAST_PATH_AUDIT_LOG = os.getenv("SELF_RAG_FAST_PATH_AUDIT_LOG", "")
+
+# Token budget for the context passed to generation (0 = no limit). Chunks are
+# packed in retrieval order using the token counts stored at ingestion.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("SELF_RAG_CONTEXT_TOKEN_BUDGET", "0"))
+
+# Small-to-big retrieval (graph/parents.py): chunks of an index built with
+# parent_chunk_size are graded as they are, then replaced by their parent
+# chunks (each once) for generation and the generation critique.
+PARENT_EXPANSION = env_flag("SELF_RAG_PARENT_EXPANSION", True)
+
+# Regenerating an answer the critique found not supported (a hallucination
+# retry) this many times returns a fallback answer instead of calling the LLM
+# again, and the critique step then ends the run. Generations for new context
+# (after a query rewrite or web search) don't count.
+MAX_GENERATION_RETRIES = int(os.getenv("SELF_RAG_MAX_GENERATION_RETRIES", "3"))
+
+# SQLite file used to checkpoint graph runs (opt-in). Runs on a thread id can
+# then be resumed after a crash without re-paying for finished nodes.
+CHECKPOINT_DB = os.getenv("SELF_RAG_CHECKPOINT_DB", "")
+
+# Chunks kept in memory by the chunk store that graph state ids point into.
+# All chunks are also written to a table in CHECKPOINT_DB (or a temporary
+# file), so resumed runs can read them back. Rows no run has put or read for
+# CHUNK_STORE_TTL seconds are pruned, so the table doesn't grow for the life
+# of a server; resuming a thread older than that fails with ChunkNotFound.
+CHUNK_STORE_SIZE = int(os.getenv("SELF_RAG_CHUNK_STORE_SIZE", "10000"))
+CHUNK_STORE_TTL = float(os.getenv("SELF_RAG_CHUNK_STORE_TTL", "604800"))
+
+# Follow-up questions in chat sessions (graph/nodes/condense_question.py): a
+# question asked after earlier turns is rewritten into a standalone question
+# from the last CHAT_HISTORY_TURNS turns before retrieval. With
+# REUSE_FOLLOW_UP_CHUNKS, the previous turn's relevant chunks that retrieval
+# for the new question returns again keep their verdict, so only the other
+# retrieved chunks are graded. Both are off by default.
+CONDENSE_FOLLOW_UPS = env_flag("SELF_RAG_CONDENSE_FOLLOW_UPS", False)
+CHAT_HISTORY_TURNS = int(os.getenv("SELF_RAG_CHAT_HISTORY_TURNS", "3"))
+REUSE_FOLLOW_UP_CHUNKS = env_flag("SELF_RAG_REUSE_FOLLOW_UP_CHUNKS", False)
+
+# Precomputed answers (graph/answer_lookup.py, built by ingest/precompute.py):
+# questions matching a verified stored one, exactly after normalization or
+# with question embedding similarity of at least ANSWER_LOOKUP_MIN_SIMILARITY
+# (1 = exact matches only), are answered before retrieval.
+ANSWER_LOOKUP = env_flag("SELF_RAG_ANSWER_LOOKUP")
+ANSWER_LOOKUP_MIN_SIMILARITY = float(os.getenv("SELF_RAG_ANSWER_LOOKUP_SIMILARITY", "0.95"))
+
+# Federated retrieval (graph/federated.py): comma-separated index names whose
+# CURRENT snapshots are searched concurrently through one retriever instead
+# of SELF_RAG_INDEX_NAME alone. A shard slower than SHARD_TIMEOUT seconds is
+# left out of the results. SHARD_SCORE_NORMALIZATION is "relevance" (the
+# stores' own 0..1 scores) or "minmax" (per-shard rescaling). A shard with
+# SHARD_MAX_PENDING searches still running (e.g. a hung backend) is skipped
+# until they finish, so it can't tie up the search threads of the others.
+INDEX_SHARDS = [
+    name.strip() for name in os.getenv("SELF_RAG_INDEX_SHARDS", "").split(",") if name.strip()
+]
+SHARD_TIMEOUT = float(os.getenv("SELF_RAG_SHARD_TIMEOUT", "2.0"))
+SHARD_SCORE_NORMALIZATION = os.getenv("SELF_RAG_SHARD_NORMALIZATION", "relevance")
+SHARD_MAX_PENDING = int(os.getenv("SELF_RAG_SHARD_MAX_PENDING", "4"))
+
+# Write-back of web search results (graph/web_cache.py): results are chunked,
+# deduplicated and embedded into a local collection at WEB_CACHE_PATH, kept
+# for WEB_CACHE_TTL seconds, and retrieve adds the WEB_CACHE_K best unexpired
+# chunks to the main index's results. Expired chunks are swept every
+# WEB_CACHE_SWEEP seconds.
+WEB_CACHE = env_flag("SELF_RAG_WEB_CACHE")
+WEB_CACHE_PATH = os.getenv("SELF_RAG_WEB_CACHE_PATH", "./indexes/web_cache.json")
+WEB_CACHE_TTL = float(os.getenv("SELF_RAG_WEB_CACHE_TTL", str(24 * 3600)))
+WEB_CACHE_SWEEP = float(os.getenv("SELF_RAG_WEB_CACHE_SWEEP", "3600"))
+WEB_CACHE_K = int(os.getenv("SELF_RAG_WEB_CACHE_K", "2"))
+
+# Replace OpenAI models, embeddings and Tavily with local fakes (graph/fakes.py)
+# so the graph and the HTTP server run without API keys, e.g. in tests.
+FAKE_MODELS = env_flag("SELF_RAG_FAKE_MODELS")
+
+# Warm start: build_graph opens the index, pages it in, pre-connects to the
+# model endpoints and replays canned queries (one per line in
+# SELF_RAG_WARMUP_QUERIES, or a few built-in ones) before returning. The
+# module-level graph.graph.app is never warmed on import; main.py and
+# gradio_app.py warm it up before serving.
+WARM_START = env_flag("SELF_RAG_WARM_START")
+WARMUP_QUERIES_FILE = os.getenv("SELF_RAG_WARMUP_QUERIES", "")
+
+# Worker-level admission control for served graph runs (the HTTP server and
+# the Gradio / Streamlit apps): runs executing at once, and runs allowed to
+# wait for a slot before requests are rejected. The apps also limit the runs
+# one user (browser session) may have in flight.
+MAX_CONCURRENT_RUNS = int(os.getenv("SELF_RAG_MAX_CONCURRENT_RUNS", "8"))
+MAX_QUEUED_RUNS = int(os.getenv("SELF_RAG_MAX_QUEUED_RUNS", "32"))
+MAX_RUNS_PER_USER = int(os.getenv("SELF_RAG_MAX_RUNS_PER_USER", "1"))
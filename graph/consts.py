@@ -2,3 +2,7 @@ RETRIEVE = "retrieve"
 GRADE_DOCUMENTS = "grade_documents"
 GENERATE = "generate"
 WEBSEARCH = "websearch"
+TRANSFORM_QUERY = "transform_query"
+REFLECTIVE_GENERATE = "reflective_generate"
+LOOKUP_ANSWER = "lookup_answer"
+CONDENSE_QUESTION = "condense_question"
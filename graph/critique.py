@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Optional, Tuple
+
+from graph.chains.answer_grader import answer_grader
+from graph.chains.generation_grader import generation_grader
+from graph.chains.hallucination_grader import hallucination_grader
+from graph.config import CRITIQUE_MODE
+
+CRITIQUE_MODES = ("sequential", "concurrent", "combined")
+
+
+def is_yes(grade: str) -> bool:
+    return grade.strip().lower() == "yes"
+
+
+async def grade_concurrently(
+    question: str, documents: Any, generation: str
+) -> Tuple[bool, bool]:
+    hallucination_score, answer_score = await asyncio.gather(
+        hallucination_grader.ainvoke(
+            {"documents": documents, "generation": generation}
+        ),
+        answer_grader.ainvoke({"question": question, "generation": generation}),
+    )
+    return is_yes(hallucination_score.binary_score), is_yes(answer_score.binary_score)
+
+
+def critique_generation(
+    question: str, documents: Any, generation: str, mode: str = CRITIQUE_MODE
+) -> Tuple[bool, Optional[bool]]:
+    """
+    Grade a generation for grounding and usefulness.
+
+    Args:
+        question: the user question
+        documents: documents the generation was based on
+        generation: the LLM generation
+        mode: one of CRITIQUE_MODES
+
+    Returns:
+        Tuple of (grounded, answers_question). answers_question is None when
+        the sequential mode stopped after an ungrounded generation.
+    """
+    if mode == "combined":
+        score = generation_grader.invoke(
+            {"question": question, "documents": documents, "generation": generation}
+        )
+        return is_yes(score.grounded), is_yes(score.answers_question)
+
+    if mode == "concurrent":
+        return asyncio.run(grade_concurrently(question, documents, generation))
+
+    if mode != "sequential":
+        raise ValueError(
+            f"Unknown critique mode {mode!r}, expected one of {CRITIQUE_MODES}"
+        )
+
+    score = hallucination_grader.invoke(
+        {"documents": documents, "generation": generation}
+    )
+    if not is_yes(score.binary_score):
+        return False, None
+    score = answer_grader.invoke({"question": question, "generation": generation})
+    return True, is_yes(score.binary_score)
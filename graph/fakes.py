@@ -0,0 +1,98 @@
+"""
+Local stand-ins for the OpenAI models, embeddings and Tavily, used when
+SELF_RAG_FAKE_MODELS is set so the graph runs without network access.
+"""
+from typing import Any, List, Optional, get_origin
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.vectorstores import InMemoryVectorStore
+
+SAMPLE_DOCUMENTS = [
+    Document(
+        page_content="Agent memory is split into short-term memory, which is in-context learning, "
+        "and long-term memory, which is an external vector store the agent can query.",
+        metadata={"source": "fake://agent"},
+    ),
+    Document(
+        page_content="Planning lets an agent break a large task into smaller subgoals and reflect "
+        "on past actions to refine them.",
+        metadata={"source": "fake://agent"},
+    ),
+    Document(
+        page_content="Chain of thought prompting asks the model to think step by step before "
+        "answering, which improves performance on complex reasoning tasks.",
+        metadata={"source": "fake://prompt-engineering"},
+    ),
+    Document(
+        page_content="Adversarial attacks on LLMs include jailbreak prompts and token manipulation "
+        "that try to make the model produce unsafe output.",
+        metadata={"source": "fake://adv-attack-llm"},
+    ),
+]
+
+
+def _fake_value(annotation: Any) -> Any:
+    if annotation is str:
+        return "yes"
+    if annotation in (int, float):
+        return annotation(1)
+    if annotation is bool:
+        return True
+    if get_origin(annotation) in (list, List):
+        return []
+    return None
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers with a short echo of the prompt; structured output grades everything 'yes'."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-self-rag"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last = str(messages[-1].content).strip().splitlines()[0] if messages else ""
+        reply = AIMessage(content=f"Fake answer. {last[:200]}")
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        values = {
+            name: _fake_value(field.annotation)
+            for name, field in schema.model_fields.items()
+        }
+        return RunnableLambda(lambda _: schema(**values))
+
+
+def fake_web_search_tool() -> Runnable:
+    return RunnableLambda(
+        lambda query: {
+            "results": [
+                {
+                    "url": "https://example.com/fake-search",
+                    "content": f"Fake web search result for {query['query']}.",
+                }
+            ]
+        }
+    )
+
+
+def fake_embeddings() -> DeterministicFakeEmbedding:
+    return DeterministicFakeEmbedding(size=256)
+
+
+def fake_retriever(documents: List[Document] = SAMPLE_DOCUMENTS) -> BaseRetriever:
+    vectorstore = InMemoryVectorStore(fake_embeddings())
+    vectorstore.add_documents(documents)
+    return vectorstore.as_retriever()
@@ -0,0 +1,119 @@
+"""
+Confidence-gated fast path past the critique step.
+
+When every graded chunk came from the local index (not web search or the
+web cache), was graded relevant and scored at least FAST_PATH_MIN_SCORE,
+the first generation is returned without the synchronous hallucination /
+answer critique. A sample of those
+answers (FAST_PATH_AUDIT_RATE) is critiqued in a background thread after
+the response is returned; outcomes are counted in graph.metrics and, with
+FAST_PATH_AUDIT_LOG set, appended to a JSONL file for tuning the thresholds.
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from graph import metrics
+from graph.chunk_store import chunk_id, chunk_store
+from graph.config import (
+    FAST_PATH_AUDIT_LOG,
+    FAST_PATH_AUDIT_RATE,
+    FAST_PATH_MIN_RELEVANT,
+    FAST_PATH_MIN_SCORE,
+)
+from graph.critique import critique_generation
+from graph.state import GraphState
+
+_audits = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fast-path-audit")
+_log_lock = threading.Lock()
+_sampler = random.Random()
+
+
+def retrieval_confidence(state: GraphState) -> Dict[str, Any]:
+    """
+    Signals the fast path is gated on. Chunks from the web cache
+    (origin "web") are counted apart: they are not local index chunks,
+    however well they score.
+    """
+    chunk_ids = state.get("chunk_ids") or []
+    web_ids = {
+        chunk_id(doc)
+        for doc in chunk_store.materialize(chunk_ids)
+        if doc.metadata.get("origin") == "web"
+    }
+    local_ids = [key for key in chunk_ids if key not in web_ids]
+    scores = state.get("scores") or {}
+    relevant_scores = [scores[key] for key in local_ids if key in scores]
+    return {
+        "relevant": len(local_ids),
+        "graded": state.get("graded_count", 0),
+        "min_score": min(relevant_scores) if relevant_scores else 0.0,
+        "all_scored": len(relevant_scores) == len(local_ids),
+        "web_search": bool(state.get("web_search")),
+        "web_chunks": len(web_ids),
+    }
+
+
+def is_confident(
+    state: GraphState,
+    min_relevant: int = FAST_PATH_MIN_RELEVANT,
+    min_score: float = FAST_PATH_MIN_SCORE,
+) -> bool:
+    """
+    True for a first generation from local chunks that were all graded
+    relevant, with enough of them and every retrieval score above min_score.
+    """
+    if state.get("retry_count", 0) > 1 or state.get("query_rewrites", 0):
+        return False
+    signals = retrieval_confidence(state)
+    return (
+        not signals["web_search"]
+        and not signals["web_chunks"]
+        and signals["all_scored"]
+        and signals["relevant"] >= min_relevant
+        and signals["relevant"] == signals["graded"]
+        and signals["min_score"] >= min_score
+    )
+
+
+def record_audit(record: Dict[str, Any], path: Optional[str] = None) -> None:
+    path = FAST_PATH_AUDIT_LOG if path is None else path
+    passed = record.get("grounded") and record.get("answers_question")
+    metrics.increment("fast_path_audits", "passed" if passed else "failed")
+    if not path:
+        return
+    with _log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def audit(
+    question: str, documents: List[Any], generation: str, signals: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Critique a fast-path answer after the fact and record the outcome."""
+    record = {"question": question, "generation": generation, **signals}
+    record["audited_at"] = time.time()
+    try:
+        grounded, answers_question = critique_generation(question, documents, generation)
+    except Exception as e:
+        print(f"⚠️ Fast-path audit failed: {e}")
+        metrics.increment("fast_path_audits", "error")
+        return record
+    record.update(grounded=grounded, answers_question=bool(answers_question))
+    if not (grounded and answers_question):
+        print(f"⚠️ Fast-path audit rejected the answer to {question!r}")
+    record_audit(record)
+    return record
+
+
+def maybe_audit(
+    state: GraphState, documents: List[Any], rate: Optional[float] = None
+) -> Optional[Future]:
+    """Sample a fast-path answer for a background audit."""
+    rate = FAST_PATH_AUDIT_RATE if rate is None else rate
+    if _sampler.random() >= rate:
+        return None
+    signals = retrieval_confidence(state)
+    return _audits.submit(audit, state["question"], documents, state["generation"], signals)
@@ -0,0 +1,168 @@
+"""
+Federated retrieval over several indexes.
+
+A FederatedVectorStore searches its shards (any mix of Chroma, local and
+Endee snapshots) concurrently, normalizes each shard's scores, merges the
+results and drops chunks returned by more than one shard. A shard that
+errors or misses SHARD_TIMEOUT is skipped and the others' results are
+returned, so one slow backend degrades recall instead of latency. Searches
+past the timeout can't be cancelled, so each shard may have at most
+SHARD_MAX_PENDING of them running on the store's threads; a shard at that
+limit is skipped until one finishes, so a hung backend holds a bounded
+number of threads instead of one more per request.
+
+    SELF_RAG_INDEX_SHARDS=docs-a,docs-b,rag_endee
+
+serves the CURRENT snapshots of those indexes through one retriever (see
+ingestion.load_federated_vectorstore).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from graph import metrics
+from graph.chunk_store import chunk_id
+from graph.config import SHARD_MAX_PENDING, SHARD_SCORE_NORMALIZATION, SHARD_TIMEOUT
+from graph.filters import native_filter
+
+NORMALIZATIONS = ("relevance", "minmax")
+
+
+def search_shard(
+    vectorstore: VectorStore, query: str, k: int, metadata_filter: Optional[Dict[str, Any]]
+) -> List[Tuple[Document, float]]:
+    """(document, relevance) from one shard; rank-based scores if it has no relevance."""
+    kwargs = {}
+    if metadata_filter:
+        kwargs["filter"] = native_filter(vectorstore, metadata_filter)
+    try:
+        return vectorstore.similarity_search_with_relevance_scores(query, k=k, **kwargs)
+    except NotImplementedError:
+        documents = vectorstore.similarity_search(query, k=k, **kwargs)
+        return [(doc, 1 - rank / len(documents)) for rank, doc in enumerate(documents)]
+
+
+def normalize(
+    results: List[Tuple[Document, float]], method: str
+) -> List[Tuple[Document, float]]:
+    """
+    "relevance" keeps the stores' 0..1 relevance scores, comparable when the
+    shards share an embedding model and metric; "minmax" rescales each
+    shard's results to 0..1 for heterogeneous shards.
+    """
+    if method == "relevance" or not results:
+        return results
+    scores = [score for _, score in results]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [(doc, 1.0) for doc, _ in results]
+    return [(doc, (score - low) / (high - low)) for doc, score in results]
+
+
+class FederatedVectorStore(VectorStore):
+    """Read-only fan-out over named shard vector stores."""
+
+    def __init__(
+        self,
+        shards: Dict[str, VectorStore],
+        embedding: Optional[Embeddings] = None,
+        timeout: float = SHARD_TIMEOUT,
+        normalization: str = SHARD_SCORE_NORMALIZATION,
+        max_pending: int = SHARD_MAX_PENDING,
+    ):
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(
+                f"Unknown score normalization {normalization!r}, "
+                f"expected one of {NORMALIZATIONS}"
+            )
+        self.shards = shards
+        self.embedding = embedding
+        self.timeout = timeout
+        self.normalization = normalization
+        self.max_pending = max_pending
+        self._pending = {name: threading.BoundedSemaphore(max_pending) for name in shards}
+        # enough threads for every shard's pending limit: a stuck shard only uses its own
+        self._searches = ThreadPoolExecutor(
+            max_workers=max(1, len(shards) * max_pending), thread_name_prefix="shard-search"
+        )
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding
+
+    def _similarity_search_with_relevance_scores(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        metadata_filter = kwargs.get("filter")
+        started = time.perf_counter()
+        futures = {}
+        for name, store in self.shards.items():
+            if not self._pending[name].acquire(blocking=False):
+                print(f"⚠️ Shard {name} has {self.max_pending} searches still running, skipping it")
+                metrics.increment("shard_skipped", name)
+                continue
+            future = self._searches.submit(self._search, name, store, query, k, metadata_filter)
+            futures[future] = name
+        done, late = wait(futures, timeout=self.timeout)
+        for future in late:
+            name = futures[future]
+            print(f"⚠️ Shard {name} missed the {self.timeout}s timeout, leaving it out")
+            metrics.increment("shard_timeouts", name)
+
+        best: Dict[str, Tuple[Document, float]] = {}
+        for future in done:
+            name = futures[future]
+            try:
+                results = normalize(future.result(), self.normalization)
+            except Exception as e:
+                print(f"⚠️ Shard {name} failed, leaving it out: {e}")
+                metrics.increment("shard_errors", name)
+                continue
+            for doc, score in results:
+                doc.metadata["shard"] = name
+                key = chunk_id(doc)
+                if key not in best or score > best[key][1]:
+                    best[key] = (doc, score)
+        merged = sorted(best.values(), key=lambda result: result[1], reverse=True)[:k]
+        print(
+            f"   Searched {len(done)}/{len(self.shards)} shards in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+        return merged
+
+    def _search(
+        self,
+        name: str,
+        store: VectorStore,
+        query: str,
+        k: int,
+        metadata_filter: Optional[Dict[str, Any]],
+    ) -> List[Tuple[Document, float]]:
+        try:
+            return search_shard(store, query, k, metadata_filter)
+        finally:
+            self._pending[name].release()
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        results = self._similarity_search_with_relevance_scores(query, k, **kwargs)
+        return [doc for doc, _ in results]
+
+    def add_texts(
+        self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any
+    ) -> List[str]:
+        raise NotImplementedError("Federated stores are read-only; ingest into a shard")
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> "FederatedVectorStore":
+        raise NotImplementedError("Federated stores are read-only; ingest into a shard")
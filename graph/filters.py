@@ -0,0 +1,60 @@
+"""
+Metadata filters for retrieval.
+
+A filter on the graph input maps metadata fields to a value, or to a list of
+accepted values:
+
+    {"source": "report.pdf"}
+    {"source": ["a.pdf", "b.pdf"], "page": 3}
+
+and is translated to the native filter of the vector store, so the index
+only returns matching chunks instead of the grader discarding the rest.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+MetadataFilter = Dict[str, Any]
+
+
+def _condition(value: Any) -> Dict[str, Any]:
+    if isinstance(value, (list, tuple, set)):
+        return {"$in": list(value)}
+    return {"$eq": value}
+
+
+def matches(metadata: Dict[str, Any], metadata_filter: MetadataFilter) -> bool:
+    for key, value in metadata_filter.items():
+        accepted = value if isinstance(value, (list, tuple, set)) else [value]
+        if metadata.get(key) not in accepted:
+            return False
+    return True
+
+
+def to_chroma(metadata_filter: MetadataFilter) -> Dict[str, Any]:
+    conditions = [{key: _condition(value)} for key, value in metadata_filter.items()]
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def to_endee(metadata_filter: MetadataFilter) -> List[Dict[str, Any]]:
+    return [{key: _condition(value)} for key, value in metadata_filter.items()]
+
+
+def to_predicate(metadata_filter: MetadataFilter) -> Callable[[Document], bool]:
+    return lambda doc: matches(doc.metadata, metadata_filter)
+
+
+def native_filter(vectorstore: Any, metadata_filter: Optional[MetadataFilter]) -> Any:
+    """The filter argument the given vector store's search methods expect."""
+    if not metadata_filter:
+        return None
+    name = type(vectorstore).__name__
+    if name == "Chroma":
+        return to_chroma(metadata_filter)
+    if name == "EndeeVectorStore":
+        return to_endee(metadata_filter)
+    if name == "FederatedVectorStore":
+        # translated per shard, see graph/federated.py
+        return metadata_filter
+    # InMemoryVectorStore and the compressed local store take a predicate
+    return to_predicate(metadata_filter)
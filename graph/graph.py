@@ -1,24 +1,75 @@
+from functools import partial
+from typing import Optional, Union
+
 from dotenv import load_dotenv
-from sympy.codegen import Print
 
 load_dotenv()
+from langchain_core.retrievers import BaseRetriever
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 
-from graph.chains.answer_grader import answer_grader
-from graph.chains.hallucination_grader import hallucination_grader
-
-from graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
-from graph.nodes import generate, grade_documents, retrieve, web_search
+from graph import fast_path, metrics, warmup
+from graph.answer_lookup import AnswerLookup, lookup_answer
+from graph.checkpoint import get_checkpointer
+from graph.config import (
+    ANSWER_LOOKUP,
+    CONDENSE_FOLLOW_UPS,
+    CRITIQUE_MODE,
+    FAST_PATH,
+    GENERATION_MODE,
+    MAX_GENERATION_RETRIES,
+    MAX_QUERY_REWRITES,
+    ROUTING_POLICY,
+    WARM_START,
+)
+from graph.critique import critique_generation
+from graph.parents import context_documents
+from graph.consts import (
+    CONDENSE_QUESTION,
+    RETRIEVE,
+    GRADE_DOCUMENTS,
+    GENERATE,
+    LOOKUP_ANSWER,
+    REFLECTIVE_GENERATE,
+    WEBSEARCH,
+    TRANSFORM_QUERY,
+)
+from graph.nodes import (
+    condense_question,
+    generate,
+    grade_documents,
+    reflective_generate,
+    retrieve,
+    web_search,
+    transform_query,
+)
+from graph.routing import has_sufficient_documents
 from graph.state import GraphState
 
 
+GENERATION_MODES = ("multi_call", "reflective")
+
+
+def can_rewrite_query(state: GraphState) -> bool:
+    return state.get("query_rewrites", 0) < MAX_QUERY_REWRITES
+
+
 def decide_to_generate(state):
-    print("🔍 ASSESS GRADED DOCUMENTS...")
+    print(f"🔍 ASSESS GRADED DOCUMENTS ({ROUTING_POLICY} policy)...")
+    if state.get("query_rewrites", 0) == 0:
+        metrics.increment("questions_routed", ROUTING_POLICY)
 
-    if state["web_search"]:
+    if not has_sufficient_documents(state):
+        if can_rewrite_query(state):
+            print(
+                "DECISION: ⭕ NOT ENOUGH RELEVANT DOCUMENTS FOR QUESTION, REWRITE QUERY"
+            )
+            return TRANSFORM_QUERY
         print(
-            "DECISION: ⭕ NOT ALL DOCUMENTS ARE RELEVANT TO QUESTION, INCLUDE WEB_SEARCH"
+            "DECISION: ⭕ NOT ENOUGH RELEVANT DOCUMENTS FOR QUESTION, INCLUDE WEB_SEARCH"
         )
+        metrics.increment("web_searches", ROUTING_POLICY)
         return WEBSEARCH
     else:
         print("🤖 DECISION: GENERATE...")
@@ -26,61 +77,181 @@ def decide_to_generate(state):
 
 
 def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-    print("🔍 CHECK HALLUCINATION...")
+    if state.get("generation_retries", 0) >= MAX_GENERATION_RETRIES:
+        print("⛔ MAX RETRIES REACHED. FORCING END.")
+        return "useful"
+
     question = state["question"]
-    documents = state["documents"]
+    documents = context_documents(state)
     generation = state["generation"]
 
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
-    grade = score.binary_score
-    if grade.lower() == "yes":
+    reflection = state.get("reflection")
+    if reflection:
+        print("🪞 USING THE GENERATION'S INLINE REFLECTION...")
+        grounded = reflection["grounded"]
+        answers_question = reflection["answers_question"]
+    elif FAST_PATH and fast_path.is_confident(state):
+        print("⚡ DECISION: CONFIDENT RETRIEVAL, SKIPPING CRITIQUE")
+        metrics.increment("fast_path_answers", ROUTING_POLICY)
+        fast_path.maybe_audit(state, documents)
+        return "useful"
+    else:
+        print(f"🔍 CHECK HALLUCINATION AND ANSWER ({CRITIQUE_MODE})...")
+        grounded, answers_question = critique_generation(question, documents, generation)
+
+    if grounded:
         print("✅ DECISION: GENERATION IS GROUNDED IN DOCUMENTS")
-        print("🔍 GRADE GENERATION VS QUESTION...")
-        score = answer_grader.invoke({"question": question, "generation": generation})
-        grade = score.binary_score
-        if grade.lower() == "yes":
+        metrics.increment("answers_graded", ROUTING_POLICY)
+        if answers_question:
             print("✅ GRADE: GENERATION IS ANSWER TO QUESTION")
+            metrics.increment("answers_useful", ROUTING_POLICY)
+            return "useful"
+        elif can_rewrite_query(state):
+            print("⭕ GRADE: GENERATION IS NOT ANSWER TO QUESTION, REWRITE QUERY")
+            return "rewrite query"
+        elif state.get("web_search"):
+            # another search for the same question would not find more
+            print("⭕ GRADE: GENERATION IS NOT ANSWER TO QUESTION, WEB SEARCH ALREADY TRIED")
             return "useful"
         else:
             print("⭕ GRADE: GENERATION IS NOT ANSWER TO QUESTION")
+            metrics.increment("web_searches", ROUTING_POLICY)
             return "not useful"
     else:
         print("⭕ DECISION : GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY...")
         return "not supported"
 
 
-workflow = StateGraph(GraphState)
+def route_reflection(state: GraphState) -> str:
+    """
+    Route a reflective generation with the routing functions of the
+    multi-call path: its chunk relevance goes through decide_to_generate, its
+    verdicts through the generation critique. Without a reflection (the call
+    failed) the chunks are graded by the multi-call path.
+    """
+    if not state.get("reflection"):
+        return GRADE_DOCUMENTS
+    route = decide_to_generate(state)
+    if route == GENERATE:
+        route = grade_generation_grounded_in_documents_and_question(state)
+    metrics.increment("reflective_generations", "accepted" if route == "useful" else "fallback")
+    return route
 
 
-# add all the nodes
-workflow.add_node(RETRIEVE, retrieve)
-workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-workflow.add_node(GENERATE, generate)
-workflow.add_node(WEBSEARCH, web_search)
+def route_lookup(state: GraphState) -> str:
+    return END if state.get("generation") else RETRIEVE
 
-# add edges
-workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
 
-workflow.add_conditional_edges(
-    GRADE_DOCUMENTS,  # condition node
-    decide_to_generate,  # condition
-    {WEBSEARCH: WEBSEARCH, GENERATE: GENERATE},
-)
+def build_graph(
+    retriever: Optional[BaseRetriever] = None,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    warm_up: bool = WARM_START,
+    generation_mode: str = GENERATION_MODE,
+    answer_lookup: Union[bool, AnswerLookup] = ANSWER_LOOKUP,
+) -> CompiledStateGraph:
+    """
+    Build and compile the Self-RAG workflow.
 
-workflow.add_conditional_edges(
-    GENERATE,
-    grade_generation_grounded_in_documents_and_question,
-    {"useful": END, "not useful": WEBSEARCH, "not supported": GENERATE},
-)
+    Args:
+        retriever: retriever for the retrieve / transform_query nodes,
+            defaults to the Chroma index from ingestion.py
+        checkpointer: saver for resumable runs and chat history,
+            see graph/checkpoint.py
+        warm_up: open and page in the index, pre-connect to the model
+            endpoints and replay canned queries before returning,
+            see graph/warmup.py
+        generation_mode: "multi_call", or "reflective" to grade, answer and
+            critique the first retrieval in one call (see
+            graph/nodes/reflective_generate.py)
+        answer_lookup: check precomputed answers before retrieval, from the
+            snapshot(s) behind the retriever or the given lookup, see
+            graph/answer_lookup.py
+
+    Returns:
+        The compiled graph
+    """
+    if generation_mode not in GENERATION_MODES:
+        raise ValueError(
+            f"Unknown generation mode {generation_mode!r}, expected one of {GENERATION_MODES}"
+        )
+    if warm_up:
+        retriever, _ = warmup.warm_up(retriever)
+
+    workflow = StateGraph(GraphState)
+
+    # add all the nodes
+    workflow.add_node(RETRIEVE, partial(retrieve, retriever=retriever))
+    workflow.add_node(GRADE_DOCUMENTS, grade_documents)
+    workflow.add_node(GENERATE, generate)
+    workflow.add_node(WEBSEARCH, web_search)
+    workflow.add_node(TRANSFORM_QUERY, partial(transform_query, retriever=retriever))
+
+    # add edges
+    if generation_mode == "reflective":
+        workflow.add_node(REFLECTIVE_GENERATE, reflective_generate)
+        workflow.add_edge(RETRIEVE, REFLECTIVE_GENERATE)
+        workflow.add_conditional_edges(
+            REFLECTIVE_GENERATE,
+            route_reflection,
+            {
+                GRADE_DOCUMENTS: GRADE_DOCUMENTS,
+                TRANSFORM_QUERY: TRANSFORM_QUERY,
+                WEBSEARCH: WEBSEARCH,
+                "useful": END,
+                "not useful": WEBSEARCH,
+                "rewrite query": TRANSFORM_QUERY,
+                "not supported": GENERATE,
+            },
+        )
+    else:
+        workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+
+    workflow.add_conditional_edges(
+        GRADE_DOCUMENTS,  # condition node
+        decide_to_generate,  # condition
+        {WEBSEARCH: WEBSEARCH, TRANSFORM_QUERY: TRANSFORM_QUERY, GENERATE: GENERATE},
+    )
+
+    workflow.add_conditional_edges(
+        GENERATE,
+        grade_generation_grounded_in_documents_and_question,
+        {
+            "useful": END,
+            "not useful": WEBSEARCH,
+            "rewrite query": TRANSFORM_QUERY,
+            "not supported": GENERATE,
+        },
+    )
+
+    # re-retrieved documents are graded again before deciding on web search
+    workflow.add_edge(TRANSFORM_QUERY, GRADE_DOCUMENTS)
+    workflow.add_edge(WEBSEARCH, GENERATE)
+    workflow.add_edge(GENERATE, END)
+
+    # starting point
+    start = RETRIEVE
+    if isinstance(answer_lookup, AnswerLookup) or answer_lookup:
+        lookup = answer_lookup if isinstance(answer_lookup, AnswerLookup) else None
+        workflow.add_node(
+            LOOKUP_ANSWER, partial(lookup_answer, lookup=lookup, retriever=retriever)
+        )
+        workflow.add_conditional_edges(
+            LOOKUP_ANSWER, route_lookup, {END: END, RETRIEVE: RETRIEVE}
+        )
+        start = LOOKUP_ANSWER
+    if CONDENSE_FOLLOW_UPS:
+        # follow-ups are made standalone before the lookup and retrieval see them
+        workflow.add_node(CONDENSE_QUESTION, condense_question)
+        workflow.add_edge(CONDENSE_QUESTION, start)
+        start = CONDENSE_QUESTION
+    workflow.set_entry_point(start)
 
-workflow.add_edge(WEBSEARCH, GENERATE)
-workflow.add_edge(GENERATE, END)
+    return workflow.compile(checkpointer=checkpointer)
 
-# starting point
-workflow.set_entry_point(RETRIEVE)
 
-app = workflow.compile()
+# built on import, so it never warms up: the entry points that serve opt in
+# with SELF_RAG_WARM_START themselves (main.py, gradio_app.py, server.py)
+app = build_graph(checkpointer=get_checkpointer(), warm_up=False)
 
-app.get_graph().draw_mermaid_png(output_file_path="graph.png")
+if __name__ == "__main__":
+    app.get_graph().draw_mermaid_png(output_file_path="graph.png")
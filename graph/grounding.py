@@ -0,0 +1,94 @@
+import re
+from typing import Any, FrozenSet, List, Tuple
+
+from graph.config import GROUNDING_SUPPORTED_OVERLAP, GROUNDING_UNSUPPORTED_OVERLAP
+
+SUPPORTED = "supported"
+UNSUPPORTED = "unsupported"
+UNCERTAIN = "uncertain"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    """a an and are as at be been but by can could do does for from has have
+    how i if in into is it its may might not of on or so such that the their
+    them then there these they this to was we were what when which while who
+    will with would you your""".split()
+)
+# what a refusal is about; "X does not provide Y" about anything else is a claim
+_SOURCES = r"(the )?(provided |given |retrieved )?(context|documents?|sources?|passages?|texts?)"
+# sentences that decline to answer make no claim about the context
+_REFUSAL = re.compile(
+    r"\b(i (do not|don't|dont) know|i'?m not sure|i am not sure|"
+    r"(i|we) (cannot|can't|am unable to|are unable to) (answer|determine|find|tell)|"
+    rf"{_SOURCES} (does|do|did) not (mention|say|state|specify|contain|provide|cover)|"
+    rf"{_SOURCES} (has|have|contains?|provides?|gives?) no (information|mention|details?)|"
+    rf"no (information|mention|details?) (about|on|of|regarding) .+ (in|from) {_SOURCES})\b"
+)
+# hedged sentences may still make a claim, but too weak for the lexical check to reject
+_HEDGE = re.compile(
+    r"\b(might|may|perhaps|possibly|probably|likely|unclear|not certain|"
+    r"it seems|appears to|i think|i believe)\b"
+)
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Lowercased content words of a text."""
+    return frozenset(
+        word for word in _WORD.findall(text.lower()) if word not in STOPWORDS
+    )
+
+
+def split_sentences(text: str) -> Tuple[List[str], str]:
+    """
+    Split streamed text into complete sentences and the unfinished remainder.
+
+    Returns:
+        Tuple of (complete sentences with their trailing whitespace, remainder)
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentences.append(text[start : match.end()])
+        start = match.end()
+    return sentences, text[start:]
+
+
+def lexical_support(sentence: str, context_words: FrozenSet[str]) -> float:
+    """Share of the sentence's content words that appear in the context."""
+    words = tokenize(sentence)
+    if not words:
+        return 1.0
+    return len(words & context_words) / len(words)
+
+
+def is_refusal(sentence: str) -> bool:
+    return bool(_REFUSAL.search(sentence.lower()))
+
+
+def is_hedge(sentence: str) -> bool:
+    return bool(_HEDGE.search(sentence.lower()))
+
+
+def classify_sentence(sentence: str, context_words: FrozenSet[str]) -> str:
+    """
+    Cheap grounding verdict: SUPPORTED, UNSUPPORTED or UNCERTAIN.
+
+    Refusals ("I don't know", "the context does not say") claim nothing and
+    are SUPPORTED; hedged sentences are never rejected on word overlap alone
+    and go to the hallucination grader as UNCERTAIN instead.
+    """
+    if is_refusal(sentence):
+        return SUPPORTED
+    overlap = lexical_support(sentence, context_words)
+    if overlap >= GROUNDING_SUPPORTED_OVERLAP:
+        return SUPPORTED
+    if overlap < GROUNDING_UNSUPPORTED_OVERLAP:
+        return UNCERTAIN if is_hedge(sentence) else UNSUPPORTED
+    return UNCERTAIN
+
+
+def context_words(documents: List[Any]) -> FrozenSet[str]:
+    return tokenize(
+        " ".join(getattr(doc, "page_content", str(doc)) for doc in documents)
+    )
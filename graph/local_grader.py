@@ -0,0 +1,245 @@
+"""
+Local relevance grader trained from logged LLM verdicts.
+
+With SELF_RAG_GRADER_LOG set, every retrieval grader verdict is appended to
+a JSONL file as a (question, chunk, verdict) triple. The training command
+fits a logistic regression over features of the question and chunk
+embeddings and saves it for grade_documents:
+
+    uv run python -m graph.local_grader grader_log.jsonl -o grader_model.npz
+
+SELF_RAG_GRADING_MODE then picks who grades:
+    llm     every chunk is graded by the LLM (default)
+    shadow  the LLM grades, the local model's verdicts are only compared
+            against it to report an agreement rate before it is trusted
+    local   the local model grades when its confidence reaches
+            SELF_RAG_LOCAL_GRADER_CONFIDENCE, the LLM grades the rest
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from graph.config import GRADER_LOG, LOCAL_GRADER_MODEL
+
+GRADING_MODES = ("llm", "shadow", "local")
+
+_log_lock = threading.Lock()
+
+
+def log_verdict(question: str, doc: Document, verdict: str, path: str = GRADER_LOG) -> None:
+    """Append an LLM grader verdict to the grader log (no-op when no log is set)."""
+    if not path:
+        return
+    record = {
+        "question": question,
+        "chunk": doc.page_content,
+        "source": doc.metadata.get("source"),
+        "verdict": verdict.strip().lower(),
+        "logged_at": time.time(),
+    }
+    with _log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_verdicts(path: str) -> List[Dict[str, Any]]:
+    """Logged verdicts, keeping the latest verdict per (question, chunk) pair."""
+    latest = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("verdict") in ("yes", "no"):
+                    latest[(record["question"], record["chunk"])] = record
+    return list(latest.values())
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def pair_features(question: np.ndarray, chunks: np.ndarray) -> np.ndarray:
+    """Features of one normalized question vector against each chunk vector."""
+    products = chunks * question
+    return np.hstack(
+        [products, np.abs(chunks - question), products.sum(axis=1, keepdims=True)]
+    )
+
+
+class LocalGrader:
+    """Logistic regression over question/chunk embedding features."""
+
+    def __init__(self, weights: np.ndarray, bias: float, mean: np.ndarray, std: np.ndarray):
+        self.weights = weights
+        self.bias = bias
+        self.mean = mean
+        self.std = std
+
+    @classmethod
+    def fit(
+        cls,
+        features: np.ndarray,
+        labels: np.ndarray,
+        l2: float = 1e-3,
+        learning_rate: float = 0.5,
+        epochs: int = 500,
+    ) -> "LocalGrader":
+        mean = features.mean(axis=0)
+        std = features.std(axis=0) + 1e-6
+        x = (features - mean) / std
+        # balance the classes: relevant chunks are usually the minority
+        positives = max(labels.mean(), 1e-6)
+        sample_weights = np.where(labels == 1, 0.5 / positives, 0.5 / max(1 - positives, 1e-6))
+        weights = np.zeros(x.shape[1])
+        bias = 0.0
+        for _ in range(epochs):
+            error = (cls._sigmoid(x @ weights + bias) - labels) * sample_weights
+            weights -= learning_rate * (x.T @ error / len(x) + l2 * weights)
+            bias -= learning_rate * error.mean()
+        return cls(weights, float(bias), mean, std)
+
+    @staticmethod
+    def _sigmoid(z: np.ndarray) -> np.ndarray:
+        return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Probability that each question/chunk pair is relevant."""
+        return self._sigmoid(((features - self.mean) / self.std) @ self.weights + self.bias)
+
+    @property
+    def dimension(self) -> int:
+        """Embedding size the model was trained on (pair features are 2d + 1)."""
+        return (len(self.mean) - 1) // 2
+
+    def grade(
+        self,
+        embedding: Embeddings,
+        question: str,
+        documents: Sequence[Document],
+        question_vector: Optional[Any] = None,
+        chunk_vectors: Optional[Sequence[Optional[Any]]] = None,
+    ) -> np.ndarray:
+        """
+        Relevance probabilities of documents for a question. Vectors already
+        known (from retrieval) are used as they are; only the question or
+        chunks without one are embedded, in one batch.
+        """
+        if not documents:
+            return np.zeros(0)
+
+        def usable(vector: Optional[Any]) -> bool:
+            return vector is not None and len(vector) == self.dimension
+
+        if not usable(question_vector):
+            question_vector = embedding.embed_query(question)
+        vectors = list(chunk_vectors or [None] * len(documents))
+        missing = [i for i, vector in enumerate(vectors) if not usable(vector)]
+        if missing:
+            embedded = embedding.embed_documents([documents[i].page_content for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        q = _normalize(np.asarray(question_vector, dtype=np.float32))
+        chunks = _normalize(np.asarray(vectors, dtype=np.float32))
+        return self.predict_proba(pair_features(q, chunks))
+
+    def save(self, path: str) -> None:
+        np.savez(path, weights=self.weights, bias=self.bias, mean=self.mean, std=self.std)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalGrader":
+        data = np.load(path)
+        return cls(data["weights"], float(data["bias"]), data["mean"], data["std"])
+
+
+@lru_cache(maxsize=1)
+def get_local_grader(path: str = LOCAL_GRADER_MODEL) -> Optional[LocalGrader]:
+    """The trained local grader, or None (with a warning) when none was trained."""
+    if not os.path.exists(path):
+        print(f"⚠️ No local grader at {path}, grading with the LLM only")
+        return None
+    return LocalGrader.load(path)
+
+
+def is_confident(probability: float, threshold: float) -> bool:
+    return max(probability, 1 - probability) >= threshold
+
+
+def verdict_features(
+    records: List[Dict[str, Any]], embedding: Embeddings, batch_size: int = 256
+) -> np.ndarray:
+    """Embed the logged questions and chunks (each distinct text once) into pair features."""
+    questions = sorted({r["question"] for r in records})
+    chunks = sorted({r["chunk"] for r in records})
+    vectors = np.asarray([embedding.embed_query(q) for q in questions], dtype=np.float32)
+    question_vectors = dict(zip(questions, _normalize(vectors)))
+    chunk_vectors = {}
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start : start + batch_size]
+        vectors = _normalize(np.asarray(embedding.embed_documents(batch), dtype=np.float32))
+        chunk_vectors.update(zip(batch, vectors))
+    return np.vstack(
+        [
+            pair_features(question_vectors[r["question"]], chunk_vectors[r["chunk"]][None, :])
+            for r in records
+        ]
+    )
+
+
+def train(
+    log_path: str,
+    output: str,
+    embedding: Optional[Embeddings] = None,
+    holdout: float = 0.2,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Fit the local grader on logged verdicts, evaluating on a held-out share
+    of them first, and save a model fitted on all of them.
+    """
+    from graph.chains.llm import get_embeddings
+
+    records = load_verdicts(log_path)
+    labels = np.array([r["verdict"] == "yes" for r in records], dtype=np.float64)
+    if len(records) < 10 or labels.min() == labels.max():
+        raise ValueError(
+            f"Need at least 10 logged verdicts with both grades, {log_path} has {len(records)}"
+        )
+    features = verdict_features(records, embedding or get_embeddings())
+
+    order = np.random.default_rng(seed).permutation(len(records))
+    cut = int(len(records) * holdout)
+    test, fit_rows = order[:cut], order[cut:]
+    report = {"verdicts": len(records), "relevant_share": float(labels.mean())}
+    if cut:
+        model = LocalGrader.fit(features[fit_rows], labels[fit_rows])
+        probabilities = model.predict_proba(features[test])
+        report["holdout_accuracy"] = float(((probabilities >= 0.5) == labels[test]).mean())
+
+    LocalGrader.fit(features, labels).save(output)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train the local relevance grader")
+    parser.add_argument("log", nargs="?", default=GRADER_LOG, help="grader verdict log (JSONL)")
+    parser.add_argument("-o", "--output", default=LOCAL_GRADER_MODEL)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    if not args.log:
+        parser.error("no verdict log given and SELF_RAG_GRADER_LOG is not set")
+
+    report = train(args.log, args.output, holdout=args.holdout)
+    print(f"🧮 Trained local grader on {report['verdicts']} verdicts -> {args.output}: {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, str], int] = defaultdict(int)
+
+
+def increment(name: str, label: str = "", value: int = 1) -> None:
+    """Increment an in-process counter, e.g. increment("web_search", "min_relevant")."""
+    with _lock:
+        _counters[(name, label)] += value
+
+
+def get(name: str, label: str = "") -> int:
+    with _lock:
+        return _counters[(name, label)]
+
+
+def snapshot() -> Dict[Tuple[str, str], int]:
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+
+
+def _rate(numerator: int, denominator: int) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def routing_report() -> Dict[str, Dict[str, float]]:
+    """
+    Per routing policy: how often it sent questions to web search and how
+    often the answer grader accepted the generations it led to.
+    """
+    counters = snapshot()
+    policies = {label for (name, label) in counters if name == "questions_routed"}
+    report = {}
+    for policy in sorted(policies):
+        questions = counters.get(("questions_routed", policy), 0)
+        web_searches = counters.get(("web_searches", policy), 0)
+        graded = counters.get(("answers_graded", policy), 0)
+        useful = counters.get(("answers_useful", policy), 0)
+        fast_path = counters.get(("fast_path_answers", policy), 0)
+        report[policy] = {
+            "questions": questions,
+            "fast_path_rate": _rate(fast_path, questions),
+            "web_search_rate": _rate(web_searches, questions),
+            "answers_graded": graded,
+            "answer_pass_rate": _rate(useful, graded),
+        }
+    return report
+
+
+def print_routing_report() -> None:
+    for policy, stats in routing_report().items():
+        print(
+            f"📊 {policy}: {stats['questions']} questions, "
+            f"web search rate {stats['web_search_rate']:.0%}, "
+            f"fast path rate {stats['fast_path_rate']:.0%}, "
+            f"answer pass rate {stats['answer_pass_rate']:.0%} "
+            f"({stats['answers_graded']} graded)"
+        )
+
+
+def fast_path_report() -> Dict[str, float]:
+    """Outcomes of the background audits of fast-path answers."""
+    counters = snapshot()
+    passed = counters.get(("fast_path_audits", "passed"), 0)
+    failed = counters.get(("fast_path_audits", "failed"), 0)
+    return {
+        "audits": passed + failed,
+        "audit_pass_rate": _rate(passed, passed + failed),
+        "audit_errors": counters.get(("fast_path_audits", "error"), 0),
+    }
+
+
+def print_fast_path_report() -> None:
+    report = fast_path_report()
+    if report["audits"] or report["audit_errors"]:
+        print(
+            f"📊 fast path audits: {report['audits']}, "
+            f"pass rate {report['audit_pass_rate']:.0%}, errors {report['audit_errors']}"
+        )
+
+
+def grader_report() -> Dict[str, float]:
+    """
+    Share of retrieval grading done by the local grader, and how often its
+    verdicts agreed with the LLM's in shadow mode.
+    """
+    counters = snapshot()
+    local = counters.get(("documents_graded", "local"), 0)
+    llm = counters.get(("documents_graded", "llm"), 0)
+    agreed = counters.get(("shadow_verdicts", "agree"), 0)
+    compared = agreed + counters.get(("shadow_verdicts", "disagree"), 0)
+    return {
+        "documents_graded": local + llm,
+        "local_share": _rate(local, local + llm),
+        "shadow_compared": compared,
+        "shadow_agreement": _rate(agreed, compared),
+    }
+
+
+def print_grader_report() -> None:
+    report = grader_report()
+    if not report["documents_graded"]:
+        return
+    print(
+        f"📊 grading: {report['documents_graded']} documents, "
+        f"local grader share {report['local_share']:.0%}"
+        + (
+            f", shadow agreement {report['shadow_agreement']:.0%} "
+            f"({report['shadow_compared']} compared)"
+            if report["shadow_compared"]
+            else ""
+        )
+    )
+
+
+def frontend_report() -> Dict[str, float]:
+    """Admissions, rejections and mean queue wait of the frontend apps' runs."""
+    counters = snapshot()
+    admitted = counters.get(("frontend_runs", "admitted"), 0)
+    busy = counters.get(("frontend_runs", "rejected_busy"), 0)
+    user = counters.get(("frontend_runs", "rejected_user"), 0)
+    wait_ms = counters.get(("frontend_queue_wait_ms", ""), 0)
+    return {
+        "admitted": admitted,
+        "rejected_busy": busy,
+        "rejected_user": user,
+        "rejection_rate": _rate(busy + user, admitted + busy + user),
+        "mean_queue_wait_s": _rate(wait_ms, admitted) / 1000,
+    }
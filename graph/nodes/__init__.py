@@ -1,7 +1,18 @@
+from graph.nodes.condense_question import condense_question
 from graph.nodes.generate import generate
 from graph.nodes.retrieve import retrieve
 from graph.nodes.web_search import web_search
 from graph.nodes.grade_documents import grade_documents
+from graph.nodes.transform_query import transform_query
+from graph.nodes.reflective_generate import reflective_generate
 
 
-__all__ = ["generate", "grade_documents", "web_search", "retrieve"]
+__all__ = [
+    "condense_question",
+    "generate",
+    "grade_documents",
+    "web_search",
+    "retrieve",
+    "transform_query",
+    "reflective_generate",
+]
@@ -0,0 +1,43 @@
+from typing import Any, Dict, List
+
+from graph.chains.question_condenser import question_condenser
+from graph.config import CHAT_HISTORY_TURNS
+from graph.state import GraphState
+
+# answers are only context for resolving references, not for the retrieval query
+ANSWER_CHARS = 500
+
+
+def format_history(messages: List[Dict[str, Any]], turns: int = CHAT_HISTORY_TURNS) -> str:
+    lines = []
+    for message in messages[-2 * turns :]:
+        if message["role"] == "user":
+            lines.append(f"User: {message['content']}")
+        else:
+            lines.append(f"Assistant: {message['content'][:ANSWER_CHARS]}")
+    return "\n".join(lines)
+
+
+def condense_question(state: GraphState) -> Dict[str, Any]:
+    """
+    Rewrites a follow-up question of a chat session into a standalone
+    question, so retrieval and grading see what is actually being asked.
+    The first question of a session is left alone.
+    Args:
+        state (dict): the current graph state
+
+    :return:
+        state (dict): the standalone question and the question as asked
+    """
+    history = state.get("chat_history") or []
+    if not history:
+        return {}
+    print("🗣️ CONDENSE FOLLOW-UP QUESTION...")
+    question = state["question"]
+    standalone = question_condenser.invoke(
+        {"history": format_history(history), "question": question}
+    ).strip()
+    if not standalone or standalone == question:
+        return {}
+    print(f"   Standalone question: {standalone}")
+    return {"question": standalone, "asked_question": question}
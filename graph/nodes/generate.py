@@ -1,11 +1,125 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 from graph.chains.generation import generation_chain
+from graph.chains.hallucination_grader import hallucination_grader
+from graph.config import (
+    CONTEXT_TOKEN_BUDGET,
+    MAX_GENERATION_RETRIES,
+    STREAMING_GENERATION_ATTEMPTS,
+    STREAMING_GROUNDING,
+)
+from graph.grounding import (
+    SUPPORTED,
+    UNSUPPORTED,
+    classify_sentence,
+    context_words,
+    split_sentences,
+)
+from graph.parents import context_documents
 from graph.state import GraphState
 
 
+def token_count(doc: Any) -> int:
+    """Chunk size in tokens: stored at ingestion, estimated for other documents."""
+    count = doc.metadata.get("token_count")
+    return count if count is not None else len(doc.page_content) // 4 + 1
+
+
+def pack_context(documents: List[Any], budget: int = CONTEXT_TOKEN_BUDGET) -> List[Any]:
+    """Keep documents in order until the token budget is spent (0 = no limit)."""
+    if budget <= 0:
+        return documents
+    packed, used = [], 0
+    for doc in documents:
+        tokens = token_count(doc)
+        if packed and used + tokens > budget:
+            break
+        packed.append(doc)
+        used += tokens
+    return packed
+
+
+def is_sentence_grounded(sentence: str, words: frozenset, documents: List[Any]) -> bool:
+    """
+    Check one generated sentence against the context, escalating to the
+    hallucination grader only when the word overlap is inconclusive.
+    """
+    verdict = classify_sentence(sentence, words)
+    if verdict == SUPPORTED:
+        return True
+    if verdict == UNSUPPORTED:
+        return False
+    score = hallucination_grader.invoke(
+        {"documents": documents, "generation": sentence}
+    )
+    return score.binary_score.lower() == "yes"
+
+
+def stream_grounded_generation(
+    question: str, documents: List[Any], abort: bool = True
+) -> Optional[str]:
+    """
+    Stream a generation and check each completed sentence for grounding.
+
+    Args:
+        question: The user question
+        documents: Context documents
+        abort: Stop streaming at the first unsupported sentence
+
+    Returns:
+        The generation, or None when it was aborted
+    """
+    words = context_words(documents)
+    generation = ""
+    buffer = ""
+    stream = generation_chain.stream({"question": question, "context": documents})
+    try:
+        for chunk in stream:
+            buffer += chunk
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                if abort and not is_sentence_grounded(sentence, words, documents):
+                    print(f"⛔ UNSUPPORTED SENTENCE, ABORTING GENERATION: {sentence.strip()}")
+                    return None
+                generation += sentence
+    finally:
+        stream.close()
+
+    if buffer.strip() and abort and not is_sentence_grounded(buffer, words, documents):
+        print(f"⛔ UNSUPPORTED SENTENCE, ABORTING GENERATION: {buffer.strip()}")
+        return None
+    return generation + buffer
+
+
 def generate(state: GraphState) -> Dict[str, Any]:
+    """
+    Generate an answer from the context documents. Web search and query
+    rewrites clear the last generation, so a generation still in the state
+    means the critique found it not supported and this is a hallucination
+    retry; MAX_GENERATION_RETRIES of those return a fallback answer.
+    """
     print("🤖 Generating...")
     question = state["question"]
-    documents = state["documents"]
-    generation = generation_chain.invoke({"question": question, "context": documents})
-    return {"documents": documents, "question": question, "generation": generation}
+    documents = pack_context(context_documents(state))
+    generation_retries = state.get("generation_retries", 0)
+    if state.get("generation"):
+        generation_retries += 1
+    if generation_retries >= MAX_GENERATION_RETRIES:
+        generation = "I could not find a reliable answer in the documents for this question."
+    elif STREAMING_GROUNDING:
+        attempts = max(1, STREAMING_GENERATION_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
+            # the last attempt runs to completion and is left to the critique step
+            abort = attempt < attempts
+            generation = stream_grounded_generation(question, documents, abort=abort)
+            if generation is not None:
+                break
+    else:
+        generation = generation_chain.invoke({"question": question, "context": documents})
+    return {
+        "question": question,
+        "generation": generation,
+        "retry_count": state.get("retry_count", 0) + 1,
+        "generation_retries": generation_retries,
+        # a regenerated answer is critiqued by the graders again
+        "reflection": {},
+    }
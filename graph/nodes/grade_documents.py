@@ -1,6 +1,18 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence
+from graph import metrics
+from graph.chains.llm import get_embeddings
 from graph.chains.retrieval_grader import retrieval_grader
+from graph.chunk_store import chunk_id, chunk_store, replace_chunk_ids
+from graph.config import (
+    GRADING_MODE,
+    GRADING_SUFFICIENT_RELEVANT,
+    LOCAL_GRADER_CONFIDENCE,
+    STREAMING_GRADING,
+)
+from graph.local_grader import GRADING_MODES, get_local_grader, is_confident, log_verdict
+from graph.routing import has_sufficient_documents
 from graph.state import GraphState
+from graph.vectors import chunk_vectors, query_vectors
 import asyncio
 
 async def grade_single_document(question: str, doc: Any) -> tuple[Any, str]:
@@ -18,39 +30,196 @@ async def grade_single_document(question: str, doc: Any) -> tuple[Any, str]:
         {"question": question, "document": doc.page_content}
     )
     grade = score.binary_score
+    log_verdict(question, doc, grade)
     return doc, grade
-    
+
+
+def is_relevant(grade: str) -> bool:
+    return grade.lower() == "yes"
+
+
+def local_probabilities(question: str, documents: List[Any]) -> Dict[int, float]:
+    """
+    Local grader relevance probability per document (keyed by id(doc)), or
+    nothing when grading with the LLM only or no local grader was trained.
+    The question and chunk vectors retrieval kept are reused, so only what
+    retrieval could not provide is embedded.
+    """
+    if GRADING_MODE not in GRADING_MODES:
+        raise ValueError(
+            f"Unknown grading mode {GRADING_MODE!r}, expected one of {GRADING_MODES}"
+        )
+    grader = get_local_grader() if GRADING_MODE != "llm" else None
+    if grader is None or not documents:
+        return {}
+    probabilities = grader.grade(
+        get_embeddings(),
+        question,
+        documents,
+        question_vector=query_vectors.get(question),
+        chunk_vectors=[chunk_vectors.get(chunk_id(doc)) for doc in documents],
+    )
+    return {id(doc): float(p) for doc, p in zip(documents, probabilities)}
+
+
+def record_shadow_verdicts(
+    results: Sequence[tuple[Any, str]], probabilities: Dict[int, float]
+) -> None:
+    """Count how often the local grader agreed with the LLM's verdicts."""
+    for doc, grade in results:
+        if id(doc) in probabilities:
+            agreed = (probabilities[id(doc)] >= 0.5) == is_relevant(grade)
+            metrics.increment("shadow_verdicts", "agree" if agreed else "disagree")
+
+
+async def grade_until_sufficient(
+    state: GraphState,
+    documents: List[Any],
+    sufficient_relevant: int = GRADING_SUFFICIENT_RELEVANT,
+    graded: Sequence[tuple[Any, str]] = (),
+    irrelevant_before: int = 0,
+) -> List[tuple[Any, str]]:
+    """
+    Grade documents concurrently, consuming verdicts as they complete, and
+    cancel the remaining grader calls once enough documents are relevant.
+
+    Grading stops when `sufficient_relevant` documents are relevant and the
+    routing policy accepts the verdicts received so far, so decide_to_generate
+    routes the partial result to generation. `graded` are verdicts already
+    known (from the local grader), which count towards sufficiency, as do
+    the `irrelevant_before` irrelevant verdicts carried over a query rewrite.
+
+    Returns:
+        (document, grade) for the documents graded before stopping
+    """
+    question = state["question"]
+    results = list(graded)
+    relevant_ids = [chunk_id(doc) for doc, grade in results if is_relevant(grade)]
+    total = len(results) + len(documents)
+
+    def sufficient() -> bool:
+        if len(results) == total or len(relevant_ids) < sufficient_relevant:
+            return False
+        partial = {
+            **state,
+            "chunk_ids": relevant_ids,
+            "graded_count": irrelevant_before + len(results),
+        }
+        return has_sufficient_documents(partial)
+
+    if sufficient():
+        return results
+    tasks = [
+        asyncio.ensure_future(grade_single_document(question=question, doc=doc))
+        for doc in documents
+    ]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            doc, grade = await next_result
+            results.append((doc, grade))
+            if is_relevant(grade):
+                relevant_ids.append(chunk_id(doc))
+            if sufficient():
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    if pending:
+        print(f"⏩ Enough relevant documents, cancelled {len(pending)} grader calls")
+        metrics.increment("grader_calls_cancelled", value=len(pending))
+    return results
+
 
 def grade_documents(state: GraphState) -> Dict[str, Any]:
     """
-    Determines whether the retrieved documents are relevant to the question
-    if any document is not relevant, we will set a flag to run web search
+    Determines whether the retrieved documents are relevant to the question.
+    Whether the relevant ones are enough to answer is left to the routing
+    policy in decide_to_generate (see graph/routing.py).
+    With STREAMING_GRADING, grading stops once enough documents are relevant
+    (see grade_until_sufficient) and only the graded documents are counted.
+    GRADING_MODE decides whether the local grader takes confident verdicts
+    or only shadows the LLM (see graph/local_grader.py). Chunks reused from
+    the previous chat turn (prior_chunk_ids) keep their relevant verdict, as
+    do chunks graded before a query rewrite (carried_chunk_ids); the
+    irrelevant verdicts of that earlier pass stay in graded_count.
     Args:
         state (dict): the current graph state
 
     :return:
-        state (dict): filtered out irrelevant documents and updated web_search state
+        state (dict): ids of the relevant documents and number of graded documents
     """
     print("🔍 CHECK DOCUMENT RELEVANCE TO QUESTION...")
     question = state["question"]
-    documents = state["documents"]
+    documents = chunk_store.materialize(state.get("chunk_ids") or [])
+
+    filtered_ids = []
 
-    filtered_docs = []
-    web_search = False
+    prior = set(state.get("prior_chunk_ids") or [])
+    carried = set(state.get("carried_chunk_ids") or [])
+    reused_results = [(doc, "yes") for doc in documents if chunk_id(doc) in prior]
+    carried_results = [
+        (doc, "yes") for doc in documents if chunk_id(doc) in carried - prior
+    ]
+    candidates = [doc for doc in documents if chunk_id(doc) not in prior | carried]
+    irrelevant_before = (
+        max(0, state.get("graded_count", 0) - len(carried_results)) if carried else 0
+    )
+
+    probabilities = local_probabilities(question, candidates)
+    local_results = []
+    graded_locally = set()
+    llm_documents = candidates
+    if GRADING_MODE == "local" and probabilities:
+        local_results = [
+            (doc, "yes" if probabilities[id(doc)] >= 0.5 else "no")
+            for doc in candidates
+            if is_confident(probabilities[id(doc)], LOCAL_GRADER_CONFIDENCE)
+        ]
+        graded_locally = {id(doc) for doc, _ in local_results}
+        llm_documents = [doc for doc in candidates if id(doc) not in graded_locally]
+    known_results = reused_results + carried_results + local_results
+    not_llm = graded_locally | {id(doc) for doc, _ in reused_results + carried_results}
     
     # Grade all doc parallel
     async def grade_all():
-        tasks = [grade_single_document(question=question,doc=doc) for doc in documents]
+        tasks = [grade_single_document(question=question,doc=doc) for doc in llm_documents]
         return await asyncio.gather(*tasks)
     
     # run the async grading
-    results = asyncio.run(grade_all())
+    if STREAMING_GRADING:
+        results = asyncio.run(
+            grade_until_sufficient(
+                state,
+                llm_documents,
+                GRADING_SUFFICIENT_RELEVANT,
+                known_results,
+                irrelevant_before,
+            )
+        )
+    else:
+        results = known_results + list(asyncio.run(grade_all()))
+    # keep retrieval order, which context packing relies on
+    order = {id(doc): i for i, doc in enumerate(documents)}
+    results.sort(key=lambda result: order[id(result[0])])
+
+    llm_results = [result for result in results if id(result[0]) not in not_llm]
+    metrics.increment("documents_graded", "reused", len(reused_results))
+    metrics.increment("documents_graded", "carried", len(carried_results))
+    metrics.increment("documents_graded", "local", len(local_results))
+    metrics.increment("documents_graded", "llm", len(llm_results))
+    if GRADING_MODE == "shadow":
+        record_shadow_verdicts(llm_results, probabilities)
 
     for doc, grade in results:
-        if grade.lower() == 'yes':
+        if is_relevant(grade):
             print("✅ Document is relevant to the question")
-            filtered_docs.append(doc)
+            filtered_ids.append(chunk_id(doc))
         else:
             print("❌ Document is not relevant to the question")
-            web_search = True
-    return {"documents": filtered_docs, "web_search": web_search}
+    return {
+        "chunk_ids": replace_chunk_ids(filtered_ids),
+        "graded_count": irrelevant_before + len(results),
+        "carried_chunk_ids": [],
+    }
@@ -0,0 +1,56 @@
+from typing import Any, Dict, List
+
+from graph import metrics
+from graph.chains.reflective_generation import reflective_generation
+from graph.chunk_store import chunk_id, get_documents, replace_chunk_ids
+from graph.critique import is_yes
+from graph.nodes.generate import pack_context
+from graph.state import GraphState
+
+
+def number_chunks(documents: List[Any]) -> str:
+    return "\n\n".join(f"[{i}] {doc.page_content}" for i, doc in enumerate(documents, 1))
+
+
+def reflective_generate(state: GraphState) -> Dict[str, Any]:
+    """
+    Grade the retrieved chunks, answer and critique the answer in one
+    structured LLM call (Self-RAG style reflection).
+
+    The relevant chunks replace chunk_ids like grade_documents would, and the
+    support / usefulness verdicts are kept in `reflection` for the routing in
+    graph/graph.py to consume instead of calling the graders. If the call
+    fails, nothing but an empty reflection is returned and the graph falls
+    back to the multi-call path.
+
+    Args:
+        state (dict): the current graph state
+
+    :return:
+        state (dict): relevant chunk ids, graded count, generation and reflection
+    """
+    print("🪞 Generating with inline reflection...")
+    question = state["question"]
+    documents = pack_context(get_documents(state))
+    try:
+        result = reflective_generation.invoke(
+            {"question": question, "context": number_chunks(documents)}
+        )
+    except Exception as e:
+        print(f"⚠️ Reflective generation failed, falling back to separate graders: {e}")
+        metrics.increment("reflective_generations", "failed")
+        return {"reflection": {}}
+
+    relevant = {n for n in result.relevant_chunks if 1 <= n <= len(documents)}
+    relevant_ids = [chunk_id(doc) for i, doc in enumerate(documents, 1) if i in relevant]
+    print(f"   {len(relevant_ids)} of {len(documents)} chunks relevant")
+    return {
+        "chunk_ids": replace_chunk_ids(relevant_ids),
+        "graded_count": len(documents),
+        "generation": result.answer,
+        "retry_count": state.get("retry_count", 0) + 1,
+        "reflection": {
+            "grounded": is_yes(result.grounded),
+            "answers_question": is_yes(result.answers_question),
+        },
+    }
@@ -1,12 +1,115 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from graph import metrics
+from graph.chunk_store import chunk_store, replace_chunk_ids
+from graph.config import FAKE_MODELS, GRADING_MODE, WEB_CACHE
+from graph.filters import MetadataFilter, native_filter, to_predicate
 from graph.state import GraphState
+from graph.vectors import remember_vectors
+
+
+_fake_retriever: Optional[BaseRetriever] = None
+
+
+def get_default_retriever() -> BaseRetriever:
+    global _fake_retriever
+    if FAKE_MODELS:
+        if _fake_retriever is None:
+            from graph.fakes import fake_retriever
+
+            _fake_retriever = fake_retriever()
+        return _fake_retriever
+
+    # imported lazily so graphs built with their own retriever (Endee apps)
+    # don't open the Chroma index
+    from ingestion import retriever
+
+    return retriever
+
+
+def retrieve_with_scores(
+    query: str,
+    retriever: Optional[BaseRetriever] = None,
+    metadata_filter: Optional[MetadataFilter] = None,
+) -> List[Document]:
+    """
+    Retrieve documents for a query, keeping the vector store relevance score
+    (0 = unrelated, 1 = identical) in each document's metadata when the
+    store supports it. A metadata filter is passed to the store in its
+    native form, so only matching chunks are searched. With WEB_CACHE, the
+    best cached web result chunks are appended (see graph/web_cache.py).
+    When the local grader may grade, the query vector and the chunks' stored
+    vectors are kept for it (see graph/vectors.py).
+    """
+    retriever = retriever or get_default_retriever()
+    vectorstore = retriever.vectorstore
+    search_kwargs = dict(retriever.search_kwargs)
+    if metadata_filter:
+        search_kwargs["filter"] = native_filter(vectorstore, metadata_filter)
+    try:
+        results = vectorstore.similarity_search_with_relevance_scores(query, **search_kwargs)
+    except NotImplementedError:
+        documents = vectorstore.similarity_search(query, **search_kwargs)
+    else:
+        documents = []
+        for doc, score in results:
+            doc.metadata["relevance_score"] = score
+            documents.append(doc)
+    if GRADING_MODE != "llm":
+        remember_vectors(vectorstore, query, documents)
+    if WEB_CACHE:
+        from graph.web_cache import get_web_cache
+
+        predicate = to_predicate(metadata_filter) if metadata_filter else None
+        documents += get_web_cache().search(query, filter=predicate)
+    return documents
+
 
-from ingestion import retriever
+def store_documents(documents: List[Document]) -> Tuple[List[str], Dict[str, float]]:
+    """Put retrieved documents in the chunk store; returns their ids and scores."""
+    ids = chunk_store.put_many(documents)
+    scores = {
+        key: doc.metadata["relevance_score"]
+        for key, doc in zip(ids, documents)
+        if "relevance_score" in doc.metadata
+    }
+    return ids, scores
 
 
-def retrieve(state: GraphState) -> Dict[str, Any]:
+def retrieve(
+    state: GraphState, retriever: Optional[BaseRetriever] = None
+) -> Dict[str, Any]:
     print("⬇️ Retrieving documents...")
     question = state["question"]
 
-    documents = retriever.invoke(question)
-    return {"documents": documents, "question": question}
+    documents = retrieve_with_scores(question, retriever, state.get("filter"))
+    print(f"   Retrieved {len(documents)} docs")
+    ids, scores = store_documents(documents)
+    prior = state.get("prior_chunk_ids") or []
+    if not prior:
+        return {"chunk_ids": replace_chunk_ids(ids), "scores": scores, "question": question}
+    # only prior chunks the follow-up retrieves again keep their verdict
+    reused = [key for key in prior if key in set(ids)]
+    if not reused:
+        # the follow-up moved on: nothing from the last turn is retrieved again
+        print("   The previous turn's chunks don't apply, grading from scratch")
+        metrics.increment("follow_up_retrievals", "fresh")
+        return {
+            "chunk_ids": replace_chunk_ids(ids),
+            "scores": scores,
+            "question": question,
+            "prior_chunk_ids": [],
+        }
+    new_ids = [key for key in dict.fromkeys(ids) if key not in reused]
+    print(f"   Reusing {len(reused)} graded chunks of the previous turn, {len(new_ids)} new")
+    metrics.increment("follow_up_retrievals", "reused")
+    prior_scores = {key: score for key, score in state.get("scores", {}).items() if key in reused}
+    return {
+        "chunk_ids": replace_chunk_ids(reused + new_ids),
+        "scores": {**prior_scores, **scores},
+        "question": question,
+        "prior_chunk_ids": reused,
+    }
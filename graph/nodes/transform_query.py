@@ -0,0 +1,44 @@
+from typing import Any, Dict, Optional
+
+from langchain_core.retrievers import BaseRetriever
+
+from graph.chains.question_rewriter import question_rewriter
+from graph.nodes.retrieve import retrieve_with_scores, store_documents
+from graph.state import GraphState
+
+
+def transform_query(
+    state: GraphState, retriever: Optional[BaseRetriever] = None
+) -> Dict[str, Any]:
+    """
+    Rewrites the question for the vector store and retrieves again from the
+    local index, so a cheap second retrieval is tried before web search.
+    Args:
+        state (dict): the current graph state
+        retriever: retriever to re-query, defaults to the Chroma index
+
+    The current chunks were already graded relevant; they are passed on as
+    carried_chunk_ids so grade_documents only grades the new ones.
+    :return:
+        state (dict): new chunk ids (merged and deduplicated by the chunk_ids
+        reducer), carried chunk ids, rewritten question and rewrite count
+    """
+    print("✏️ TRANSFORM QUERY...")
+    question = state["question"]
+    current_ids = state.get("chunk_ids") or []
+
+    better_question = question_rewriter.invoke({"question": question})
+    print(f"   Rewritten question: {better_question}")
+
+    new_documents = retrieve_with_scores(better_question, retriever, state.get("filter"))
+    new_ids, new_scores = store_documents(new_documents)
+    added = [key for key in dict.fromkeys(new_ids) if key not in current_ids]
+    print(f"   {len(added)} new document(s) from re-retrieval")
+    return {
+        "chunk_ids": added,
+        "carried_chunk_ids": list(current_ids),
+        "generation": "",
+        "scores": {**state.get("scores", {}), **new_scores},
+        "rewritten_question": better_question,
+        "query_rewrites": state.get("query_rewrites", 0) + 1,
+    }
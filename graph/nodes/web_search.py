@@ -4,22 +4,35 @@ from dotenv import load_dotenv
 load_dotenv()
 from langchain_core.documents import Document
 from langchain_tavily import TavilySearch
+from graph.chunk_store import chunk_store
+from graph.config import FAKE_MODELS, WEB_CACHE
 from graph.state import GraphState
 
-web_search_tool = TavilySearch(max_result=3)
+if FAKE_MODELS:
+    from graph.fakes import fake_web_search_tool
+
+    web_search_tool = fake_web_search_tool()
+else:
+    web_search_tool = TavilySearch(max_result=3)
 
 
 def web_search(state: GraphState) -> Dict[str, Any]:
     print("🔍 Searching web for relevant documents...")
     question = state["question"]
-    documents = state["documents"]
 
     tavily_results = web_search_tool.invoke({"query": question})["results"]
     joined_tavily_result = "\n".join(
         [tavily_result["content"] for tavily_result in tavily_results]
     )
     web_results = Document(page_content=joined_tavily_result)
-    if documents is not None:
-        documents.append(web_results)
-    else:
-        documents = [web_results]
+    if WEB_CACHE:
+        from graph.web_cache import get_web_cache
+
+        get_web_cache().write_back(tavily_results)
+    # the chunk_ids reducer appends the web result to the current documents;
+    # the answer is generated afresh from them, not retried
+    return {
+        "chunk_ids": [chunk_store.put(web_results)],
+        "web_search": True,
+        "generation": "",
+    }
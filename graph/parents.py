@@ -0,0 +1,85 @@
+"""
+Parent chunks for small-to-big retrieval.
+
+Indexes built with a parent_chunk_size embed small child chunks, each with
+the parent_id of the larger chunk it was cut from, and store every parent
+once in the snapshot (parents.json, see ingest/chunking.py). Retrieval and
+grading work on the children, which are cheap to grade and precise to
+match; context_documents swaps the graded children for their parents, in
+the order of their best child, when the answer is generated and critiqued.
+Children without a known parent (web results, other indexes) are kept.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from graph.chunk_store import get_documents
+from graph.config import INDEX_SHARDS, PARENT_EXPANSION
+
+
+class ParentStore:
+    """Thread-safe parent chunks by parent_id."""
+
+    def __init__(self, parents: Optional[Dict[str, Document]] = None):
+        self._parents: Dict[str, Document] = dict(parents or {})
+        self._lock = threading.Lock()
+
+    def update(self, parents: Dict[str, Document]) -> None:
+        with self._lock:
+            self._parents.update(parents)
+
+    def get(self, key: str) -> Optional[Document]:
+        with self._lock:
+            return self._parents.get(key)
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+
+_parent_store: Optional[ParentStore] = None
+_parent_store_lock = threading.Lock()
+
+
+def get_parent_store() -> ParentStore:
+    """Parents of the served snapshots (SELF_RAG_INDEX_SHARDS or SELF_RAG_INDEX_NAME)."""
+    global _parent_store
+    with _parent_store_lock:
+        if _parent_store is None:
+            from ingest.snapshot import DEFAULT_INDEX, latest_snapshot, load_parents
+
+            _parent_store = ParentStore()
+            for name in INDEX_SHARDS or [DEFAULT_INDEX]:
+                snapshot = latest_snapshot(name)
+                if snapshot is not None:
+                    _parent_store.update(load_parents(snapshot))
+            if len(_parent_store):
+                print(f"📖 Loaded {len(_parent_store)} parent chunks")
+        return _parent_store
+
+
+def expand_to_parents(
+    documents: List[Document], store: Optional[ParentStore] = None
+) -> List[Document]:
+    """Replace children by their parents, each parent once at its best child's rank."""
+    store = get_parent_store() if store is None else store
+    expanded: List[Document] = []
+    seen = set()
+    for doc in documents:
+        key = doc.metadata.get("parent_id")
+        parent = store.get(key) if key else None
+        if parent is None:
+            expanded.append(doc)
+        elif key not in seen:
+            seen.add(key)
+            metadata = {**parent.metadata, "parent_id": key}
+            if "relevance_score" in doc.metadata:
+                metadata["relevance_score"] = doc.metadata["relevance_score"]
+            expanded.append(Document(page_content=parent.page_content, metadata=metadata))
+    return expanded
+
+
+def context_documents(state: Dict[str, Any]) -> List[Document]:
+    """The documents an answer is generated from and critiqued against."""
+    documents = get_documents(state)
+    return expand_to_parents(documents) if PARENT_EXPANSION else documents
@@ -0,0 +1,63 @@
+from typing import Callable, Dict
+
+from graph.config import (
+    MIN_RELEVANCE_SCORE,
+    MIN_RELEVANT_DOCUMENTS,
+    MIN_RELEVANT_FRACTION,
+    ROUTING_POLICY,
+)
+from graph.state import GraphState
+
+
+def all_relevant(state: GraphState) -> bool:
+    """Original behaviour: a single irrelevant document triggers web search."""
+    return len(state.get("chunk_ids") or []) == state.get("graded_count", 0)
+
+
+def min_relevant(state: GraphState) -> bool:
+    """Enough when MIN_RELEVANT_DOCUMENTS are relevant, or every document is."""
+    relevant = len(state.get("chunk_ids") or [])
+    if relevant >= MIN_RELEVANT_DOCUMENTS:
+        return True
+    return relevant > 0 and relevant == state.get("graded_count", 0)
+
+
+def relevant_fraction(state: GraphState) -> bool:
+    """Enough when at least MIN_RELEVANT_FRACTION of the graded documents are relevant."""
+    graded = state.get("graded_count", 0)
+    if graded == 0:
+        return False
+    return len(state.get("chunk_ids") or []) / graded >= MIN_RELEVANT_FRACTION
+
+
+def score_weighted(state: GraphState) -> bool:
+    """Enough when the relevance scores of the relevant documents add up to MIN_RELEVANCE_SCORE."""
+    scores = state.get("scores") or {}
+    total = sum(scores.get(key, 0.0) for key in state.get("chunk_ids") or [])
+    return total >= MIN_RELEVANCE_SCORE
+
+
+ROUTING_POLICIES: Dict[str, Callable[[GraphState], bool]] = {
+    "all": all_relevant,
+    "min_relevant": min_relevant,
+    "fraction": relevant_fraction,
+    "score": score_weighted,
+}
+
+
+def has_sufficient_documents(state: GraphState, policy: str = ROUTING_POLICY) -> bool:
+    """
+    Apply a routing policy to the graded documents in the state.
+
+    Args:
+        state: graph state after grade_documents
+        policy: one of ROUTING_POLICIES
+
+    Returns:
+        True when the relevant documents are enough to generate an answer
+    """
+    if policy not in ROUTING_POLICIES:
+        raise ValueError(
+            f"Unknown routing policy {policy!r}, expected one of {sorted(ROUTING_POLICIES)}"
+        )
+    return ROUTING_POLICIES[policy](state)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from graph import metrics
+from graph.config import MAX_CONCURRENT_RUNS, MAX_QUEUED_RUNS, MAX_RUNS_PER_USER
+
+BUSY_MESSAGE = "⏳ The assistant is busy right now. Please try again in a moment."
+USER_BUSY_MESSAGE = "⏳ Your previous question is still being answered. Please wait for it."
+
+
+class ServerBusy(Exception):
+    """Raised when the admission queue is full and a run is rejected."""
+
+
+class UserBusy(ServerBusy):
+    """Raised when a user already has as many runs in flight as allowed."""
+
+
+class AdmissionQueue:
+    """
+    Bounds how many graph runs execute at once in this worker and how many
+    may wait for a slot; anything beyond that is rejected with ServerBusy
+    instead of piling up until it times out.
+    """
+
+    def __init__(
+        self, max_concurrent: int = MAX_CONCURRENT_RUNS, max_queued: int = MAX_QUEUED_RUNS
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.running = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self.waiting >= self.max_queued:
+            raise ServerBusy(f"{self.waiting} runs already waiting")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+
+
+def coalescing_key(question: str, metadata_filter: Optional[Dict[str, Any]] = None) -> str:
+    key = " ".join(question.lower().split())
+    if metadata_filter:
+        key += "\n" + json.dumps(metadata_filter, sort_keys=True)
+    return key
+
+
+class Coalescer:
+    """
+    Shares one in-flight run between concurrent identical requests. The run
+    keeps going if the caller that started it disconnects, as long as other
+    callers are waiting on it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def run(
+        self, key: str, start: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Returns:
+            Tuple of (result, whether it was shared with an earlier request)
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(start())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class FrontendPool:
+    """
+    Admission control for the Gradio and Streamlit apps, whose handlers run
+    synchronously on their frameworks' threads. Graph runs execute on a pool
+    of max_concurrent threads; once max_queued runs wait for one, or a user
+    already has max_per_user runs in flight, new runs are rejected with
+    ServerBusy (a friendly message) right away instead of timing out.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_RUNS,
+        max_queued: int = MAX_QUEUED_RUNS,
+        max_per_user: int = MAX_RUNS_PER_USER,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_per_user = max_per_user
+        self.running = 0
+        self.waiting = 0
+        self._per_user: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="frontend-run"
+        )
+
+    def _admit(self, user: str) -> None:
+        with self._lock:
+            if self._per_user[user] >= self.max_per_user:
+                metrics.increment("frontend_runs", "rejected_user")
+                raise UserBusy(USER_BUSY_MESSAGE)
+            if self.running + self.waiting >= self.max_concurrent + self.max_queued:
+                metrics.increment("frontend_runs", "rejected_busy")
+                raise ServerBusy(BUSY_MESSAGE)
+            self._per_user[user] += 1
+            self.waiting += 1
+
+    def run(
+        self, user: str, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Tuple[Any, float]:
+        """
+        Run fn(*args, **kwargs) on the pool for a user (e.g. the session id).
+
+        Returns:
+            Tuple of (result, seconds the run waited for a worker)
+        """
+        self._admit(user)
+        queued_at = time.perf_counter()
+        waited = 0.0
+
+        def execute() -> Any:
+            nonlocal waited
+            waited = time.perf_counter() - queued_at
+            with self._lock:
+                self.waiting -= 1
+                self.running += 1
+            metrics.increment("frontend_runs", "admitted")
+            metrics.increment("frontend_queue_wait_ms", value=int(waited * 1000))
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        try:
+            result = self._executor.submit(execute).result()
+        finally:
+            with self._lock:
+                self._per_user[user] -= 1
+                if not self._per_user[user]:
+                    del self._per_user[user]
+        return result, waited
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "max_per_user": self.max_per_user,
+        }
+
+
+_frontend_pool: Optional[FrontendPool] = None
+_frontend_pool_lock = threading.Lock()
+
+
+def get_frontend_pool() -> FrontendPool:
+    """The process-wide pool shared by every session of a frontend app."""
+    global _frontend_pool
+    with _frontend_pool_lock:
+        if _frontend_pool is None:
+            _frontend_pool = FrontendPool()
+        return _frontend_pool
@@ -1,4 +1,7 @@
-from typing import List, TypedDict
+import operator
+from typing import Annotated, Any, Dict, List, TypedDict
+
+from graph.chunk_store import merge_chunk_ids
 
 
 class GraphState(TypedDict):
@@ -6,13 +9,42 @@ class GraphState(TypedDict):
     Represents the state of our graph
     Attributes:
         question: question
+        filter: metadata filter pushed down into retrieval, see graph/filters.py
         generation: LLM generation
-        web_search: whether to add search
-        documents: list of documents
+        web_search: whether web search results were added
+        chunk_ids: ids of the current documents in graph.chunk_store
+        scores: retrieval relevance score per chunk id
+        graded_count: number of documents graded for the question, including
+            the verdicts carried over a query rewrite
+        retry_count: number of generations for the question
+        generation_retries: regenerations of an answer the critique found
+            not supported, capped by MAX_GENERATION_RETRIES
+        rewritten_question: last question rewrite used for re-retrieval
+        query_rewrites: number of times the question has been rewritten
+        reflection: support / usefulness verdicts returned with the generation
+            by reflective_generate, consumed instead of a separate critique
+        chat_history: earlier messages of a checkpointed chat session
+        asked_question: a follow-up as the user asked it, when question holds
+            its standalone rewrite
+        prior_chunk_ids: relevant chunks of the previous chat turn; after
+            retrieval only those retrieved again, which keep their verdict
+        carried_chunk_ids: chunks graded relevant before a query rewrite,
+            whose verdicts grade_documents carries forward instead of regrading
     """
 
     question: str
+    filter: Dict[str, Any]
     generation: str
     web_search: bool
-    documents: List[str]
+    chunk_ids: Annotated[List[str], merge_chunk_ids]
+    scores: Dict[str, float]
+    graded_count: int
     retry_count: int
+    generation_retries: int
+    rewritten_question: str
+    query_rewrites: int
+    reflection: Dict[str, bool]
+    chat_history: Annotated[List[Dict[str, Any]], operator.add]
+    asked_question: str
+    prior_chunk_ids: List[str]
+    carried_chunk_ids: List[str]
@@ -0,0 +1,96 @@
+import importlib
+import json
+import os
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from graph import metrics
+from graph.answer_lookup import AnswerLookup, get_answer_lookup, normalize_question
+from graph.chunk_store import get_documents
+from graph.fakes import fake_retriever
+from graph.federated import FederatedVectorStore
+from ingest.job import run_ingestion_job
+from ingest.manifest import load_manifest
+from ingest.precompute import ANSWERS_FILE
+from ingest.snapshot import latest_snapshot, open_vectorstore
+
+EMBEDDING = DeterministicFakeEmbedding(size=32)
+QUESTION = "What is agent memory?"
+
+
+def make_lookup(question: str = QUESTION) -> AnswerLookup:
+    entry = {
+        "question": question,
+        "answer": "Short-term and long-term memory.",
+        "chunks": [{"text": "Memory can be short-term or long-term.", "metadata": {"source": "memory.md"}}],
+        "vector": EMBEDDING.embed_query(question),
+    }
+    return AnswerLookup([entry], EMBEDDING)
+
+
+def test_questions_match_after_normalization() -> None:
+    lookup = make_lookup()
+
+    assert normalize_question("  what IS agent-memory ?") == "what is agent memory"
+    assert lookup.match("what is agent memory", min_similarity=1.0) is not None
+    assert lookup.match("how do agents plan?", min_similarity=1.0) is None
+
+
+def test_questions_match_by_embedding_similarity() -> None:
+    lookup = make_lookup("what is agent memory, in short")
+
+    # the fake embedding gives identical text identical vectors, anything else a random one
+    assert lookup.match("what is agent memory, in short!", min_similarity=0.95) is not None
+    assert lookup.match("how do agents plan?", min_similarity=0.95) is None
+
+
+def test_a_hit_ends_the_run_without_retrieval(graph_module) -> None:
+    metrics.reset()
+    app = graph_module.build_graph(fake_retriever(), answer_lookup=make_lookup())
+
+    result = app.invoke({"question": "what is agent memory"})
+
+    assert result["generation"] == "Short-term and long-term memory."
+    assert [d.metadata["source"] for d in get_documents(result)] == ["memory.md"]
+    assert metrics.get("answer_lookups", "hit") == 1
+    metrics.reset()
+
+
+def test_filtered_questions_skip_the_lookup(graph_module) -> None:
+    lookup_answer = importlib.import_module("graph.answer_lookup").lookup_answer
+
+    assert lookup_answer({"question": QUESTION, "filter": {"source": "a.md"}}, make_lookup()) == {}
+
+
+def ingest(tmp_path, name: str, question: str):
+    docs = tmp_path / name
+    docs.mkdir()
+    (docs / "memory.md").write_text("Memory can be short-term or long-term.", encoding="utf-8")
+    manifest = tmp_path / f"{name}.json"
+    manifest.write_text(
+        json.dumps({"name": name, "paths": [name], "chunking": {"splitter": "characters"}}),
+        encoding="utf-8",
+    )
+    root = str(tmp_path / "indexes")
+    run_ingestion_job(load_manifest(str(manifest)), "local", root=root, embedding=EMBEDDING)
+    snapshot = latest_snapshot(name, root)
+    with open(os.path.join(snapshot.path, ANSWERS_FILE), "w", encoding="utf-8") as f:
+        json.dump(make_lookup(question).entries, f)
+    return snapshot
+
+
+def test_answers_come_from_the_snapshots_behind_the_retriever(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    first = open_vectorstore(ingest(tmp_path, "first", "what is in first?"), EMBEDDING)
+    second = open_vectorstore(ingest(tmp_path, "second", "what is in second?"), EMBEDDING)
+
+    lookup = get_answer_lookup(first.as_retriever())
+    assert lookup.match("what is in first", min_similarity=1.0) is not None
+    assert lookup.match("what is in second", min_similarity=1.0) is None
+    # the lookup embeds with the retriever's embeddings
+    assert lookup.embedding is EMBEDDING
+
+    federated = FederatedVectorStore({"first": first, "second": second}, EMBEDDING)
+    assert len(get_answer_lookup(federated.as_retriever())) == 2
+    # a store not opened from a snapshot has no precomputed answers
+    assert len(get_answer_lookup(fake_retriever())) == 0
@@ -0,0 +1,122 @@
+import importlib
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.memory import InMemorySaver
+
+from graph.answer_lookup import AnswerLookup
+from graph.chat import turn_input, turn_messages
+from graph.checkpoint import one_off_config
+from graph.chunk_store import chunk_id, chunk_store
+from graph.fakes import SAMPLE_DOCUMENTS, fake_retriever
+
+HISTORY = [
+    {"role": "user", "content": "what is agent memory?"},
+    {"role": "assistant", "content": "Short and long-term memory."},
+]
+
+
+def test_turn_messages_skips_unfinished_turn() -> None:
+    assert turn_messages({}) == []
+    assert turn_messages({"question": "q", "generation": ""}) == []
+
+
+def test_turn_input_folds_previous_turn_and_resets_fields() -> None:
+    previous = {
+        "question": "what is agent memory?",
+        "generation": "Short and long-term memory.",
+        "chunk_ids": [chunk_store.put(Document(page_content="memory", metadata={"source": "post"}))],
+        "web_search": True,
+        "retry_count": 2,
+        "query_rewrites": 1,
+    }
+
+    new_input = turn_input("and planning?", previous)
+
+    assert new_input["question"] == "and planning?"
+    assert new_input["retry_count"] == 0
+    assert new_input["query_rewrites"] == 0
+    assert new_input["generation"] == ""
+    assert new_input["chunk_ids"] == {"replace": []}
+    assert new_input["chat_history"] == [
+        {"role": "user", "content": "what is agent memory?"},
+        {
+            "role": "assistant",
+            "content": "Short and long-term memory.",
+            "web_search": True,
+            "sources": ["post"],
+        },
+    ]
+
+
+def test_follow_ups_are_offered_the_previous_turns_chunks(monkeypatch) -> None:
+    ids = chunk_store.put_many(SAMPLE_DOCUMENTS[:2])
+    previous = {
+        "question": "what is agent memory?",
+        "generation": "Short and long-term memory.",
+        "chunk_ids": ids,
+        "scores": {ids[0]: 0.9, "dropped": 0.1},
+        "filter": {},
+    }
+
+    # reuse is opt-in
+    assert turn_input("and planning?", previous)["prior_chunk_ids"] == []
+    monkeypatch.setattr("graph.chat.REUSE_FOLLOW_UP_CHUNKS", True)
+
+    new_input = turn_input("and planning?", previous)
+
+    assert new_input["prior_chunk_ids"] == ids
+    assert new_input["scores"] == {ids[0]: 0.9}
+    # web results and a changed filter are never reused
+    assert turn_input("and planning?", {**previous, "web_search": True})["prior_chunk_ids"] == []
+    assert turn_input("and planning?", previous, {"source": "a.md"})["prior_chunk_ids"] == []
+
+
+def test_history_keeps_the_question_as_asked() -> None:
+    state = {"question": "How does agent planning work?", "asked_question": "and planning?"}
+
+    messages = turn_messages({**state, "generation": "Subgoals."})
+
+    assert messages[0] == {"role": "user", "content": "and planning?"}
+
+
+def test_follow_ups_are_condensed_into_standalone_questions(nodes, monkeypatch) -> None:
+    module = importlib.import_module("graph.nodes.condense_question")
+    monkeypatch.setattr(
+        module, "question_condenser", RunnableLambda(lambda _: "How does agent planning work?")
+    )
+
+    assert nodes.condense_question({"question": "what is agent memory?"}) == {}
+    assert nodes.condense_question({"question": "and planning?", "chat_history": HISTORY}) == {
+        "question": "How does agent planning work?",
+        "asked_question": "and planning?",
+    }
+
+
+def test_retrieval_reuses_prior_chunks_only_while_they_still_apply(nodes) -> None:
+    retriever = fake_retriever()
+    memory = chunk_id(SAMPLE_DOCUMENTS[0])
+    unrelated = chunk_store.put(Document(page_content="An unrelated earlier chunk."))
+    state = {"question": SAMPLE_DOCUMENTS[0].page_content, "filter": {}}
+
+    reused = nodes.retrieve({**state, "prior_chunk_ids": [memory, unrelated]}, retriever)
+    fresh = nodes.retrieve({**state, "prior_chunk_ids": [unrelated]}, retriever)
+
+    assert reused["chunk_ids"]["replace"][0] == memory
+    assert len(reused["chunk_ids"]["replace"]) == len(set(reused["chunk_ids"]["replace"]))
+    # a prior chunk the follow-up no longer retrieves is dropped, not kept as relevant
+    assert unrelated not in reused["chunk_ids"]["replace"]
+    assert reused["prior_chunk_ids"] == [memory]
+    assert unrelated not in fresh["chunk_ids"]["replace"]
+    assert fresh["prior_chunk_ids"] == []
+
+
+def test_one_off_runs_of_a_checkpointed_graph_get_their_own_thread(graph_module) -> None:
+    lookup = AnswerLookup([{"question": "what is agent memory?", "answer": "Memory.", "chunks": []}])
+    app = graph_module.build_graph(
+        fake_retriever(), checkpointer=InMemorySaver(), warm_up=False, answer_lookup=lookup
+    )
+
+    first, second = one_off_config(), one_off_config()
+    assert first != second
+    assert app.invoke({"question": "what is agent memory?"}, first)["generation"] == "Memory."
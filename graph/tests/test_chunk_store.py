@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.documents import Document
+
+from graph.chunk_store import ChunkNotFound, ChunkStore, merge_chunk_ids, replace_chunk_ids
+
+
+def test_same_content_gets_same_id() -> None:
+    store = ChunkStore()
+    first = store.put(Document(page_content="agent memory", metadata={"source": "a"}))
+    second = store.put(Document(page_content="agent memory", metadata={"source": "b"}))
+    assert first == second
+    assert len(store) == 1
+
+
+def test_memory_is_bounded_and_evicted_chunks_are_read_back() -> None:
+    store = ChunkStore(max_chunks=2)
+    ids = store.put_many(Document(page_content=f"chunk {i}") for i in range(3))
+    assert len(store) == 2
+    assert [doc.page_content for doc in store.materialize(ids)] == ["chunk 0", "chunk 1", "chunk 2"]
+
+
+def test_chunks_outlive_the_process_next_to_the_checkpoints(tmp_path) -> None:
+    path = str(tmp_path / "checkpoints.sqlite")
+    doc = Document(page_content="agent memory", metadata={"source": "a.md"})
+    key = ChunkStore(path=path).put(doc)
+
+    # a resumed run in a new process opens the same database
+    assert ChunkStore(path=path).materialize([key]) == [doc]
+
+
+def test_latest_metadata_wins_for_identical_content(tmp_path) -> None:
+    path = str(tmp_path / "checkpoints.sqlite")
+    store = ChunkStore(max_chunks=1, path=path)
+    key = store.put(Document(page_content="agent memory", metadata={"source": "a.md"}))
+    store.put(Document(page_content="agent memory", metadata={"source": "b.md"}))
+
+    assert store.materialize([key])[0].metadata == {"source": "b.md"}
+    assert ChunkStore(path=path).materialize([key])[0].metadata == {"source": "b.md"}
+
+
+def test_chunks_unused_for_the_ttl_are_pruned(monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("graph.chunk_store.time.time", lambda: now[0])
+    store = ChunkStore(max_chunks=1, ttl=100)
+    store.prune_interval = 0
+    old, used = store.put_many(
+        [Document(page_content="old chunk"), Document(page_content="used chunk")]
+    )
+
+    now[0] += 60
+    store.materialize([used])
+    now[0] += 60
+    store.put(Document(page_content="new chunk"))
+
+    assert store.materialize([used])[0].page_content == "used chunk"
+    with pytest.raises(ChunkNotFound):
+        store.materialize([old])
+
+
+def test_unknown_ids_raise() -> None:
+    with pytest.raises(ChunkNotFound):
+        ChunkStore().materialize(["0123456789abcdef"])
+
+
+def test_merge_chunk_ids_appends_without_duplicates() -> None:
+    current = ["a", "b"]
+    merged = merge_chunk_ids(current, ["b", "c"])
+    assert merged == ["a", "b", "c"]
+    assert current == ["a", "b"]
+
+
+def test_merge_chunk_ids_replace() -> None:
+    assert merge_chunk_ids(["a", "b"], replace_chunk_ids(["c"])) == ["c"]
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from graph import critique
+
+
+def grader(**fields):
+    return RunnableLambda(lambda _: SimpleNamespace(**fields))
+
+
+@pytest.fixture
+def graders(monkeypatch):
+    def install(grounded, useful):
+        monkeypatch.setattr(
+            critique, "hallucination_grader", grader(binary_score=grounded)
+        )
+        monkeypatch.setattr(critique, "answer_grader", grader(binary_score=useful))
+        monkeypatch.setattr(
+            critique,
+            "generation_grader",
+            grader(grounded=grounded, answers_question=useful),
+        )
+
+    return install
+
+
+@pytest.mark.parametrize("mode", ["sequential", "concurrent", "combined"])
+def test_modes_agree(graders, mode) -> None:
+    graders("yes", "no")
+    assert critique.critique_generation("q", [], "g", mode=mode) == (True, False)
+
+
+def test_sequential_skips_answer_grader_when_not_grounded(graders) -> None:
+    graders("no", "yes")
+    assert critique.critique_generation("q", [], "g", mode="sequential") == (False, None)
+    assert critique.critique_generation("q", [], "g", mode="concurrent") == (False, True)
+
+
+def test_unknown_mode(graders) -> None:
+    graders("yes", "yes")
+    with pytest.raises(ValueError):
+        critique.critique_generation("q", [], "g", mode="nope")
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from langchain_core.documents import Document
+
+from graph import fast_path, metrics
+from graph.chunk_store import chunk_store
+
+
+def make_state(scores, graded_count=None, web_cached=0, **extra):
+    chunk_ids = chunk_store.put_many(
+        Document(
+            page_content=f"fast path chunk {i}",
+            metadata={"origin": "web"} if i < web_cached else {},
+        )
+        for i in range(len(scores))
+    )
+    return {
+        "question": "what is agent memory?",
+        "generation": "Agent memory is short-term and long-term.",
+        "chunk_ids": chunk_ids,
+        "scores": dict(zip(chunk_ids, scores)),
+        "graded_count": len(scores) if graded_count is None else graded_count,
+        "retry_count": 1,
+        **extra,
+    }
+
+
+def test_confident_only_when_every_signal_passes() -> None:
+    assert fast_path.is_confident(make_state([0.9, 0.85]), min_relevant=2, min_score=0.8)
+    # a chunk graded irrelevant, a weak chunk, too few chunks
+    assert not fast_path.is_confident(make_state([0.9, 0.85], graded_count=3))
+    assert not fast_path.is_confident(make_state([0.9, 0.7]), min_score=0.8)
+    assert not fast_path.is_confident(make_state([0.9]), min_relevant=2)
+    # web results, retries and rewrites always go through critique
+    assert not fast_path.is_confident(make_state([0.9, 0.9], web_search=True))
+    assert not fast_path.is_confident(make_state([0.95, 0.9, 0.9], web_cached=1))
+    assert not fast_path.is_confident(make_state([0.9, 0.9], retry_count=2))
+    assert not fast_path.is_confident(make_state([0.9, 0.9], query_rewrites=1))
+
+
+@pytest.mark.parametrize("grounded, outcome", [(True, "passed"), (False, "failed")])
+def test_sampled_answers_are_audited_in_the_background(
+    monkeypatch, tmp_path, grounded, outcome
+) -> None:
+    log = tmp_path / "audits.jsonl"
+    monkeypatch.setattr(fast_path, "FAST_PATH_AUDIT_LOG", str(log))
+    monkeypatch.setattr(
+        fast_path, "critique_generation", lambda question, documents, generation: (grounded, True)
+    )
+    metrics.reset()
+
+    fast_path.maybe_audit(make_state([0.9, 0.9]), [], rate=1.0).result(timeout=5)
+
+    assert metrics.get("fast_path_audits", outcome) == 1
+    record = json.loads(log.read_text())
+    assert record["grounded"] is grounded and record["min_score"] == 0.9
+    metrics.reset()
+
+
+def test_unsampled_answers_are_not_audited() -> None:
+    assert fast_path.maybe_audit(make_state([0.9, 0.9]), [], rate=0.0) is None
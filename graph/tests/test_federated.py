@@ -0,0 +1,121 @@
+import threading
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from graph import metrics
+from graph.federated import FederatedVectorStore, normalize
+from graph.filters import native_filter
+from graph.vectors import QueryCachingEmbeddings
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    queries: int = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+class SlowStore(InMemoryVectorStore):
+    def similarity_search(self, query, k=4, **kwargs):
+        time.sleep(1.0)
+        return super().similarity_search(query, k, **kwargs)
+
+
+def shard(embedding, texts, source, cls=InMemoryVectorStore):
+    store = cls(embedding)
+    store.add_documents([Document(page_content=t, metadata={"source": source}) for t in texts])
+    return store
+
+
+def test_shards_are_merged_deduplicated_and_embed_the_query_once() -> None:
+    counting = CountingEmbeddings(size=32)
+    embedding = QueryCachingEmbeddings(counting)
+    store = FederatedVectorStore(
+        {
+            "a": shard(embedding, ["agent memory", "planning"], "a.md"),
+            "b": shard(embedding, ["agent memory", "tool use"], "b.md"),
+        },
+        embedding,
+    )
+
+    results = store.similarity_search_with_relevance_scores("agent memory", k=4)
+
+    texts = [doc.page_content for doc, _ in results]
+    assert texts[0] == "agent memory" and sorted(texts) == ["agent memory", "planning", "tool use"]
+    assert {doc.metadata["shard"] for doc, _ in results} <= {"a", "b"}
+    assert counting.queries == 1
+
+
+def test_slow_shard_is_left_out() -> None:
+    embedding = DeterministicFakeEmbedding(size=32)
+    store = FederatedVectorStore(
+        {
+            "fast": shard(embedding, ["agent memory"], "fast.md"),
+            "slow": shard(embedding, ["planning"], "slow.md", cls=SlowStore),
+        },
+        embedding,
+        timeout=0.2,
+    )
+    metrics.reset()
+
+    docs = store.similarity_search("agent memory", k=4)
+
+    assert [d.page_content for d in docs] == ["agent memory"]
+    assert metrics.get("shard_timeouts", "slow") == 1
+    metrics.reset()
+
+
+def test_filters_are_translated_per_shard() -> None:
+    embedding = DeterministicFakeEmbedding(size=32)
+    store = FederatedVectorStore(
+        {
+            "a": shard(embedding, ["agent memory"], "a.md"),
+            "b": shard(embedding, ["agent memory too"], "b.md"),
+        },
+        embedding,
+    )
+
+    metadata_filter = native_filter(store, {"source": "b.md"})
+    docs = store.similarity_search("agent memory", k=4, filter=metadata_filter)
+
+    assert [d.metadata["source"] for d in docs] == ["b.md"]
+
+
+def test_minmax_normalization() -> None:
+    docs = [Document(page_content=str(i)) for i in range(3)]
+    scores = [score for _, score in normalize(list(zip(docs, [0.25, 0.5, 0.75])), "minmax")]
+    assert scores == [0.0, 0.5, 1.0]
+
+
+def test_hung_shard_holds_a_bounded_number_of_threads() -> None:
+    release = threading.Event()
+
+    class HungStore(InMemoryVectorStore):
+        def similarity_search(self, query, k=4, **kwargs):
+            release.wait(5)
+            return super().similarity_search(query, k, **kwargs)
+
+    embedding = DeterministicFakeEmbedding(size=32)
+    store = FederatedVectorStore(
+        {
+            "ok": shard(embedding, ["agent memory"], "ok.md"),
+            "hung": shard(embedding, ["planning"], "hung.md", cls=HungStore),
+        },
+        embedding,
+        timeout=0.1,
+        max_pending=1,
+    )
+    metrics.reset()
+
+    for _ in range(3):
+        assert [d.page_content for d in store.similarity_search("agent memory")] == ["agent memory"]
+
+    # the first search timed out; the next ones skip the shard instead of queueing more
+    assert metrics.get("shard_timeouts", "hung") == 1
+    assert metrics.get("shard_skipped", "hung") == 2
+    release.set()
+    metrics.reset()
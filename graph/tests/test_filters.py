@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+
+from graph.filters import matches, native_filter, to_chroma, to_endee
+from graph.fakes import fake_retriever
+
+
+class Chroma:
+    pass
+
+
+class EndeeVectorStore:
+    pass
+
+
+def test_filters_translate_to_each_store() -> None:
+    one = {"source": "a.pdf"}
+    many = {"source": ["a.pdf", "b.pdf"], "page": 3}
+
+    assert to_chroma(one) == {"source": {"$eq": "a.pdf"}}
+    assert to_chroma(many) == {
+        "$and": [{"source": {"$in": ["a.pdf", "b.pdf"]}}, {"page": {"$eq": 3}}]
+    }
+    assert to_endee(many) == [{"source": {"$in": ["a.pdf", "b.pdf"]}}, {"page": {"$eq": 3}}]
+    assert native_filter(Chroma(), one) == to_chroma(one)
+    assert native_filter(EndeeVectorStore(), one) == to_endee(one)
+    assert native_filter(Chroma(), {}) is None
+
+
+def test_predicate_filter_for_local_stores() -> None:
+    predicate = native_filter(object(), {"source": ["a.pdf", "b.pdf"], "page": 3})
+
+    assert predicate(Document(page_content="", metadata={"source": "b.pdf", "page": 3}))
+    assert not predicate(Document(page_content="", metadata={"source": "b.pdf", "page": 4}))
+    assert not matches({}, {"source": "a.pdf"})
+
+
+def test_retrieval_only_returns_matching_chunks(web_search_key) -> None:
+    from graph.nodes.retrieve import retrieve_with_scores
+
+    retriever = fake_retriever()
+    source = retriever.invoke("agent memory")[0].metadata["source"]
+
+    documents = retrieve_with_scores("agent memory", retriever, {"source": source})
+
+    assert documents and {doc.metadata["source"] for doc in documents} == {source}
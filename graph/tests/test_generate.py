@@ -0,0 +1,48 @@
+import importlib
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from graph.chunk_store import chunk_store
+from graph.fakes import SAMPLE_DOCUMENTS
+
+
+@pytest.fixture
+def generate_module(web_search_key, monkeypatch):
+    module = importlib.import_module("graph.nodes.generate")
+    monkeypatch.setattr(module, "STREAMING_GROUNDING", False)
+    monkeypatch.setattr(module, "generation_chain", RunnableLambda(lambda _: "Answer."))
+    return module
+
+
+def make_state(**fields):
+    return {"question": "q", "chunk_ids": chunk_store.put_many(SAMPLE_DOCUMENTS[:1]), **fields}
+
+
+def test_generating_for_new_context_is_not_a_retry(generate_module) -> None:
+    # e.g. generate -> rewrite -> web search -> generate
+    result = generate_module.generate(make_state(generation="", retry_count=2))
+
+    assert result["generation"] == "Answer."
+    assert result["retry_count"] == 3 and result["generation_retries"] == 0
+
+
+def test_hallucination_retries_end_in_the_fallback(generate_module, monkeypatch) -> None:
+    monkeypatch.setattr(generate_module, "MAX_GENERATION_RETRIES", 3)
+
+    retry = generate_module.generate(make_state(generation="Made up.", generation_retries=1))
+    last = generate_module.generate(make_state(generation="Made up.", generation_retries=2))
+
+    assert retry["generation"] == "Answer." and retry["generation_retries"] == 2
+    assert last["generation"].startswith("I could not find") and last["generation_retries"] == 3
+
+
+def test_unhelpful_answer_after_web_search_ends_the_run(graph_module, monkeypatch) -> None:
+    monkeypatch.setattr(graph_module, "FAST_PATH", False)
+    monkeypatch.setattr(graph_module, "MAX_QUERY_REWRITES", 0)
+    monkeypatch.setattr(graph_module, "critique_generation", lambda *args: (True, False))
+    state = make_state(generation="From the web.", web_search=True)
+
+    assert graph_module.grade_generation_grounded_in_documents_and_question(state) == "useful"
+    state["web_search"] = False
+    assert graph_module.grade_generation_grounded_in_documents_and_question(state) == "not useful"
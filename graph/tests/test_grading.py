@@ -0,0 +1,152 @@
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.documents import Document
+
+from graph import metrics
+from graph.chunk_store import chunk_store
+
+DOCUMENTS = [Document(page_content=f"chunk {i}") for i in range(5)]
+# (delay in seconds, grade) per chunk: the last chunk's grader is slow
+VERDICTS = {
+    "chunk 0": (0.02, "yes"),
+    "chunk 1": (0.01, "no"),
+    "chunk 2": (0.03, "yes"),
+    "chunk 3": (0.01, "yes"),
+    "chunk 4": (5.0, "yes"),
+}
+
+
+async def fake_grade(question, doc):
+    delay, grade = VERDICTS[doc.page_content]
+    await asyncio.sleep(delay)
+    return doc, grade
+
+
+@pytest.fixture
+def grading(web_search_key):
+    return importlib.import_module("graph.nodes.grade_documents")
+
+
+def grade(grading, monkeypatch, streaming):
+    monkeypatch.setattr(grading, "grade_single_document", fake_grade)
+    monkeypatch.setattr(grading, "STREAMING_GRADING", streaming)
+    state = {"question": "q", "chunk_ids": chunk_store.put_many(DOCUMENTS)}
+    return grading.grade_documents(state)
+
+
+def test_streaming_grading_stops_once_enough_documents_are_relevant(grading, monkeypatch) -> None:
+    result = grade(grading, monkeypatch, streaming=True)
+
+    # chunks 3, 1 and 0 are graded first; two relevant ones are enough
+    ids = result["chunk_ids"]["replace"]
+    assert [d.page_content for d in chunk_store.materialize(ids)] == ["chunk 0", "chunk 3"]
+    assert result["graded_count"] == 3
+
+
+def test_streaming_grading_grades_everything_when_never_sufficient(grading, monkeypatch) -> None:
+    monkeypatch.setattr(grading, "GRADING_SUFFICIENT_RELEVANT", 10)
+    monkeypatch.setitem(VERDICTS, "chunk 4", (0.01, "no"))
+
+    result = grade(grading, monkeypatch, streaming=True)
+
+    assert len(result["chunk_ids"]["replace"]) == 3
+    assert result["graded_count"] == 5
+
+
+class StubGrader:
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+    def grade(self, embedding, question, documents, **vectors):
+        return [self.probabilities[d.page_content] for d in documents]
+
+
+def test_local_mode_grades_confident_chunks_without_the_llm(grading, monkeypatch) -> None:
+    graded_by_llm = []
+
+    async def llm_grade(question, doc):
+        graded_by_llm.append(doc.page_content)
+        return await fake_grade(question, doc)
+
+    probabilities = {
+        "chunk 0": 0.99,
+        "chunk 1": 0.02,
+        "chunk 2": 0.6,  # not confident: graded by the LLM
+        "chunk 3": 0.97,
+        "chunk 4": 0.01,
+    }
+    monkeypatch.setattr(grading, "get_local_grader", lambda: StubGrader(probabilities))
+    monkeypatch.setattr(grading, "GRADING_MODE", "local")
+    monkeypatch.setattr(grading, "STREAMING_GRADING", False)
+    monkeypatch.setattr(grading, "grade_single_document", llm_grade)
+    state = {"question": "q", "chunk_ids": chunk_store.put_many(DOCUMENTS)}
+
+    result = grading.grade_documents(state)
+
+    assert graded_by_llm == ["chunk 2"]
+    ids = result["chunk_ids"]["replace"]
+    relevant = [d.page_content for d in chunk_store.materialize(ids)]
+    assert relevant == ["chunk 0", "chunk 2", "chunk 3"]
+    assert result["graded_count"] == 5
+
+
+def test_shadow_mode_reports_agreement_with_the_llm(grading, monkeypatch) -> None:
+    monkeypatch.setitem(VERDICTS, "chunk 4", (0.01, "no"))
+    # disagrees with the LLM on chunk 2 only
+    probabilities = {"chunk 0": 0.9, "chunk 1": 0.2, "chunk 2": 0.1, "chunk 3": 0.8, "chunk 4": 0.3}
+    monkeypatch.setattr(grading, "get_local_grader", lambda: StubGrader(probabilities))
+    monkeypatch.setattr(grading, "GRADING_MODE", "shadow")
+    metrics.reset()
+
+    result = grade(grading, monkeypatch, streaming=False)
+
+    assert len(result["chunk_ids"]["replace"]) == 3
+    report = metrics.grader_report()
+    assert report["local_share"] == 0
+    assert report["shadow_compared"] == 5 and report["shadow_agreement"] == 0.8
+    metrics.reset()
+
+
+def test_chunks_reused_from_the_previous_turn_are_not_graded_again(grading, monkeypatch) -> None:
+    graded = []
+
+    async def grade_and_record(question, doc):
+        graded.append(doc.page_content)
+        return doc, "no"
+
+    monkeypatch.setattr(grading, "grade_single_document", grade_and_record)
+    monkeypatch.setattr(grading, "STREAMING_GRADING", False)
+    ids = chunk_store.put_many(DOCUMENTS[:3])
+    state = {"question": "q", "chunk_ids": ids, "prior_chunk_ids": ids[:1]}
+
+    result = grading.grade_documents(state)
+
+    assert graded == ["chunk 1", "chunk 2"]
+    assert result["chunk_ids"] == {"replace": ids[:1]} and result["graded_count"] == 3
+
+
+def test_verdicts_before_a_query_rewrite_are_carried_forward(grading, monkeypatch) -> None:
+    graded = []
+
+    async def grade_and_record(question, doc):
+        graded.append(doc.page_content)
+        return doc, "yes" if doc.page_content == "chunk 3" else "no"
+
+    monkeypatch.setattr(grading, "grade_single_document", grade_and_record)
+    monkeypatch.setattr(grading, "STREAMING_GRADING", False)
+    ids = chunk_store.put_many(DOCUMENTS)
+    # the first pass graded chunks 0-2 and kept chunk 0; the rewrite added 3 and 4
+    state = {
+        "question": "q",
+        "chunk_ids": [ids[0], ids[3], ids[4]],
+        "carried_chunk_ids": [ids[0]],
+        "graded_count": 3,
+    }
+
+    result = grading.grade_documents(state)
+
+    assert graded == ["chunk 3", "chunk 4"]
+    assert result["chunk_ids"] == {"replace": [ids[0], ids[3]]}
+    assert result["graded_count"] == 5 and result["carried_chunk_ids"] == []
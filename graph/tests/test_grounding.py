@@ -0,0 +1,40 @@
+from graph.grounding import (
+    SUPPORTED,
+    UNCERTAIN,
+    UNSUPPORTED,
+    classify_sentence,
+    lexical_support,
+    split_sentences,
+    tokenize,
+)
+
+CONTEXT = tokenize(
+    "Agent memory includes short-term memory in the context window and "
+    "long-term memory stored in an external vector store."
+)
+
+
+def test_split_sentences_keeps_remainder() -> None:
+    sentences, remainder = split_sentences("First one. Second one! Third")
+    assert sentences == ["First one. ", "Second one! "]
+    assert remainder == "Third"
+
+
+def test_lexical_support_ignores_stopwords() -> None:
+    assert lexical_support("It is the memory.", CONTEXT) == 1.0
+    assert lexical_support("...", CONTEXT) == 1.0
+
+
+def test_classify_sentence() -> None:
+    assert classify_sentence("Long-term memory uses a vector store.", CONTEXT) == SUPPORTED
+    assert classify_sentence("Pancakes need flour and eggs.", CONTEXT) == UNSUPPORTED
+    assert classify_sentence("Memory windows shrink over weeks.", CONTEXT) == UNCERTAIN
+
+
+def test_refusals_and_hedges_are_not_rejected() -> None:
+    assert classify_sentence("I don't know.", CONTEXT) == SUPPORTED
+    assert classify_sentence("The context does not mention pricing.", CONTEXT) == SUPPORTED
+    assert classify_sentence("The documents contain no details on pricing.", CONTEXT) == SUPPORTED
+    # a negative claim about anything but the context is checked like any other
+    assert classify_sentence("Pancakes do not provide flour.", CONTEXT) == UNSUPPORTED
+    assert classify_sentence("Pancakes might need eggs.", CONTEXT) == UNCERTAIN
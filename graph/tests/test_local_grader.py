@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
+
+from graph.chunk_store import chunk_id
+from graph.local_grader import LocalGrader, load_verdicts, log_verdict, train
+from graph.vectors import (
+    QueryCachingEmbeddings,
+    chunk_vectors,
+    query_vectors,
+    remember_vectors,
+    stored_vectors,
+)
+from ingest.compression import CompressedVectorStore, CompressionConfig
+
+EMBEDDING = DeterministicFakeEmbedding(size=32)
+
+
+def test_verdicts_are_logged_and_deduplicated(tmp_path) -> None:
+    path = str(tmp_path / "verdicts.jsonl")
+    doc = Document(page_content="agents plan", metadata={"source": "a.md"})
+
+    log_verdict("what do agents do?", doc, "No", path=path)
+    log_verdict("what do agents do?", doc, "yes", path=path)
+
+    records = load_verdicts(path)
+    assert len(records) == 1
+    assert records[0]["verdict"] == "yes" and records[0]["source"] == "a.md"
+
+
+def test_trained_grader_separates_relevant_chunks(tmp_path) -> None:
+    # the fake embedding maps equal texts to equal vectors, so a chunk is
+    # "relevant" exactly when it repeats the question
+    log = tmp_path / "verdicts.jsonl"
+    with open(log, "w") as f:
+        for i in range(30):
+            question = f"question {i}"
+            pairs = [(question, "yes"), (f"unrelated {i}-a", "no"), (f"unrelated {i}-b", "no")]
+            for chunk, verdict in pairs:
+                record = {"question": question, "chunk": chunk, "verdict": verdict}
+                f.write(json.dumps(record) + "\n")
+    model_path = str(tmp_path / "grader.npz")
+
+    report = train(str(log), model_path, embedding=EMBEDDING)
+
+    assert report["verdicts"] == 90
+    assert report["holdout_accuracy"] >= 0.9
+    grader = LocalGrader.load(model_path)
+    docs = [Document(page_content="question 99"), Document(page_content="something else")]
+    relevant, irrelevant = grader.grade(EMBEDDING, "question 99", docs)
+    assert relevant > 0.5 > irrelevant
+
+
+class RefusingEmbeddings(DeterministicFakeEmbedding):
+    def embed_query(self, text):
+        raise AssertionError("the question vector from retrieval should be used")
+
+
+def test_retrieval_vectors_are_reused_for_grading() -> None:
+    grader = LocalGrader(np.ones(65), 0.0, np.zeros(65), np.ones(65))
+    docs = [Document(page_content="agent memory"), Document(page_content="tool use")]
+    embedded = []
+
+    class Recording(RefusingEmbeddings):
+        def embed_documents(self, texts):
+            embedded.extend(texts)
+            return super().embed_documents(texts)
+
+    store = InMemoryVectorStore(QueryCachingEmbeddings(EMBEDDING))
+    store.add_documents(docs[:1])
+    query = "what is agent memory?"
+    found = store.similarity_search(query, k=1)
+    remember_vectors(store, query, found)
+
+    grader.grade(
+        Recording(size=32),
+        query,
+        docs,
+        question_vector=query_vectors.get(query),
+        chunk_vectors=[chunk_vectors.get(chunk_id(doc)) for doc in docs],
+    )
+
+    # only the chunk retrieval did not return is embedded
+    assert embedded == ["tool use"]
+
+
+def test_stored_vectors_are_read_only_from_known_stores() -> None:
+    store = CompressedVectorStore(EMBEDDING, CompressionConfig(quantization="int8"))
+    store.add_documents([Document(page_content="agent memory", id="a")])
+    store.build()
+    found = store.similarity_search("agent memory", k=1)
+
+    assert np.allclose(stored_vectors(store, found)[0], store.full[0])
+
+    class LookAlike(VectorStore):
+        # not a CompressedVectorStore, whatever its attributes
+        rows = {"a": 0}
+        full = np.ones((1, 32))
+        similarity_search = from_texts = None
+
+    assert stored_vectors(LookAlike(), found) == [None]
@@ -0,0 +1,37 @@
+from langchain_core.documents import Document
+
+from graph.parents import ParentStore, expand_to_parents
+
+PARENTS = ParentStore(
+    {
+        "p1": Document(page_content="Agents plan. Agents remember.", metadata={"source": "a.md"}),
+        "p2": Document(page_content="Memory is short or long.", metadata={"source": "b.md"}),
+    }
+)
+
+
+def child(text: str, parent: str, score: float) -> Document:
+    return Document(page_content=text, metadata={"parent_id": parent, "relevance_score": score})
+
+
+def test_children_sharing_a_parent_expand_to_it_once() -> None:
+    documents = [
+        child("Memory is short", "p2", 0.9),
+        child("Agents plan.", "p1", 0.8),
+        child("or long.", "p2", 0.7),
+    ]
+
+    expanded = expand_to_parents(documents, PARENTS)
+
+    assert [d.page_content for d in expanded] == [
+        "Memory is short or long.",
+        "Agents plan. Agents remember.",
+    ]
+    assert expanded[0].metadata == {"source": "b.md", "parent_id": "p2", "relevance_score": 0.9}
+
+
+def test_documents_without_a_known_parent_are_kept() -> None:
+    web = Document(page_content="From the web.", metadata={"source": "https://example.com"})
+    orphan = child("Gone.", "p3", 0.5)
+
+    assert expand_to_parents([web, orphan], PARENTS) == [web, orphan]
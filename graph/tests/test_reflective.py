@@ -0,0 +1,63 @@
+import importlib
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from graph.chains.reflective_generation import ReflectiveGeneration
+from graph.fakes import fake_retriever
+
+
+def reflect_with(monkeypatch, **fields):
+    node = importlib.import_module("graph.nodes.reflective_generate")
+    result = ReflectiveGeneration(**fields)
+    monkeypatch.setattr(node, "reflective_generation", RunnableLambda(lambda _: result))
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("the multi-call path should not run")
+
+
+def test_accepted_reflection_answers_in_one_call(graph_module, monkeypatch) -> None:
+    reflect_with(
+        monkeypatch,
+        relevant_chunks=[1, 2],
+        answer="Memory.",
+        grounded="yes",
+        answers_question="yes",
+    )
+    monkeypatch.setattr(graph_module, "critique_generation", fail)
+    app = graph_module.build_graph(fake_retriever(), generation_mode="reflective")
+
+    result = app.invoke({"question": "what is agent memory?"})
+
+    assert result["generation"] == "Memory."
+    assert len(result["chunk_ids"]) == 2 and result["graded_count"] == 4
+    assert result["retry_count"] == 1
+
+
+def test_unsupported_reflection_falls_back_to_generate_and_critique(
+    graph_module, monkeypatch
+) -> None:
+    reflect_with(
+        monkeypatch,
+        relevant_chunks=[1, 2],
+        answer="Made up.",
+        grounded="no",
+        answers_question="yes",
+    )
+    generate_module = importlib.import_module("graph.nodes.generate")
+    monkeypatch.setattr(
+        generate_module, "generation_chain", RunnableLambda(lambda _: "Regenerated.")
+    )
+    monkeypatch.setattr(graph_module, "critique_generation", lambda *args: (True, True))
+    app = graph_module.build_graph(fake_retriever(), generation_mode="reflective")
+
+    result = app.invoke({"question": "what is agent memory?"})
+
+    assert result["generation"] == "Regenerated."
+    assert result["reflection"] == {} and result["retry_count"] == 2
+
+
+def test_unknown_generation_mode(graph_module) -> None:
+    with pytest.raises(ValueError):
+        graph_module.build_graph(fake_retriever(), generation_mode="nope")
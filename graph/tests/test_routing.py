@@ -0,0 +1,56 @@
+import pytest
+
+from graph import metrics
+from graph.routing import has_sufficient_documents
+
+
+def make_state(scores, graded_count):
+    chunk_ids = [f"chunk-{i}" for i in range(len(scores))]
+    return {
+        "question": "agent memory",
+        "chunk_ids": chunk_ids,
+        "scores": dict(zip(chunk_ids, scores)),
+        "graded_count": graded_count,
+    }
+
+
+def test_all_policy_requires_every_document() -> None:
+    assert has_sufficient_documents(make_state([0.8] * 4, 4), policy="all")
+    assert not has_sufficient_documents(make_state([0.8] * 3, 4), policy="all")
+
+
+def test_min_relevant_policy() -> None:
+    assert has_sufficient_documents(make_state([0.8] * 2, 4), policy="min_relevant")
+    assert not has_sufficient_documents(make_state([0.8], 4), policy="min_relevant")
+    # a single retrieved document that is relevant is enough
+    assert has_sufficient_documents(make_state([0.8], 1), policy="min_relevant")
+    assert not has_sufficient_documents(make_state([], 0), policy="min_relevant")
+
+
+def test_fraction_policy() -> None:
+    assert has_sufficient_documents(make_state([0.8] * 2, 4), policy="fraction")
+    assert not has_sufficient_documents(make_state([0.8], 4), policy="fraction")
+    assert not has_sufficient_documents(make_state([], 0), policy="fraction")
+
+
+def test_score_policy() -> None:
+    assert has_sufficient_documents(make_state([0.6, 0.5], 4), policy="score")
+    assert not has_sufficient_documents(make_state([0.3, 0.4], 4), policy="score")
+
+
+def test_unknown_policy() -> None:
+    with pytest.raises(ValueError):
+        has_sufficient_documents(make_state([], 0), policy="nope")
+
+
+def test_routing_report() -> None:
+    metrics.reset()
+    metrics.increment("questions_routed", "fraction", 4)
+    metrics.increment("web_searches", "fraction")
+    metrics.increment("answers_graded", "fraction", 4)
+    metrics.increment("answers_useful", "fraction", 3)
+
+    report = metrics.routing_report()["fraction"]
+    assert report["web_search_rate"] == 0.25
+    assert report["answer_pass_rate"] == 0.75
+    metrics.reset()
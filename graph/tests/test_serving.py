@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graph import metrics
+from graph.serving import (
+    AdmissionQueue,
+    Coalescer,
+    FrontendPool,
+    ServerBusy,
+    UserBusy,
+    coalescing_key,
+)
+
+
+def test_coalescer_shares_inflight_run() -> None:
+    calls = []
+
+    async def start():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        coalescer = Coalescer()
+        results = await asyncio.gather(
+            *[coalescer.run(coalescing_key("Agent  Memory?"), start) for _ in range(3)]
+        )
+        return results, len(coalescer)
+
+    results, inflight = asyncio.run(main())
+    assert calls == [1]
+    assert [shared for _, shared in results] == [False, True, True]
+    assert inflight == 0
+
+
+def test_admission_queue_rejects_when_full() -> None:
+    async def main():
+        queue = AdmissionQueue(max_concurrent=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with queue.slot():
+                await release.wait()
+
+        running = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert queue.stats()["running"] == 1
+        assert queue.stats()["waiting"] == 1
+
+        with pytest.raises(ServerBusy):
+            async with queue.slot():
+                pass
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert queue.stats()["running"] == 0
+
+    asyncio.run(main())
+
+
+def test_frontend_pool_sheds_load_and_limits_each_user() -> None:
+    metrics.reset()
+    pool = FrontendPool(max_concurrent=1, max_queued=1, max_per_user=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    with ThreadPoolExecutor(max_workers=2) as callers:
+        running = callers.submit(pool.run, "alice", hold)
+        started.wait(5)
+        queued = callers.submit(pool.run, "bob", lambda: "queued answer")
+        while pool.stats()["waiting"] < 1:
+            time.sleep(0.001)
+
+        with pytest.raises(UserBusy):
+            pool.run("alice", lambda: "second question")
+        with pytest.raises(ServerBusy):
+            pool.run("carol", lambda: "over capacity")
+
+        release.set()
+        assert running.result(5)[0] == "answer"
+        answer, waited = queued.result(5)
+
+    assert answer == "queued answer" and waited > 0
+    report = metrics.frontend_report()
+    assert report["admitted"] == 2
+    assert report["rejected_user"] == 1 and report["rejected_busy"] == 1
+    assert pool.stats()["running"] == pool.stats()["waiting"] == 0
+    metrics.reset()
@@ -0,0 +1,31 @@
+from graph import warmup
+from graph.fakes import fake_retriever
+
+
+def test_warm_up_replays_queries_and_records_report(web_search_key) -> None:
+    retriever = fake_retriever()
+
+    warmed, report = warmup.warm_up(
+        retriever, queries=["agent memory", "prompting"], connect=False
+    )
+
+    assert warmed is retriever
+    assert report["queries"] == 2
+    assert "connect_s" not in report
+    assert warmup.last_report == report
+
+
+def test_touch_files_reads_every_file(tmp_path) -> None:
+    (tmp_path / "segments").mkdir()
+    (tmp_path / "segments" / "data_level0.bin").write_bytes(b"\0" * 3000)
+    (tmp_path / "chroma.sqlite3").write_bytes(b"\0" * 500)
+
+    assert warmup.touch_files(str(tmp_path)) == 3500
+
+
+def test_warmup_queries_file_skips_blank_lines(tmp_path) -> None:
+    path = tmp_path / "queries.txt"
+    path.write_text("what is lcel?\n\n  what is an agent?  \n", encoding="utf-8")
+
+    assert warmup.load_warmup_queries(str(path)) == ["what is lcel?", "what is an agent?"]
+    assert warmup.load_warmup_queries("") == warmup.DEFAULT_WARMUP_QUERIES
@@ -0,0 +1,64 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from graph.web_cache import WebCache
+from ingest.chunking import ChunkingConfig
+
+EMBEDDING = DeterministicFakeEmbedding(size=32)
+CHUNKING = ChunkingConfig(splitter="characters", chunk_size=200)
+MEMORY = "Agents keep long-term memory in a vector store."
+RESULTS = [
+    {"url": "https://a.example/memory", "title": "Memory", "content": MEMORY},
+    {"url": "https://b.example/mirror", "title": "Mirror", "content": MEMORY.replace(".", "!")},
+    {"url": "https://c.example/plan", "title": "Plan", "content": "Planning breaks a task into subgoals."},
+]
+
+
+def make_cache(path="", ttl=60.0):
+    return WebCache(EMBEDDING, path=path, ttl=ttl, chunking=CHUNKING)
+
+
+def test_results_are_chunked_deduplicated_and_searchable() -> None:
+    cache = make_cache()
+
+    assert cache.add_results(RESULTS) == 2  # the mirrored page is a near-duplicate
+
+    docs = cache.search(RESULTS[2]["content"], k=1)
+    assert docs[0].metadata["source"] == "https://c.example/plan"
+    assert docs[0].metadata["origin"] == "web" and "relevance_score" in docs[0].metadata
+
+
+def test_refetched_chunks_refresh_their_expiry() -> None:
+    cache = make_cache(ttl=60.0)
+    cache.add_results(RESULTS[:1], now=1000.0)
+
+    assert cache.add_results(RESULTS[:1], now=1030.0) == 0
+
+    assert cache.expire(now=1070.0) == 0
+    assert cache.expire(now=1100.0) == 1
+    assert len(cache) == 0
+
+
+def test_expired_chunks_are_not_returned_and_cache_persists(tmp_path) -> None:
+    path = str(tmp_path / "web_cache.json")
+    cache = make_cache(path, ttl=-1.0)
+    cache.add_results(RESULTS[2:])
+
+    assert cache.search(RESULTS[2]["content"]) == []
+
+    fresh = make_cache(path, ttl=60.0)
+    fresh.add_results(RESULTS[:1])
+    assert len(make_cache(path)) == 1
+
+
+def test_searches_embed_outside_the_lock() -> None:
+    cache = make_cache()
+    cache.add_results(RESULTS[2:])
+
+    class LockCheckingEmbedding(DeterministicFakeEmbedding):
+        def embed_query(self, text):
+            assert not cache._lock.locked(), "the query was embedded under the lock"
+            return super().embed_query(text)
+
+    cache.vectorstore.embedding = LockCheckingEmbedding(size=32)
+
+    assert cache.search(RESULTS[2]["content"], k=1)
@@ -0,0 +1,129 @@
+"""
+Embedding vectors kept next to the chunk ids, so grading with the local
+grader (graph/local_grader.py) doesn't embed the question and every chunk
+again: the question vector is the one retrieval embedded, and chunk
+vectors are read back from the vector store that returned the chunks.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
+
+from graph.chunk_store import chunk_id
+from ingest.compression import CompressedVectorStore
+
+
+class QueryCachingEmbeddings(Embeddings):
+    """
+    Share one embedding model between vector stores and remember the latest
+    query vectors, so a question is embedded once however many stores (shards,
+    the answer lookup, the local grader) need its vector.
+    """
+
+    def __init__(self, embedding: Embeddings, max_queries: int = 256):
+        self.embedding = embedding
+        self.max_queries = max_queries
+        self._queries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding.embed_documents(texts)
+
+    def cached_query(self, text: str) -> Optional[List[float]]:
+        """The vector of a query embedded earlier, without embedding it."""
+        with self._lock:
+            return self._queries.get(text)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                return self._queries[text]
+        vector = self.embedding.embed_query(text)
+        with self._lock:
+            self._queries[text] = vector
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return vector
+
+
+class VectorCache:
+    """Thread-safe, size-bounded map of keys (chunk ids, questions) to vectors."""
+
+    def __init__(self, max_vectors: int):
+        self.max_vectors = max_vectors
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: str, vector: Any) -> None:
+        with self._lock:
+            self._vectors[key] = np.asarray(vector, dtype=np.float32)
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_vectors:
+                self._vectors.popitem(last=False)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            return self._vectors.get(key)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+
+query_vectors = VectorCache(max_vectors=256)
+chunk_vectors = VectorCache(max_vectors=4096)
+
+
+def stored_vectors(vectorstore: VectorStore, documents: List[Document]) -> List[Optional[Any]]:
+    """
+    The vectors a store holds for documents it returned (None where it can't
+    say), read locally instead of embedding the text again.
+    """
+    shards = getattr(vectorstore, "shards", None)
+    if shards is not None:
+        vectors: List[Optional[Any]] = [None] * len(documents)
+        for name, shard in shards.items():
+            rows = [i for i, doc in enumerate(documents) if doc.metadata.get("shard") == name]
+            for i, vector in zip(rows, stored_vectors(shard, [documents[i] for i in rows])):
+                vectors[i] = vector
+        return vectors
+    ids = [doc.id for doc in documents]
+    if isinstance(vectorstore, InMemoryVectorStore):
+        return [vectorstore.store.get(key, {}).get("vector") if key else None for key in ids]
+    if isinstance(vectorstore, CompressedVectorStore):
+        # the full vectors are kept for rescoring
+        return [
+            vectorstore.full[vectorstore.rows[key]]
+            if key in vectorstore.rows and vectorstore.rows[key] < len(vectorstore.full)
+            else None
+            for key in ids
+        ]
+    from langchain_chroma import Chroma
+
+    if isinstance(vectorstore, Chroma) and any(ids):
+        data = vectorstore.get(ids=[key for key in ids if key], include=["embeddings"])
+        found = dict(zip(data["ids"], data["embeddings"]))
+        return [found.get(key) if key else None for key in ids]
+    return [None] * len(documents)
+
+
+def remember_vectors(vectorstore: VectorStore, query: str, documents: List[Document]) -> None:
+    """Keep the query vector retrieval used and the returned chunks' stored vectors."""
+    embedding = vectorstore.embeddings
+    if isinstance(embedding, QueryCachingEmbeddings):
+        vector = embedding.cached_query(query)
+        if vector is not None:
+            query_vectors.put(query, vector)
+    try:
+        vectors = stored_vectors(vectorstore, documents)
+    except Exception as e:
+        print(f"⚠️ Could not read stored vectors, the local grader will embed: {e}")
+        return
+    for doc, vector in zip(documents, vectors):
+        if vector is not None:
+            chunk_vectors.put(chunk_id(doc), vector)
+
@@ -0,0 +1,151 @@
+"""
+Warm start for serving workers.
+
+Before a worker reports ready it opens the index, pulls the index files (or
+memory-mapped vectors) into the page cache, opens the pooled HTTPS
+connections to the model endpoints and replays canned queries through the
+embedding model and the vector store, so the first real requests don't pay
+those cold-start costs.
+"""
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.retrievers import BaseRetriever
+
+from graph.config import FAKE_MODELS, WARMUP_QUERIES_FILE
+
+DEFAULT_WARMUP_QUERIES = ["what is an agent?", "what is prompt engineering?"]
+READ_BLOCK = 1 << 20
+TAVILY_HOST = "api.tavily.com"
+
+# report of the last warm-up in this process, shown by the server's /readyz
+last_report: Dict[str, Any] = {}
+
+
+def load_warmup_queries(path: str = WARMUP_QUERIES_FILE) -> List[str]:
+    """One question per line; the built-in questions when no file is set."""
+    if not path:
+        return DEFAULT_WARMUP_QUERIES
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def touch_files(directory: str) -> int:
+    """Read every file under a directory once so it sits in the page cache."""
+    total = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            with open(os.path.join(dirpath, name), "rb") as f:
+                while block := f.read(READ_BLOCK):
+                    total += len(block)
+    return total
+
+
+def touch_index(vectorstore: Any) -> int:
+    """Fault in the on-disk parts of a vector store; returns bytes touched."""
+    shards = getattr(vectorstore, "shards", None)
+    if shards is not None:
+        return sum(touch_index(shard) for shard in shards.values())
+    full = getattr(vectorstore, "full", None)
+    if full is not None and hasattr(full, "filename"):
+        # memory-mapped full-precision vectors of a compressed local index
+        full.sum()
+        return full.nbytes
+    directory = getattr(vectorstore, "_persist_directory", None)
+    if directory and os.path.isdir(directory):
+        return touch_files(directory)
+    return 0
+
+
+def chat_models() -> List[Any]:
+    from graph.chains import (
+        answer_grader,
+        generation,
+        generation_grader,
+        hallucination_grader,
+        question_condenser,
+        question_rewriter,
+        reflective_generation,
+        retrieval_grader,
+    )
+
+    modules = (
+        answer_grader,
+        generation,
+        generation_grader,
+        hallucination_grader,
+        question_condenser,
+        question_rewriter,
+        reflective_generation,
+        retrieval_grader,
+    )
+    return [module.llm for module in modules]
+
+
+def open_connections() -> int:
+    """
+    Open a pooled connection per distinct model HTTP client with a free
+    models.retrieve call. Returns the number of clients warmed.
+    """
+    warmed = set()
+    for llm in chat_models():
+        client = getattr(llm, "root_client", None)
+        if client is None or id(client._client) in warmed:
+            continue
+        client.models.retrieve(llm.model_name)
+        warmed.add(id(client._client))
+    # the Tavily wrapper opens a connection per call; resolve its host at least
+    socket.getaddrinfo(TAVILY_HOST, 443)
+    return len(warmed)
+
+
+def warm_up(
+    retriever: Optional[BaseRetriever] = None,
+    queries: Optional[List[str]] = None,
+    connect: bool = not FAKE_MODELS,
+) -> Tuple[BaseRetriever, Dict[str, Any]]:
+    """
+    Run the warm-up phases and return the opened retriever and a timing report.
+
+    Failures in the network phases are reported, not raised: a worker that
+    cannot pre-connect is still able to serve.
+    """
+    from graph.nodes.retrieve import get_default_retriever, retrieve_with_scores
+
+    report: Dict[str, Any] = {}
+    started = time.perf_counter()
+    retriever = retriever or get_default_retriever()
+    report["open_index_s"] = round(time.perf_counter() - started, 3)
+
+    phase = time.perf_counter()
+    vectorstore = getattr(retriever, "vectorstore", None)
+    report["touched_bytes"] = touch_index(vectorstore) if vectorstore is not None else 0
+    report["touch_index_s"] = round(time.perf_counter() - phase, 3)
+
+    if connect:
+        phase = time.perf_counter()
+        try:
+            report["connections"] = open_connections()
+        except Exception as e:
+            print(f"⚠️ Warm-up could not pre-connect: {e}")
+            report["connections"] = 0
+        report["connect_s"] = round(time.perf_counter() - phase, 3)
+
+    phase = time.perf_counter()
+    queries = load_warmup_queries() if queries is None else queries
+    replayed = 0
+    for query in queries:
+        try:
+            retrieve_with_scores(query, retriever)
+            replayed += 1
+        except Exception as e:
+            print(f"⚠️ Warm-up query failed: {query!r}: {e}")
+    report["queries"] = replayed
+    report["replay_s"] = round(time.perf_counter() - phase, 3)
+    report["total_s"] = round(time.perf_counter() - started, 3)
+    print(f"🔥 Warm-up done in {report['total_s']}s: {report}")
+    last_report.clear()
+    last_report.update(report)
+    return retriever, report
@@ -0,0 +1,218 @@
+"""
+Write-back cache of web search results.
+
+With SELF_RAG_WEB_CACHE set, the results web_search fetches are chunked,
+deduplicated and embedded into a separate local collection (an
+InMemoryVectorStore persisted to SELF_RAG_WEB_CACHE_PATH) in the
+background, with the source URL and an expiry time in each chunk's
+metadata. retrieve searches it alongside the main index, so a recurring
+question is answered from the cache instead of another web search.
+Expired chunks are never returned and are swept out every
+SELF_RAG_WEB_CACHE_SWEEP seconds.
+
+Searches hold the lock only for the in-memory scan: the query is embedded
+before taking it, and sweeps and writes to disk run on the writer thread
+from a copy of the collection.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumpd
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from graph.config import WEB_CACHE_K, WEB_CACHE_PATH, WEB_CACHE_SWEEP, WEB_CACHE_TTL
+from ingest.chunking import ChunkingConfig, make_splitter
+from ingest.dedup import NearDuplicateFilter
+
+# writes are serialized on one background thread, off the request path
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="web-cache")
+
+
+def cache_chunk_id(url: str, text: str) -> str:
+    """Stable id, so the same chunk fetched again refreshes its entry."""
+    return hashlib.sha1(f"{url}\n{text}".encode("utf-8")).hexdigest()
+
+
+class WebCache:
+    """Local, expiring vector collection of web search result chunks."""
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        path: str = "",
+        ttl: float = WEB_CACHE_TTL,
+        sweep_interval: float = WEB_CACHE_SWEEP,
+        chunking: Optional[ChunkingConfig] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.chunking = chunking or ChunkingConfig()
+        self._splitter = None
+        self._lock = threading.Lock()
+        # serializes writes to disk, separately from the lock searches take
+        self._persist_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.vectorstore = InMemoryVectorStore.load(path, embedding)
+        else:
+            self.vectorstore = InMemoryVectorStore(embedding)
+        self.expire()
+
+    @property
+    def splitter(self):
+        # built on first write, so searching never loads a tokenizer
+        if self._splitter is None:
+            self._splitter = make_splitter(self.chunking)
+        return self._splitter
+
+    def __len__(self) -> int:
+        return len(self.vectorstore.store)
+
+    def _reset_dedup(self) -> None:
+        self.dedup = NearDuplicateFilter()
+        for entry in self.vectorstore.store.values():
+            self.dedup.is_duplicate(Document(page_content=entry["text"]))
+
+    def add_results(self, results: List[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """
+        Chunk and embed Tavily results ({"url", "title", "content"}). Chunks
+        already cached get a new expiry time; near-duplicates of other cached
+        chunks are skipped. Returns the number of chunks embedded.
+        """
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        pages = [
+            Document(
+                page_content=result["content"],
+                metadata={"source": result.get("url", ""), "title": result.get("title", "")},
+            )
+            for result in results
+            if result.get("content")
+        ]
+        chunks = self.splitter.split_documents(pages)
+        new_chunks: Dict[str, Document] = {}
+        with self._lock:
+            for chunk in chunks:
+                key = cache_chunk_id(chunk.metadata["source"], chunk.page_content)
+                entry = self.vectorstore.store.get(key)
+                if entry is not None:
+                    # refresh in place: the text and its embedding are unchanged
+                    entry["metadata"]["expires_at"] = expires_at
+                    continue
+                if key in new_chunks or self.dedup.is_duplicate(chunk):
+                    continue
+                chunk.metadata.update(origin="web", cached_at=now, expires_at=expires_at)
+                new_chunks[key] = chunk
+        # embed without holding the lock, so searches aren't blocked
+        texts = [chunk.page_content for chunk in new_chunks.values()]
+        vectors = self.vectorstore.embedding.embed_documents(texts) if texts else []
+        with self._lock:
+            for (key, chunk), vector in zip(new_chunks.items(), vectors):
+                self.vectorstore.store[key] = {
+                    "id": key,
+                    "vector": vector,
+                    "text": chunk.page_content,
+                    "metadata": chunk.metadata,
+                }
+        self._persist()
+        return len(new_chunks)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop expired chunks; returns how many were removed."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [
+                key
+                for key, entry in self.vectorstore.store.items()
+                if entry["metadata"].get("expires_at", 0) <= now
+            ]
+            if expired:
+                self.vectorstore.delete(expired)
+            self._reset_dedup()
+            self.last_sweep = now
+        if expired:
+            self._persist()
+            print(f"🧹 Expired {len(expired)} web cache chunks")
+        return len(expired)
+
+    def search(
+        self, query: str, k: int = WEB_CACHE_K, filter: Any = None
+    ) -> List[Document]:
+        """Unexpired cached chunks for a query, with relevance_score metadata."""
+        now = time.time()
+        if now - self.last_sweep >= self.sweep_interval:
+            # expired chunks are filtered out below; the sweep runs off the request path
+            self.last_sweep = now
+            _writer.submit(self.expire, now)
+        if not len(self):
+            return []
+
+        def live(doc: Document) -> bool:
+            return doc.metadata.get("expires_at", 0) > now and (filter is None or filter(doc))
+
+        # embedding is a network call: only the in-memory scan holds the lock
+        vector = self.vectorstore.embedding.embed_query(query)
+        with self._lock:
+            results = self.vectorstore.similarity_search_with_score_by_vector(
+                vector, k=k, filter=live
+            )
+        documents = []
+        for doc, score in results:
+            # cosine similarity in [-1, 1] -> relevance in [0, 1]
+            doc.metadata["relevance_score"] = (score + 1) / 2
+            documents.append(doc)
+        return documents
+
+    def write_back(self, results: List[Dict[str, Any]]) -> Future:
+        """Add results on the background writer thread."""
+        return _writer.submit(self._write_back, results)
+
+    def _write_back(self, results: List[Dict[str, Any]]) -> int:
+        try:
+            added = self.add_results(results)
+        except Exception as e:
+            print(f"⚠️ Web cache write-back failed: {e}")
+            return 0
+        print(f"💾 Cached {added} web result chunks ({len(self)} in the web cache)")
+        return added
+
+    def _persist(self) -> None:
+        """
+        Write the collection to disk. Only copying it holds the lock, so
+        searches are not blocked by the JSON dump.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            store = {
+                key: {**entry, "metadata": dict(entry["metadata"])}
+                for key, entry in self.vectorstore.store.items()
+            }
+        with self._persist_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dumpd(store), f)
+            os.replace(tmp, self.path)
+
+
+_web_cache: Optional[WebCache] = None
+_web_cache_lock = threading.Lock()
+
+
+def get_web_cache() -> WebCache:
+    """The process-wide web cache, loaded from WEB_CACHE_PATH on first use."""
+    global _web_cache
+    with _web_cache_lock:
+        if _web_cache is None:
+            from graph.chains.llm import get_embeddings
+
+            _web_cache = WebCache(get_embeddings(), WEB_CACHE_PATH)
+        return _web_cache
@@ -0,0 +1,245 @@
+"""
+Chunking configuration shared by the ingestion CLI and the Streamlit upload
+path, so every index is split the same way.
+
+The default "tokens" splitter is TokenChunker: each document is tokenized
+once, chunk boundaries are picked from structural break points (headings,
+paragraphs and code fences, then lines, then any token) and every chunk
+records its token count and UTF-8 byte offsets in metadata, so prompt
+budgeting at query time never re-tokenizes a chunk.
+
+With parent_chunk_size set, documents are first split into parent chunks
+of that size and each parent into the small child chunks that get embedded
+and graded (ParentChildSplitter); each child records its parent's id, and
+generation is given the parents (see graph/parents.py).
+"""
+import hashlib
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Literal, Tuple, Union
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+from pydantic import BaseModel, Field
+
+HEADING = re.compile(rb"^#{1,6}[ \t]", re.MULTILINE)
+PARAGRAPH_BREAK = re.compile(rb"\n[ \t]*\n")
+CODE_FENCE = re.compile(rb"^[ \t]*(```|~~~)[^\n]*$", re.MULTILINE)
+
+
+class ChunkingConfig(BaseModel):
+    """How documents are split into chunks before embedding."""
+
+    splitter: Literal["tokens", "characters"] = Field(
+        default="tokens",
+        description="Measure chunk_size in tiktoken tokens or in characters",
+    )
+    chunk_size: int = Field(default=250, gt=0)
+    chunk_overlap: int = Field(default=0, ge=0)
+    encoding: str = Field(
+        default="o200k_base", description="tiktoken encoding of the generation model"
+    )
+    parent_chunk_size: int = Field(
+        default=0,
+        ge=0,
+        description="Size of the parent chunks expanded into the generation prompt (0 = none)",
+    )
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str) -> Any:
+    import tiktoken
+
+    return tiktoken.get_encoding(name)
+
+
+def _code_spans(data: bytes) -> List[Tuple[int, int]]:
+    """Byte spans of fenced code blocks (an unclosed fence runs to the end)."""
+    fences = [m.start() for m in CODE_FENCE.finditer(data)]
+    spans = []
+    for i in range(0, len(fences), 2):
+        end = data.find(b"\n", fences[i + 1]) + 1 if i + 1 < len(fences) else len(data)
+        spans.append((fences[i], end or len(data)))
+    return spans
+
+
+def _inside(position: int, spans: List[Tuple[int, int]]) -> bool:
+    return any(start < position < end for start, end in spans)
+
+
+def headings(data: bytes) -> List[Tuple[int, str]]:
+    """(byte offset, title) of the Markdown headings outside code blocks."""
+    code = _code_spans(data)
+    found = []
+    for m in HEADING.finditer(data):
+        if not _inside(m.start(), code):
+            line_end = data.find(b"\n", m.start())
+            line = data[m.start() : line_end if line_end >= 0 else len(data)]
+            found.append((m.start(), line.decode("utf-8", "replace").lstrip("#").strip()))
+    return found
+
+
+class TokenChunker:
+    """
+    Split documents on token boundaries, preferring structural break points.
+
+    A chunk ends at the last break point of the coarsest level that fits in
+    chunk_size tokens: headings, then paragraphs and code fences (blank lines
+    inside code blocks don't count), then line ends, then any token.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 250,
+        chunk_overlap: int = 0,
+        encoding: Union[str, Any] = "o200k_base",
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding = get_encoding(encoding) if isinstance(encoding, str) else encoding
+
+    def _break_levels(self, data: bytes, token_starts: List[int]) -> List[List[int]]:
+        code = _code_spans(data)
+        heading_starts = [start for start, _ in headings(data)]
+        paragraphs = [
+            m.end() for m in PARAGRAPH_BREAK.finditer(data) if not _inside(m.end(), code)
+        ]
+        paragraphs += [b for span in code for b in span]
+        lines = [m.end() for m in re.finditer(rb"\n", data)]
+        # cut before the token containing the break (it may carry leading whitespace)
+        return [
+            sorted({bisect_right(token_starts, b) - 1 for b in positions})
+            for positions in (heading_starts, paragraphs, lines)
+        ]
+
+    def _chunk_end(self, start: int, n_tokens: int, levels: List[List[int]]) -> int:
+        limit = start + self.chunk_size
+        if limit >= n_tokens:
+            return n_tokens
+        for breaks in levels:
+            i = bisect_right(breaks, limit) - 1
+            if i >= 0 and breaks[i] > start:
+                return breaks[i]
+        return limit
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[str, int, int, int]]:
+        """Returns (text, token_count, start_byte, end_byte) per chunk."""
+        data = text.encode("utf-8")
+        tokens = self.encoding.encode(text, disallowed_special=())
+        token_starts, offset = [], 0
+        for token_bytes in self.encoding.decode_tokens_bytes(tokens):
+            token_starts.append(offset)
+            offset += len(token_bytes)
+        n_tokens = len(tokens)
+        token_starts.append(len(data))
+        # byte-level tokens can split a multi-byte character; never cut there
+        char_safe = [b >= len(data) or data[b] & 0xC0 != 0x80 for b in token_starts]
+
+        levels = self._break_levels(data, token_starts)
+        chunks = []
+        start = 0
+        while start < n_tokens:
+            end = self._chunk_end(start, n_tokens, levels)
+            while end < n_tokens and not char_safe[end]:
+                end += 1
+            raw = data[token_starts[start] : token_starts[end]]
+            stripped = raw.strip()
+            if stripped:
+                start_byte = token_starts[start] + len(raw) - len(raw.lstrip())
+                chunks.append(
+                    (
+                        stripped.decode("utf-8"),
+                        end - start,
+                        start_byte,
+                        start_byte + len(stripped),
+                    )
+                )
+            if end >= n_tokens:
+                break
+            next_start = end - self.chunk_overlap if self.chunk_overlap else end
+            while next_start > start + 1 and not char_safe[next_start]:
+                next_start -= 1
+            start = max(next_start, start + 1)
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, *_ in self.split_text_with_offsets(text)]
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            sections = headings(doc.page_content.encode("utf-8"))
+            section_starts = [start for start, _ in sections]
+            for text, token_count, start_byte, end_byte in self.split_text_with_offsets(
+                doc.page_content
+            ):
+                metadata = {
+                    **doc.metadata,
+                    "token_count": token_count,
+                    "start_byte": start_byte,
+                    "end_byte": end_byte,
+                }
+                i = bisect_right(section_starts, start_byte) - 1
+                if i >= 0:
+                    metadata["section"] = sections[i][1]
+                chunks.append(Document(page_content=text, metadata=metadata))
+        return chunks
+
+
+def parent_id(doc: Document) -> str:
+    source = str(doc.metadata.get("source", ""))
+    return hashlib.sha1(f"{source}\0{doc.page_content}".encode("utf-8")).hexdigest()[:16]
+
+
+class ParentChildSplitter:
+    """
+    Split documents into parents, and parents into the children that are
+    embedded. Children get a parent_id and byte offsets into the original
+    document; the parents are kept in `parents` until pop_parents() hands
+    them over to be stored once, however many children share them.
+    """
+
+    def __init__(self, parent_splitter: Any, child_splitter: Any):
+        self.parent_splitter = parent_splitter
+        self.child_splitter = child_splitter
+        self.parents: Dict[str, Document] = {}
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        children = []
+        for parent in self.parent_splitter.split_documents(documents):
+            key = parent_id(parent)
+            self.parents[key] = parent
+            offset = parent.metadata.get("start_byte")
+            for child in self.child_splitter.split_documents([parent]):
+                if offset is not None and "start_byte" in child.metadata:
+                    child.metadata["start_byte"] += offset
+                    child.metadata["end_byte"] += offset
+                child.metadata["parent_id"] = key
+                children.append(child)
+        return children
+
+    def pop_parents(self) -> Dict[str, Document]:
+        parents, self.parents = self.parents, {}
+        return parents
+
+
+def _make_splitter(config: ChunkingConfig, chunk_size: int, chunk_overlap: int) -> Any:
+    if config.splitter == "tokens":
+        return TokenChunker(chunk_size, chunk_overlap, config.encoding)
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def make_splitter(
+    config: ChunkingConfig,
+) -> Union[TokenChunker, TextSplitter, ParentChildSplitter]:
+    child_splitter = _make_splitter(config, config.chunk_size, config.chunk_overlap)
+    if not config.parent_chunk_size:
+        return child_splitter
+    if config.parent_chunk_size <= config.chunk_size:
+        raise ValueError("parent_chunk_size must be larger than chunk_size")
+    return ParentChildSplitter(
+        _make_splitter(config, config.parent_chunk_size, 0), child_splitter
+    )
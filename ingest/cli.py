@@ -0,0 +1,93 @@
+"""
+Build a versioned index snapshot from a source manifest.
+
+    uv run python -m ingest manifests/lilianweng.json --backend chroma
+    uv run python -m ingest manifests/lilianweng.json --backend endee --name rag_endee
+    uv run python -m ingest manifests/docs.json --backend local --chunk-size 500 --resume
+    uv run python -m ingest manifests/lilianweng.json --precompute-questions 3
+
+Serving processes open the published snapshot read-only (see ingest.snapshot).
+"""
+import argparse
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from ingest.job import SOURCES_PER_GROUP, run_ingestion_job
+from ingest.manifest import load_manifest
+from ingest.snapshot import BACKENDS, INDEX_DIR
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest a source manifest into an index snapshot")
+    parser.add_argument("manifest", help="JSON manifest of URLs, directories and globs")
+    parser.add_argument("--backend", choices=BACKENDS, default="chroma")
+    parser.add_argument("--name", help="index name (defaults to the manifest's)")
+    parser.add_argument("--index-dir", default=INDEX_DIR, help="where snapshots are written")
+    parser.add_argument("--splitter", choices=("tokens", "characters"))
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--chunk-overlap", type=int)
+    parser.add_argument("--no-dedup", action="store_true", help="embed near-duplicate chunks too")
+    parser.add_argument("--dedup-threshold", type=float)
+    parser.add_argument("--quantization", choices=("none", "int8"))
+    parser.add_argument("--dimension", type=int, help="reduce embeddings to this dimension")
+    parser.add_argument("--reduction", choices=("truncate", "pca"))
+    parser.add_argument("--rescore-factor", type=int)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="finish the newest unpublished snapshot of this index instead of starting over",
+    )
+    parser.add_argument("--sources-per-group", type=int, default=SOURCES_PER_GROUP)
+    parser.add_argument(
+        "--precompute-questions",
+        type=int,
+        default=0,
+        help="after publishing, precompute verified answers to this many likely "
+        "questions per section (see ingest.precompute)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    manifest = load_manifest(args.manifest)
+    if args.name:
+        manifest.name = args.name
+    overrides = {
+        "splitter": args.splitter,
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+    }
+    manifest.chunking = manifest.chunking.model_copy(
+        update={k: v for k, v in overrides.items() if v is not None}
+    )
+    overrides = {
+        "quantization": args.quantization,
+        "dimension": args.dimension,
+        "reduction": args.reduction,
+        "rescore_factor": args.rescore_factor,
+    }
+    manifest.compression = manifest.compression.model_copy(
+        update={k: v for k, v in overrides.items() if v is not None}
+    )
+    if args.no_dedup:
+        manifest.dedup.enabled = False
+    if args.dedup_threshold is not None:
+        manifest.dedup.threshold = args.dedup_threshold
+
+    snapshot = run_ingestion_job(
+        manifest,
+        args.backend,
+        root=args.index_dir,
+        resume=args.resume,
+        sources_per_group=args.sources_per_group,
+    )
+    if snapshot.status != "published":
+        return 1
+    if args.precompute_questions:
+        from ingest.precompute import precompute_answers
+
+        precompute_answers(snapshot, args.precompute_questions, root=args.index_dir)
+    return 0
@@ -0,0 +1,301 @@
+"""
+Compressed embedding storage for the local and Chroma backends.
+
+Vectors are reduced to `dimension` (Matryoshka-style truncation or PCA) and,
+for the local backend, scalar-quantized to int8 with one scale per vector.
+Searches rank every chunk with the compact codes, then rescore the top
+`k * rescore_factor` candidates exactly against the full-precision vectors,
+which stay on disk (memory-mapped) and are only read for those candidates.
+
+Chroma keeps float32 vectors in its own HNSW index, so it only supports
+truncation, applied through TruncatedEmbeddings on both ingest and query.
+"""
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from pydantic import BaseModel, Field
+
+
+class CompressionConfig(BaseModel):
+    quantization: Literal["none", "int8"] = "none"
+    dimension: Optional[int] = Field(default=None, gt=0, description="Reduced dimension")
+    reduction: Literal["truncate", "pca"] = Field(
+        default="truncate",
+        description="truncate suits Matryoshka-trained models (OpenAI text-embedding-3)",
+    )
+    rescore_factor: int = Field(
+        default=4, ge=0, description="Candidates rescored at full precision per result (0 = off)"
+    )
+
+    @property
+    def enabled(self) -> bool:
+        return self.quantization != "none" or self.dimension is not None
+
+    def describe(self) -> str:
+        parts = [self.quantization] if self.quantization != "none" else []
+        if self.dimension:
+            parts.append(f"{self.reduction}{self.dimension}")
+        return "+".join(parts) or "float32"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class TruncatedEmbeddings(Embeddings):
+    """Keep the first `dimension` components of another model's embeddings."""
+
+    def __init__(self, embedding: Embeddings, dimension: int):
+        self.embedding = embedding
+        self.dimension = dimension
+
+    def _truncate(self, vectors: List[List[float]]) -> List[List[float]]:
+        return _normalize(np.asarray(vectors, dtype=np.float32)[:, : self.dimension]).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._truncate(self.embedding.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._truncate([self.embedding.embed_query(text)])[0]
+
+
+class EmbeddingCodec:
+    """Reduction (truncate / PCA) followed by optional per-vector int8 quantization."""
+
+    def __init__(self, config: CompressionConfig):
+        self.config = config
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+
+    def fit(self, full: np.ndarray) -> None:
+        if self.config.reduction == "pca" and self.config.dimension:
+            self.mean = full.mean(axis=0)
+            _, _, vt = np.linalg.svd(full - self.mean, full_matrices=False)
+            # fewer vectors than dimensions caps the number of components
+            self.components = vt[: self.config.dimension].astype(np.float32)
+
+    def reduce(self, full: np.ndarray) -> np.ndarray:
+        if self.components is not None:
+            reduced = (full - self.mean) @ self.components.T
+        elif self.config.dimension:
+            reduced = full[:, : self.config.dimension]
+        else:
+            reduced = full
+        return _normalize(reduced.astype(np.float32))
+
+    def encode(self, full: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (codes, scales); scales are all ones without quantization."""
+        reduced = self.reduce(full)
+        if self.config.quantization != "int8":
+            return reduced, np.ones(len(reduced), dtype=np.float32)
+        scales = np.abs(reduced).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.round(reduced / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def save(self, path: str) -> None:
+        if self.components is not None:
+            np.savez(path, mean=self.mean, components=self.components)
+
+    def load(self, path: str) -> None:
+        if os.path.exists(path):
+            data = np.load(path)
+            self.mean, self.components = data["mean"], data["components"]
+
+
+class CompressedVectorStore(VectorStore):
+    """
+    In-memory store of compact codes with full-precision rescoring.
+
+    During ingestion full vectors are kept in memory and the codes are built
+    (PCA fitted) on first search or dump. A loaded store holds only the codes
+    in memory and memory-maps the full vectors.
+    """
+
+    def __init__(self, embedding: Embeddings, config: CompressionConfig):
+        self.embedding = embedding
+        self.config = config
+        self.codec = EmbeddingCodec(config)
+        self.documents: List[Document] = []
+        self.rows: Dict[str, int] = {}
+        # full-precision vectors: built rows plus rows added since the last build
+        self.full: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(len(self.documents) + i) for i in range(len(texts))]
+        vectors = _normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+        for text, metadata, id_, vector in zip(texts, metadatas, ids, vectors):
+            doc = Document(page_content=text, metadata=metadata, id=id_)
+            row = self.rows.get(id_)
+            if row is None:
+                self.rows[id_] = len(self.documents)
+                self.documents.append(doc)
+                self._pending.append(vector)
+                continue
+            self.documents[row] = doc
+            if row >= len(self.full):
+                self._pending[row - len(self.full)] = vector
+            else:
+                if not self.full.flags.writeable:
+                    self.full = np.array(self.full)
+                self.full[row] = vector
+        self.codes = None
+        return ids
+
+    def build(self) -> None:
+        """Append pending vectors and (re)build the codes if anything changed."""
+        if self._pending:
+            rows = np.vstack(self._pending)
+            self.full = np.vstack([self.full, rows]) if len(self.full) else rows
+            self._pending = []
+        if self.codes is None and len(self.documents):
+            full = np.asarray(self.full, dtype=np.float32)
+            self.codec.fit(full)
+            self.codes, self.scales = self.codec.encode(full)
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        self.build()
+        reduced = self.codec.reduce(query[None, :])[0]
+        return (self.codes.astype(np.float32) @ reduced) * self.scales
+
+    def search_vector(
+        self,
+        query: np.ndarray,
+        k: int,
+        rescore: bool = True,
+        filter: Optional[Callable[[Document], bool]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Row indices and scores of the best k chunks for a normalized query vector."""
+        if not self.documents:
+            return []
+        scores = self.approximate_scores(query)
+        if filter is not None:
+            allowed = np.fromiter((filter(d) for d in self.documents), dtype=bool)
+            scores[~allowed] = -np.inf
+            k = min(k, int(allowed.sum()))
+        if not rescore or not self.config.rescore_factor:
+            top = np.argsort(-scores)[:k]
+            return [(int(i), float(scores[i])) for i in top]
+        # sorted rows keep memory-mapped reads sequential
+        rows = np.sort(np.argsort(-scores)[: k * self.config.rescore_factor])
+        rows = rows[np.isfinite(scores[rows])]
+        exact = np.asarray(self.full[rows]) @ query
+        return [(int(rows[i]), float(exact[i])) for i in np.argsort(-exact)[:k]]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        vector = _normalize(np.asarray(self.embedding.embed_query(query), dtype=np.float32))
+        rows = self.search_vector(vector, k, filter=kwargs.get("filter"))
+        return [(self.documents[i], score) for i, score in rows]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # cosine similarity in [-1, 1] -> relevance in [0, 1]
+        return lambda score: (score + 1) / 2
+
+    def memory_bytes(self) -> int:
+        """Resident size of the searchable codes."""
+        self.build()
+        return 0 if self.codes is None else self.codes.nbytes + self.scales.nbytes
+
+    def dump(self, path: str) -> None:
+        self.build()
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "full.npy"), np.asarray(self.full, dtype=np.float32))
+        if self.codes is not None:
+            np.save(os.path.join(path, "codes.npy"), self.codes)
+            np.save(os.path.join(path, "scales.npy"), self.scales)
+        self.codec.save(os.path.join(path, "codec.npz"))
+        with open(os.path.join(path, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    {"id": d.id, "page_content": d.page_content, "metadata": d.metadata}
+                    for d in self.documents
+                ],
+                f,
+            )
+
+    @classmethod
+    def load(
+        cls, path: str, embedding: Embeddings, config: CompressionConfig
+    ) -> "CompressedVectorStore":
+        store = cls(embedding, config)
+        with open(os.path.join(path, "documents.json"), encoding="utf-8") as f:
+            store.documents = [Document(**d) for d in json.load(f)]
+        store.rows = {d.id: i for i, d in enumerate(store.documents)}
+        if store.documents:
+            store.full = np.load(os.path.join(path, "full.npy"), mmap_mode="r")
+            store.codes = np.load(os.path.join(path, "codes.npy"))
+            store.scales = np.load(os.path.join(path, "scales.npy"))
+            store.codec.load(os.path.join(path, "codec.npz"))
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        config: Optional[CompressionConfig] = None,
+        **kwargs: Any,
+    ) -> "CompressedVectorStore":
+        store = cls(embedding, config or CompressionConfig())
+        store.add_texts(texts, metadatas, **kwargs)
+        return store
+
+
+def recall_at_k(
+    store: CompressedVectorStore, k: int = 10, queries: int = 100, seed: int = 0
+) -> Dict[str, float]:
+    """
+    Recall@k of the compressed search against exact full-precision search,
+    using stored chunks as queries (each query's own chunk is excluded).
+    """
+    n = len(store.documents)
+    if n <= 1:
+        return {"queries": 0}
+    store.build()
+    full = np.asarray(store.full, dtype=np.float32)
+    sample = np.random.default_rng(seed).choice(n, size=min(queries, n), replace=False)
+    hits = {"rescored": 0, "approximate": 0}
+    total = 0
+    for q in sample:
+        exact = full @ full[q]
+        exact[q] = -np.inf
+        truth = set(np.argsort(-exact)[: min(k, n - 1)].tolist())
+        total += len(truth)
+        for mode, rescore in (("rescored", True), ("approximate", False)):
+            found = [i for i, _ in store.search_vector(full[q], k + 1, rescore) if i != q][:k]
+            hits[mode] += len(truth.intersection(found))
+    return {
+        "queries": len(sample),
+        f"recall@{k}": hits["rescored"] / total,
+        f"recall@{k}_without_rescoring": hits["approximate"] / total,
+        "compressed_bytes": store.memory_bytes(),
+        "float32_bytes": full.nbytes,
+    }
@@ -0,0 +1,113 @@
+"""
+Near-duplicate chunk detection with MinHash + LSH.
+
+Boilerplate (navigation, headers, footers, repeated disclaimers) produces
+chunks that are almost identical across pages. Each chunk gets a MinHash
+signature over word shingles; LSH banding finds earlier chunks that may be
+similar, and a chunk whose estimated Jaccard similarity to one of them
+reaches the threshold is dropped before it is embedded.
+"""
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from pydantic import BaseModel, Field
+
+MERSENNE_PRIME = (1 << 31) - 1
+WORD = re.compile(r"\w+")
+
+
+class DedupConfig(BaseModel):
+    enabled: bool = True
+    threshold: float = Field(
+        default=0.85, gt=0, le=1, description="Estimated Jaccard similarity counted as duplicate"
+    )
+    num_perm: int = Field(default=64, gt=0, description="MinHash signature length")
+    bands: int = Field(default=16, gt=0, description="LSH bands; must divide num_perm")
+    shingle_size: int = Field(default=3, gt=0, description="Words per shingle")
+
+
+class NearDuplicateFilter:
+    """Remembers every chunk it has seen and flags near-duplicates of them."""
+
+    def __init__(self, config: Optional[DedupConfig] = None, seed: int = 1):
+        self.config = config or DedupConfig()
+        if self.config.num_perm % self.config.bands:
+            raise ValueError("bands must divide num_perm")
+        self.rows = self.config.num_perm // self.config.bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, self.config.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, self.config.num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._signatures: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        self.seen = 0
+        self.skipped = 0
+        self.skipped_tokens = 0
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = WORD.findall(text.lower())
+        k = self.config.shingle_size
+        grams = {" ".join(words[i : i + k]) for i in range(max(1, len(words) - k + 1))}
+        grams.discard("")
+        return np.array(
+            [zlib.crc32(g.encode()) % MERSENNE_PRIME for g in grams], dtype=np.uint64
+        )
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashes = self.shingles(text)
+        if hashes.size == 0:
+            return None
+        # a*h + b stays below 2**63 for 31-bit a, b and h
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME).min(
+            axis=1
+        )
+
+    def _bands(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.config.bands)
+        ]
+
+    def is_duplicate(self, doc: Document) -> bool:
+        """Check a chunk against all earlier ones; new chunks are remembered."""
+        signature = self.signature(doc.page_content)
+        with self._lock:
+            self.seen += 1
+            if signature is None:
+                return False
+            keys = self._bands(signature)
+            candidates = {i for key in keys for i in self._buckets.get(key, ())}
+            for i in candidates:
+                if np.mean(self._signatures[i] == signature) >= self.config.threshold:
+                    self.skipped += 1
+                    self.skipped_tokens += doc.metadata.get("token_count", 0)
+                    return True
+            self._add(signature, keys)
+            return False
+
+    def _add(self, signature: np.ndarray, keys: List[Tuple[int, bytes]]) -> None:
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for key in keys:
+            self._buckets[key].append(index)
+
+    def remember(self, docs: Iterable[Document]) -> None:
+        """Add chunks indexed earlier (a resumed job) without counting them as seen."""
+        for doc in docs:
+            signature = self.signature(doc.page_content)
+            if signature is not None:
+                with self._lock:
+                    self._add(signature, self._bands(signature))
+
+    def report(self) -> str:
+        share = self.skipped / self.seen if self.seen else 0.0
+        tokens = f" (~{self.skipped_tokens} tokens)" if self.skipped_tokens else ""
+        return (
+            f"🧹 Skipped {self.skipped} near-duplicate chunks of {self.seen} "
+            f"({share:.0%}), saving {self.skipped} embeddings{tokens}"
+        )
@@ -0,0 +1,243 @@
+"""
+Resumable ingestion job: sources are loaded, split and embedded a group at a
+time, and the snapshot records which sources are done after each group. A job
+that crashes or has failing sources is picked up again with resume=True;
+chunks get stable ids, so re-embedding part of a group upserts instead of
+duplicating. A resumed job lists the chunks already stored: chunk_count
+counts distinct ids, and the near-duplicate filter starts out knowing the
+chunks of the completed sources.
+"""
+import hashlib
+import time
+from typing import Callable, List, Optional, Set
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from ingest.chunking import ParentChildSplitter, make_splitter
+from ingest.compression import CompressedVectorStore, recall_at_k
+from ingest.dedup import NearDuplicateFilter
+from ingest.loaders import FETCH_WORKERS, HTTP_CACHE_DIR, iter_sources
+from ingest.manifest import SourceManifest, manifest_sources
+from ingest.pipeline import EMBED_BATCH_SIZE, run_pipeline
+from ingest.snapshot import (
+    INDEX_DIR,
+    Backend,
+    Snapshot,
+    check_compression,
+    new_snapshot,
+    open_vectorstore,
+    persist_vectorstore,
+    publish_snapshot,
+    save_parents,
+    save_snapshot,
+    snapshot_chunks,
+    unfinished_snapshot,
+)
+
+SOURCES_PER_GROUP = 16
+
+
+def stable_chunk_id(doc: Document) -> str:
+    source = str(doc.metadata.get("source", ""))
+    return hashlib.sha1(f"{source}\0{doc.page_content}".encode()).hexdigest()
+
+
+CHUNK_METADATA = (
+    "source",
+    "source_hash",
+    "page",
+    "section",
+    "ingested_at",
+    "token_count",
+    "start_byte",
+    "end_byte",
+    "parent_id",
+)
+
+
+def stamp_ingested(doc: Document) -> Document:
+    doc.metadata["ingested_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return doc
+
+
+def trim_metadata(doc: Document) -> Document:
+    """Endee payloads stay small: keep the filterable chunk fields, strings truncated."""
+    doc.metadata = {
+        key: value[:200] if isinstance(value, str) else value
+        for key, value in doc.metadata.items()
+        if key in CHUNK_METADATA
+    }
+    return doc
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def print_compression_report(snapshot: Snapshot) -> None:
+    report = snapshot.compression_report
+    if not report.get("queries"):
+        return
+    recall = next(key for key in report if key.startswith("recall@") and "without" not in key)
+    print(
+        f"📏 {snapshot.compression.describe()}: {recall} {report[recall]:.3f} "
+        f"({report[recall + '_without_rescoring']:.3f} without rescoring) over "
+        f"{report['queries']} queries; vectors {report['compressed_bytes'] / 1e6:.1f} MB "
+        f"in memory vs {report['float32_bytes'] / 1e6:.1f} MB float32"
+    )
+
+
+def run_ingestion_job(
+    manifest: SourceManifest,
+    backend: Backend,
+    root: str = INDEX_DIR,
+    resume: bool = False,
+    sources_per_group: int = SOURCES_PER_GROUP,
+    batch_size: int = EMBED_BATCH_SIZE,
+    fetch_workers: int = FETCH_WORKERS,
+    http_cache_dir: Optional[str] = HTTP_CACHE_DIR,
+    prepare: Optional[Callable[[Document], Document]] = None,
+    embedding: Optional[Embeddings] = None,
+) -> Snapshot:
+    """
+    Build (or finish) a snapshot of the manifest's sources and publish it.
+
+    The snapshot is only published when every source loaded; otherwise it is
+    left unpublished with its failed sources recorded, and the previous
+    snapshot keeps being served.
+    """
+    check_compression(backend, manifest.compression)
+    snapshot = unfinished_snapshot(manifest.name, backend, root) if resume else None
+    resumed = snapshot is not None
+    if resumed:
+        print(
+            f"🔁 Resuming {snapshot.name}@{snapshot.version}: "
+            f"{len(snapshot.completed_sources)}/{len(snapshot.sources)} sources done"
+        )
+    else:
+        if resume:
+            print("ℹ️ No unfinished snapshot to resume, starting a new one")
+        snapshot = new_snapshot(
+            manifest.name,
+            backend,
+            manifest.chunking,
+            manifest_sources(manifest),
+            root,
+            dedup=manifest.dedup,
+            compression=manifest.compression,
+        )
+        print(f"🆕 Snapshot {snapshot.name}@{snapshot.version} ({backend})")
+
+    if backend == "endee" and snapshot.dimension is None:
+        from graph.chains.llm import get_embeddings
+
+        embedding = embedding or get_embeddings()
+        snapshot.dimension = len(embedding.embed_query("dimension"))
+        save_snapshot(snapshot)
+
+    trim = prepare or (trim_metadata if backend == "endee" else None)
+
+    def stamp(chunk: Document) -> Document:
+        stamp_ingested(chunk)
+        return trim(chunk) if trim else chunk
+
+    vectorstore = open_vectorstore(snapshot, embedding)
+    splitter = make_splitter(snapshot.chunking)
+    # one filter for the whole run, so boilerplate repeated across groups is caught
+    dedup = NearDuplicateFilter(snapshot.dedup) if snapshot.dedup.enabled else None
+    # distinct ids of the stored chunks; None when a resumed store can't be listed
+    chunk_ids: Optional[Set[str]] = set()
+    if resumed:
+        try:
+            stored = snapshot_chunks(vectorstore)
+        except NotImplementedError:
+            print(
+                f"⚠️ The {backend} index can't be listed: chunks re-added on resume are "
+                f"counted again and near-duplicates of earlier chunks are not caught"
+            )
+            chunk_ids = None
+        else:
+            chunk_ids = {stable_chunk_id(doc) for doc in stored}
+            if dedup:
+                # the unfinished group's chunks are re-added (upserted), not skipped
+                completed = set(snapshot.completed_sources)
+                dedup.remember(d for d in stored if d.metadata.get("source") in completed)
+
+    def chunk_id(chunk: Document) -> str:
+        key = stable_chunk_id(chunk)
+        if chunk_ids is not None:
+            chunk_ids.add(key)
+        return key
+    pending = snapshot.pending_sources
+    snapshot.failed_sources = []
+    total = len(snapshot.sources)
+    started = time.perf_counter()
+    chunks_this_run = 0
+
+    for i in range(0, len(pending), sources_per_group):
+        group = pending[i : i + sources_per_group]
+        failed: List[str] = []
+
+        def record_error(source: str, error: Exception) -> None:
+            print(f"  ❌ Error loading {source}: {error}")
+            failed.append(source)
+
+        documents = iter_sources(
+            urls=[s for s in group if is_url(s)],
+            files=[s for s in group if not is_url(s)],
+            fetch_workers=fetch_workers,
+            http_cache_dir=http_cache_dir,
+            on_error=record_error,
+        )
+        skipped_before = dedup.skipped if dedup else 0
+        added = run_pipeline(
+            documents,
+            splitter,
+            vectorstore,
+            batch_size,
+            prepare=stamp,
+            id_fn=chunk_id,
+            dedup=dedup,
+        )
+        persist_vectorstore(snapshot, vectorstore)
+        if isinstance(splitter, ParentChildSplitter):
+            snapshot.parent_count = save_parents(snapshot, splitter.pop_parents())
+
+        snapshot.completed_sources += [s for s in group if s not in failed]
+        snapshot.failed_sources += failed
+        if chunk_ids is not None:
+            snapshot.chunk_count = len(chunk_ids)
+        else:
+            snapshot.chunk_count += added
+        if dedup:
+            snapshot.duplicates_skipped += dedup.skipped - skipped_before
+        save_snapshot(snapshot)
+
+        chunks_this_run += added
+        elapsed = time.perf_counter() - started
+        print(
+            f"📈 {len(snapshot.completed_sources)}/{total} sources, "
+            f"{snapshot.chunk_count} chunks, {chunks_this_run / elapsed:.1f} chunks/s, "
+            f"{(i + len(group)) / elapsed:.2f} sources/s"
+        )
+
+    if dedup:
+        print(dedup.report())
+    if snapshot.failed_sources:
+        print(
+            f"⚠️ {len(snapshot.failed_sources)} source(s) failed; snapshot "
+            f"{snapshot.version} is not published. Re-run with --resume to retry them."
+        )
+        return snapshot
+
+    if isinstance(vectorstore, CompressedVectorStore):
+        snapshot.compression_report = recall_at_k(vectorstore)
+        print_compression_report(snapshot)
+    publish_snapshot(snapshot, root)
+    parents = f" ({snapshot.parent_count} parents)" if snapshot.parent_count else ""
+    print(
+        f"✅ Published {snapshot.name}@{snapshot.version}: {snapshot.chunk_count} chunks{parents} "
+        f"from {total} sources in {time.perf_counter() - started:.1f}s"
+    )
+    return snapshot
@@ -0,0 +1,199 @@
+"""
+Concurrent source loading for ingestion: URLs are fetched in a thread pool
+over one pooled HTTP session with conditional requests, and PDF/DOCX files
+are parsed in a process pool. Documents are yielded as each source finishes.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from requests.adapters import HTTPAdapter
+
+HTTP_CACHE_DIR = "./.ingest_cache/http"
+FETCH_WORKERS = 8
+PARSE_WORKERS = os.cpu_count() or 2
+SUPPORTED_FILE_TYPES = (".pdf", ".docx", ".md", ".txt")
+
+
+def make_session(pool_size: int = FETCH_WORKERS) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = os.getenv("USER_AGENT", "self-rag-ingest")
+    return session
+
+
+class HttpCache:
+    """
+    On-disk cache of fetched pages with their ETag / Last-Modified headers, so
+    unchanged pages are revalidated with a conditional request (304) instead
+    of being downloaded again.
+    """
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.index: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + ".html")
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        if not os.path.exists(self._body_path(url)):
+            # a 304 would leave nothing to read
+            return {}
+        entry = self.index.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, url: str) -> str:
+        with open(self._body_path(url), encoding="utf-8") as f:
+            return f.read()
+
+    def write(self, url: str, response: requests.Response) -> None:
+        path = self._body_path(url)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(response.text)
+        os.replace(f"{path}.tmp", path)
+        with self._lock:
+            self.index[url] = {
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+            }
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def html_to_document(html: str, url: str) -> Document:
+    """Same text and metadata WebBaseLoader produces for a page."""
+    soup = BeautifulSoup(html, "html.parser")
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html_tag := soup.find("html"):
+        metadata["language"] = html_tag.get("lang", "No language found.")
+    return Document(page_content=soup.get_text(), metadata=metadata)
+
+
+def fetch_url(url: str, session: requests.Session, cache: Optional[HttpCache] = None) -> List[Document]:
+    headers = cache.conditional_headers(url) if cache else {}
+    response = session.get(url, headers=headers, timeout=30)
+    html = None
+    if response.status_code == 304 and cache:
+        try:
+            html = cache.read(url)
+            print(f"  ♻️ Not modified: {url}")
+        except OSError as e:
+            # the cached body went away after the request was sent
+            print(f"  ⚠️ Cached copy unreadable ({e}), fetching again: {url}")
+            response = session.get(url, timeout=30)
+    if html is None:
+        response.raise_for_status()
+        html = response.text
+        if cache:
+            cache.write(url, response)
+        print(f"  🌐 Fetched: {url}")
+    doc = html_to_document(html, url)
+    doc.metadata["source_hash"] = content_hash(html.encode("utf-8"))
+    return [doc]
+
+
+def parse_file(path: str) -> List[Document]:
+    """Parse a PDF, DOCX, Markdown or text file; runs in a worker process."""
+    from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader, TextLoader
+
+    if path.lower().endswith(".pdf"):
+        documents = PyPDFLoader(path).load()
+    elif path.lower().endswith(".docx"):
+        documents = Docx2txtLoader(path).load()
+    elif path.lower().endswith((".md", ".txt")):
+        documents = TextLoader(path, encoding="utf-8").load()
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+    with open(path, "rb") as f:
+        file_hash = content_hash(f.read())
+    for doc in documents:
+        doc.metadata["source_hash"] = file_hash
+    return documents
+
+
+def _print_error(source: str, error: Exception) -> None:
+    print(f"  ❌ Error loading {source}: {error}")
+
+
+def iter_sources(
+    urls: Iterable[str] = (),
+    files: Iterable[str] = (),
+    fetch_workers: int = FETCH_WORKERS,
+    parse_workers: int = PARSE_WORKERS,
+    http_cache_dir: Optional[str] = HTTP_CACHE_DIR,
+    on_error: Callable[[str, Exception], None] = _print_error,
+) -> Iterator[Document]:
+    """
+    Load URLs and files concurrently, yielding documents as each source completes.
+
+    Args:
+        urls: web pages to fetch
+        files: PDF / DOCX / Markdown / text paths to parse
+        fetch_workers: threads (and pooled connections) for fetching
+        parse_workers: processes for parsing files
+        http_cache_dir: where fetched pages are cached and revalidated with
+            ETag / Last-Modified (None disables the cache)
+        on_error: called with (source, exception) for sources that fail to load
+    """
+    urls, files = list(urls), list(files)
+    futures: Dict[Future, str] = {}
+    session = make_session(fetch_workers) if urls else None
+    cache = HttpCache(http_cache_dir) if urls and http_cache_dir else None
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers) if urls else None
+    # spawn, not fork: callers (Streamlit, the embedder thread) are multi-threaded
+    parse_pool = (
+        ProcessPoolExecutor(
+            max_workers=min(parse_workers, len(files)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        if files
+        else None
+    )
+    try:
+        for url in urls:
+            futures[fetch_pool.submit(fetch_url, url, session, cache)] = url
+        for path in files:
+            futures[parse_pool.submit(parse_file, path)] = path
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                documents = future.result()
+            except Exception as e:
+                on_error(source, e)
+                continue
+            yield from documents
+    finally:
+        for pool in (fetch_pool, parse_pool):
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        if session is not None:
+            session.close()
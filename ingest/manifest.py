@@ -0,0 +1,65 @@
+"""
+Source manifests: a JSON file naming the index, the sources that go into it
+and how they are chunked.
+
+    {
+        "name": "rag-chroma",
+        "urls": ["https://lilianweng.github.io/posts/2023-06-23-agent/"],
+        "paths": ["docs/", "papers/**/*.pdf"],
+        "chunking": {"splitter": "tokens", "chunk_size": 250, "chunk_overlap": 0},
+        "dedup": {"enabled": true, "threshold": 0.85},
+        "compression": {"quantization": "int8", "dimension": 256, "reduction": "pca"}
+    }
+
+Paths may be files, directories (searched recursively) or glob patterns,
+relative to the manifest file. Only SUPPORTED_FILE_TYPES are picked up.
+"""
+import glob
+import json
+import os
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from ingest.chunking import ChunkingConfig
+from ingest.compression import CompressionConfig
+from ingest.dedup import DedupConfig
+from ingest.loaders import SUPPORTED_FILE_TYPES
+
+
+class SourceManifest(BaseModel):
+    name: str = Field(description="Index name; snapshots are versioned under it")
+    urls: List[str] = Field(default_factory=list)
+    paths: List[str] = Field(default_factory=list)
+    chunking: ChunkingConfig = Field(default_factory=ChunkingConfig)
+    dedup: DedupConfig = Field(default_factory=DedupConfig)
+    compression: CompressionConfig = Field(default_factory=CompressionConfig)
+
+
+def load_manifest(path: str) -> SourceManifest:
+    with open(path, encoding="utf-8") as f:
+        manifest = SourceManifest.model_validate(json.load(f))
+    base = os.path.dirname(os.path.abspath(path))
+    manifest.paths = [os.path.join(base, p) for p in manifest.paths]
+    return manifest
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    """Resolve files, directories and glob patterns to a sorted list of supported files."""
+    files = set()
+    for pattern in paths:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        if not matches:
+            print(f"⚠️ No files match {pattern}")
+        for match in matches:
+            if os.path.isfile(match) and match.lower().endswith(SUPPORTED_FILE_TYPES):
+                files.add(os.path.abspath(match))
+    return sorted(files)
+
+
+def manifest_sources(manifest: SourceManifest) -> List[str]:
+    """Every URL and file of a manifest, in a stable order."""
+    return list(dict.fromkeys(manifest.urls)) + expand_paths(manifest.paths)
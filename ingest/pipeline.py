@@ -0,0 +1,84 @@
+"""
+Split documents as they arrive from the loaders and embed them in batches on
+a background thread, so fetching/parsing, splitting and embedding overlap.
+"""
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from ingest.dedup import NearDuplicateFilter
+
+EMBED_BATCH_SIZE = 64
+
+_DONE = object()
+
+
+def run_pipeline(
+    documents: Iterable[Document],
+    splitter: Any,
+    vectorstore: VectorStore,
+    batch_size: int = EMBED_BATCH_SIZE,
+    prepare: Optional[Callable[[Document], Document]] = None,
+    id_fn: Optional[Callable[[Document], str]] = None,
+    dedup: Optional[NearDuplicateFilter] = None,
+) -> int:
+    """
+    Args:
+        documents: loaded documents, e.g. from ingest.loaders.iter_sources
+        splitter: text splitter with split_documents()
+        vectorstore: store the chunks are embedded into
+        batch_size: chunks per add_documents call
+        prepare: optional per-chunk hook, e.g. to trim metadata
+        id_fn: optional chunk id function; stable ids make re-adding the same
+            chunks (a resumed job) an upsert instead of a duplicate
+        dedup: optional near-duplicate filter; duplicates are never embedded
+
+    Returns:
+        Number of chunks added
+    """
+    chunks: "queue.Queue[Any]" = queue.Queue(maxsize=batch_size * 4)
+    errors: List[BaseException] = []
+    added = 0
+
+    def embed() -> None:
+        nonlocal added
+        batch: List[Document] = []
+        while True:
+            item = chunks.get()
+            if item is not _DONE:
+                batch.append(item)
+            if batch and (item is _DONE or len(batch) >= batch_size):
+                try:
+                    if id_fn:
+                        vectorstore.add_documents(batch, ids=[id_fn(d) for d in batch])
+                    else:
+                        vectorstore.add_documents(batch)
+                    added += len(batch)
+                    print(f"  📤 Embedded {added} chunks")
+                except BaseException as e:
+                    errors.append(e)
+                batch = []
+            if item is _DONE:
+                return
+
+    embedder = threading.Thread(target=embed, name="ingest-embedder", daemon=True)
+    embedder.start()
+    try:
+        for doc in documents:
+            for chunk in splitter.split_documents([doc]):
+                if errors:
+                    break
+                if dedup is not None and dedup.is_duplicate(chunk):
+                    continue
+                chunks.put(prepare(chunk) if prepare else chunk)
+            if errors:
+                break
+    finally:
+        chunks.put(_DONE)
+        embedder.join()
+    if errors:
+        raise errors[0]
+    return added
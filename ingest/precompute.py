@@ -0,0 +1,263 @@
+"""
+Precomputed answers for an index snapshot.
+
+    uv run python -m ingest.precompute rag-chroma --questions 3 --concurrency 4
+
+For each section of the published snapshot (chunks sharing source and
+section metadata) the question generator proposes likely questions. They
+are answered through the Self-RAG graph in a background batch against that
+snapshot, and answers that pass the hallucination and answer graders
+without web search are stored in the snapshot's answers.json for the
+serving lookup (graph/answer_lookup.py).
+
+Answers verified against an earlier snapshot of the index are carried over
+when all of their chunks are still in this one, and sections whose chunks
+are all unchanged since that snapshot get no new questions, so re-ingesting
+only pays for the sections whose chunks changed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+
+from ingest.snapshot import (
+    INDEX_DIR,
+    Snapshot,
+    latest_snapshot,
+    load_snapshot,
+    open_vectorstore,
+    snapshot_chunks,
+)
+
+ANSWERS_FILE = "answers.json"
+SECTION_CHARS = 4000
+QUESTIONS_PER_SECTION = 3
+
+SectionKey = Tuple[str, str]
+
+
+def section_key(doc: Document) -> SectionKey:
+    return str(doc.metadata.get("source", "")), str(doc.metadata.get("section", ""))
+
+
+def group_sections(chunks: List[Document]) -> Dict[SectionKey, List[Document]]:
+    sections: Dict[SectionKey, List[Document]] = defaultdict(list)
+    for chunk in chunks:
+        sections[section_key(chunk)].append(chunk)
+    for docs in sections.values():
+        docs.sort(key=lambda d: d.metadata.get("start_byte", 0))
+    return sections
+
+
+def previous_answers(
+    snapshot: Snapshot, root: str = INDEX_DIR
+) -> Tuple[List[Dict[str, Any]], Optional[Snapshot]]:
+    """Answers of the newest other snapshot of the same index that has any, and that snapshot."""
+    directory = os.path.join(root, snapshot.name)
+    for version in sorted(os.listdir(directory), reverse=True):
+        path = os.path.join(directory, version, ANSWERS_FILE)
+        if version != snapshot.version and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f), load_snapshot(os.path.join(directory, version))
+    return [], None
+
+
+def unchanged_sections(
+    sections: Dict[SectionKey, List[Document]],
+    previous: Optional[Snapshot],
+    embedding: Embeddings,
+) -> Set[SectionKey]:
+    """Sections holding exactly the chunks they held in the previous snapshot."""
+    from graph.chunk_store import chunk_id
+
+    if previous is None:
+        return set()
+    try:
+        before = group_sections(snapshot_chunks(open_vectorstore(previous, embedding)))
+    except Exception as e:
+        print(f"⚠️ Could not read snapshot {previous.version}, asking about every section: {e}")
+        return set()
+    return {
+        key
+        for key, docs in sections.items()
+        if {chunk_id(d) for d in docs} == {chunk_id(d) for d in before.get(key, [])}
+    }
+
+
+def still_valid(entries: List[Dict[str, Any]], chunk_ids: set) -> List[Dict[str, Any]]:
+    """Answers whose supporting chunks are all unchanged in the new snapshot."""
+    return [e for e in entries if all(key in chunk_ids for key in e["chunk_ids"])]
+
+
+def generate_questions(
+    sections: Dict[SectionKey, List[Document]], per_section: int, concurrency: int
+) -> List[Tuple[str, SectionKey]]:
+    from graph.chains.question_generator import question_generator
+
+    keys = list(sections)
+    inputs = [
+        {
+            "count": per_section,
+            "section": key[1] or key[0],
+            "text": "\n\n".join(d.page_content for d in sections[key])[:SECTION_CHARS],
+        }
+        for key in keys
+    ]
+    results = question_generator.batch(
+        inputs, config={"max_concurrency": concurrency}, return_exceptions=True
+    )
+    questions = []
+    for key, result in zip(keys, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ No questions for {key}: {result}")
+            continue
+        questions.extend((q, key) for q in result.questions[:per_section] if q.strip())
+    return questions
+
+
+def is_verified(question: str, result: Dict[str, Any]) -> bool:
+    """Answered from the index, and both graders accept the final answer."""
+    from graph.critique import critique_generation
+    from graph.parents import context_documents
+
+    documents = context_documents(result)
+    if result.get("web_search") or not result.get("generation") or not documents:
+        return False
+    grounded, answers_question = critique_generation(
+        question, documents, result["generation"], mode="sequential"
+    )
+    return grounded and bool(answers_question)
+
+
+def answer_entry(
+    question: str, key: SectionKey, result: Dict[str, Any], embedding: Embeddings
+) -> Dict[str, Any]:
+    from graph.chunk_store import chunk_id, get_documents
+
+    documents = get_documents(result)
+    return {
+        "question": question,
+        "answer": result["generation"],
+        "section": list(key),
+        "chunk_ids": [chunk_id(d) for d in documents],
+        "chunks": [
+            {
+                "text": d.page_content,
+                "metadata": {k: v for k, v in d.metadata.items() if k != "relevance_score"},
+            }
+            for d in documents
+        ],
+        "vector": embedding.embed_query(question),
+        "verified_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+async def answer_questions(
+    questions: List[Tuple[str, SectionKey]],
+    retriever: BaseRetriever,
+    embedding: Embeddings,
+    concurrency: int,
+) -> List[Dict[str, Any]]:
+    """Run the questions through the graph and keep the verified answers."""
+    from graph.graph import build_graph
+
+    graph = build_graph(retriever, warm_up=False, answer_lookup=False)
+
+    async def answer(item: Tuple[str, SectionKey]) -> Optional[Dict[str, Any]]:
+        question, key = item
+        result = await graph.ainvoke({"question": question})
+        if not await asyncio.to_thread(is_verified, question, result):
+            return None
+        return await asyncio.to_thread(answer_entry, question, key, result, embedding)
+
+    entries = []
+    runner = RunnableLambda(answer)
+    async for index, entry in runner.abatch_as_completed(
+        questions, config={"max_concurrency": concurrency}, return_exceptions=True
+    ):
+        question = questions[index][0]
+        if isinstance(entry, Exception):
+            print(f"❌ {question!r}: {entry!r}")
+        elif entry is None:
+            print(f"⭕ {question!r}: answer not verified")
+        else:
+            print(f"✅ {question!r}")
+            entries.append(entry)
+    return entries
+
+
+def precompute_answers(
+    snapshot: Snapshot,
+    questions_per_section: int = QUESTIONS_PER_SECTION,
+    concurrency: int = 4,
+    root: str = INDEX_DIR,
+    embedding: Optional[Embeddings] = None,
+) -> Dict[str, int]:
+    """Write verified answers for a published snapshot to its answers.json."""
+    from graph.chains.llm import get_embeddings
+    from graph.chunk_store import chunk_id
+
+    embedding = embedding or get_embeddings()
+    vectorstore = open_vectorstore(snapshot, embedding)
+    chunks = snapshot_chunks(vectorstore)
+    chunk_ids = {chunk_id(c) for c in chunks}
+
+    entries, previous = previous_answers(snapshot, root)
+    carried = still_valid(entries, chunk_ids)
+    sections = group_sections(chunks)
+    unchanged = unchanged_sections(sections, previous, embedding)
+    sections = {k: v for k, v in sections.items() if k not in unchanged}
+    print(
+        f"📒 {len(carried)} answers carried over, "
+        f"generating questions for {len(sections)} changed or new sections"
+    )
+
+    questions = generate_questions(sections, questions_per_section, concurrency)
+    entries = asyncio.run(
+        answer_questions(questions, vectorstore.as_retriever(), embedding, concurrency)
+    )
+    path = os.path.join(snapshot.path, ANSWERS_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(carried + entries, f)
+    os.replace(tmp, path)
+    report = {
+        "carried_over": len(carried),
+        "questions": len(questions),
+        "verified": len(entries),
+    }
+    print(f"📒 Wrote {len(carried) + len(entries)} precomputed answers to {path}: {report}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Precompute verified answers for an index")
+    parser.add_argument("name", help="index name")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--version", help="snapshot version (defaults to CURRENT)")
+    parser.add_argument("--questions", type=int, default=QUESTIONS_PER_SECTION)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.version:
+        snapshot = load_snapshot(os.path.join(args.index_dir, args.name, args.version))
+    else:
+        snapshot = latest_snapshot(args.name, args.index_dir)
+    if snapshot is None:
+        parser.error(f"{args.name!r} has no published snapshot in {args.index_dir}")
+    precompute_answers(snapshot, args.questions, args.concurrency, args.index_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
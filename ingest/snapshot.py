@@ -0,0 +1,299 @@
+"""
+Versioned index snapshots.
+
+Each ingestion job writes a new snapshot under INDEX_DIR/<name>/<version>/
+with a snapshot.json describing it. Once the job has loaded every source the
+snapshot is published by pointing INDEX_DIR/<name>/CURRENT at it; serving
+processes only ever open the CURRENT snapshot and never write to it, so a
+new index can be built while the old one is being served.
+
+Backends:
+    chroma  a Chroma persist directory inside the snapshot
+    local   an InMemoryVectorStore dumped to store.json inside the snapshot, or
+            with compression a CompressedVectorStore in store/
+    endee   a remote Endee index named <name>_<version>; the snapshot holds
+            only its description
+
+Parent chunks of small-to-big indexes (ChunkingConfig.parent_chunk_size)
+are stored once per snapshot in parents.json, whatever the backend.
+"""
+import json
+import os
+import time
+import weakref
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
+from pydantic import BaseModel, Field
+
+from ingest.chunking import ChunkingConfig
+from ingest.compression import CompressedVectorStore, CompressionConfig, TruncatedEmbeddings
+from ingest.dedup import DedupConfig
+
+INDEX_DIR = os.getenv("SELF_RAG_INDEX_DIR", "./indexes")
+DEFAULT_INDEX = os.getenv("SELF_RAG_INDEX_NAME", "rag-chroma")
+BACKENDS = ("chroma", "local", "endee")
+PARENTS_FILE = "parents.json"
+
+Backend = Literal["chroma", "local", "endee"]
+
+
+class Snapshot(BaseModel):
+    name: str
+    version: str
+    backend: Backend
+    collection: str
+    chunking: ChunkingConfig
+    dedup: DedupConfig = Field(default_factory=DedupConfig)
+    compression: CompressionConfig = Field(default_factory=CompressionConfig)
+    compression_report: Dict[str, Any] = Field(default_factory=dict)
+    sources: List[str]
+    completed_sources: List[str] = Field(default_factory=list)
+    failed_sources: List[str] = Field(default_factory=list)
+    chunk_count: int = 0
+    parent_count: int = 0
+    duplicates_skipped: int = 0
+    dimension: Optional[int] = None
+    status: Literal["running", "published"] = "running"
+    created_at: str
+    published_at: Optional[str] = None
+    path: str = Field(default="", exclude=True)
+
+    @property
+    def pending_sources(self) -> List[str]:
+        done = set(self.completed_sources)
+        return [s for s in self.sources if s not in done]
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def new_snapshot(
+    name: str,
+    backend: Backend,
+    chunking: ChunkingConfig,
+    sources: List[str],
+    root: str = INDEX_DIR,
+    dedup: Optional[DedupConfig] = None,
+    compression: Optional[CompressionConfig] = None,
+) -> Snapshot:
+    version = time.strftime("%Y%m%d%H%M%S", time.gmtime())
+    path = os.path.join(root, name, version)
+    while os.path.exists(path):
+        # two jobs in the same second
+        version = str(int(version) + 1)
+        path = os.path.join(root, name, version)
+    os.makedirs(path)
+    collection = f"{name}_{version}".replace("-", "_") if backend == "endee" else name
+    snapshot = Snapshot(
+        name=name,
+        version=version,
+        backend=backend,
+        collection=collection,
+        chunking=chunking,
+        dedup=dedup or DedupConfig(),
+        compression=compression or CompressionConfig(),
+        sources=sources,
+        created_at=_now(),
+        path=path,
+    )
+    save_snapshot(snapshot)
+    return snapshot
+
+
+def save_snapshot(snapshot: Snapshot) -> None:
+    _write_atomic(
+        os.path.join(snapshot.path, "snapshot.json"), snapshot.model_dump_json(indent=2)
+    )
+
+
+def load_snapshot(path: str) -> Snapshot:
+    with open(os.path.join(path, "snapshot.json"), encoding="utf-8") as f:
+        snapshot = Snapshot.model_validate_json(f.read())
+    snapshot.path = path
+    return snapshot
+
+
+def publish_snapshot(snapshot: Snapshot, root: str = INDEX_DIR) -> None:
+    snapshot.status = "published"
+    snapshot.published_at = _now()
+    save_snapshot(snapshot)
+    _write_atomic(os.path.join(root, snapshot.name, "CURRENT"), snapshot.version)
+
+
+def latest_snapshot(name: str = DEFAULT_INDEX, root: str = INDEX_DIR) -> Optional[Snapshot]:
+    """The published snapshot serving processes should open, if any."""
+    pointer = os.path.join(root, name, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, encoding="utf-8") as f:
+        version = f.read().strip()
+    return load_snapshot(os.path.join(root, name, version))
+
+
+def unfinished_snapshot(
+    name: str, backend: Backend, root: str = INDEX_DIR
+) -> Optional[Snapshot]:
+    """The newest snapshot of this index and backend whose job did not finish."""
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        return None
+    for version in sorted(os.listdir(directory), reverse=True):
+        path = os.path.join(directory, version)
+        if not os.path.exists(os.path.join(path, "snapshot.json")):
+            continue
+        snapshot = load_snapshot(path)
+        if snapshot.backend == backend and snapshot.status == "running":
+            return snapshot
+    return None
+
+
+def check_compression(backend: Backend, compression: CompressionConfig) -> None:
+    if backend == "endee" and compression.enabled:
+        raise ValueError("Endee quantizes on its own (precision=int8), drop the compression options")
+    if backend == "chroma" and (
+        compression.quantization != "none" or compression.reduction == "pca"
+    ):
+        raise ValueError("Chroma only supports truncation, int8 and PCA need the local backend")
+
+
+# the snapshot each opened vector store serves, for per-snapshot files
+# (answers.json) that must match whatever store a graph was built with
+_opened: "weakref.WeakKeyDictionary[VectorStore, Snapshot]" = weakref.WeakKeyDictionary()
+
+
+def open_vectorstore(snapshot: Snapshot, embedding: Optional[Embeddings] = None) -> VectorStore:
+    """Open the vector store of a snapshot (the ingestion job writes through it)."""
+    vectorstore = _open_vectorstore(snapshot, embedding)
+    _opened[vectorstore] = snapshot
+    return vectorstore
+
+
+def snapshots_behind(vectorstore: VectorStore) -> List[Snapshot]:
+    """
+    Snapshots a vector store was opened from: its own, or its shards' for a
+    federated store. Empty for stores not opened with open_vectorstore.
+    """
+    shards = getattr(vectorstore, "shards", None)
+    if shards is not None:
+        return [s for shard in shards.values() for s in snapshots_behind(shard)]
+    snapshot = _opened.get(vectorstore)
+    return [snapshot] if snapshot is not None else []
+
+
+def _open_vectorstore(snapshot: Snapshot, embedding: Optional[Embeddings] = None) -> VectorStore:
+    if embedding is None:
+        from graph.chains.llm import get_embeddings
+
+        embedding = get_embeddings()
+    compression = snapshot.compression
+    check_compression(snapshot.backend, compression)
+
+    if snapshot.backend == "chroma":
+        if compression.dimension:
+            embedding = TruncatedEmbeddings(embedding, compression.dimension)
+        from langchain_chroma import Chroma
+
+        return Chroma(
+            collection_name=snapshot.collection,
+            embedding_function=embedding,
+            persist_directory=os.path.join(snapshot.path, "chroma"),
+        )
+    if snapshot.backend == "local" and compression.enabled:
+        store_path = os.path.join(snapshot.path, "store")
+        if os.path.exists(store_path):
+            return CompressedVectorStore.load(store_path, embedding, compression)
+        return CompressedVectorStore(embedding, compression)
+    if snapshot.backend == "local":
+        store_path = os.path.join(snapshot.path, "store.json")
+        if os.path.exists(store_path):
+            return InMemoryVectorStore.load(store_path, embedding)
+        return InMemoryVectorStore(embedding)
+    if snapshot.backend == "endee":
+        from langchain_endee import EndeeVectorStore
+
+        return EndeeVectorStore(
+            index_name=snapshot.collection,
+            embedding=embedding,
+            dimension=snapshot.dimension,
+            space_type="cosine",
+            precision="int8",
+            base_url=os.getenv("ENDEE_BASE_URL", "http://localhost:8080/api/v1"),
+        )
+    raise ValueError(f"Unknown backend {snapshot.backend!r}, expected one of {BACKENDS}")
+
+
+def _parents_path(snapshot: Union[Snapshot, str]) -> str:
+    directory = snapshot if isinstance(snapshot, str) else snapshot.path
+    return os.path.join(directory, PARENTS_FILE)
+
+
+def snapshot_chunks(vectorstore: VectorStore) -> List[Document]:
+    """Every chunk stored in a snapshot's vector store (Endee indexes can't be listed)."""
+    from langchain_chroma import Chroma
+
+    if isinstance(vectorstore, CompressedVectorStore):
+        return list(vectorstore.documents)
+    if isinstance(vectorstore, InMemoryVectorStore):
+        return [
+            Document(page_content=entry["text"], metadata=entry["metadata"])
+            for entry in vectorstore.store.values()
+        ]
+    if isinstance(vectorstore, Chroma):
+        data = vectorstore.get(include=["documents", "metadatas"])
+        return [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+    raise NotImplementedError(
+        f"Listing the chunks of a {type(vectorstore).__name__} is not supported"
+    )
+
+
+def load_parents(snapshot: Union[Snapshot, str]) -> Dict[str, Document]:
+    """
+    Parent chunks of a snapshot by parent_id (empty without parents). Takes a
+    directory instead for indexes without snapshots (the Streamlit uploads).
+    """
+    path = _parents_path(snapshot)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {
+            key: Document(page_content=parent["text"], metadata=parent["metadata"])
+            for key, parent in json.load(f).items()
+        }
+
+
+def save_parents(snapshot: Union[Snapshot, str], parents: Dict[str, Document]) -> int:
+    """Add parent chunks to the snapshot (or directory); returns how many it now holds."""
+    stored = load_parents(snapshot)
+    stored.update(parents)
+    _write_atomic(
+        _parents_path(snapshot),
+        json.dumps(
+            {
+                key: {"text": doc.page_content, "metadata": doc.metadata}
+                for key, doc in stored.items()
+            }
+        ),
+    )
+    return len(stored)
+
+
+def persist_vectorstore(snapshot: Snapshot, vectorstore: VectorStore) -> None:
+    """Flush stores that don't write through (the local backend) into the snapshot."""
+    if isinstance(vectorstore, CompressedVectorStore):
+        vectorstore.dump(os.path.join(snapshot.path, "store"))
+    elif snapshot.backend == "local":
+        vectorstore.dump(os.path.join(snapshot.path, "store.json"))
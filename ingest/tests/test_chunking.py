@@ -0,0 +1,107 @@
+import re
+
+from langchain_core.documents import Document
+
+from ingest.chunking import ParentChildSplitter, TokenChunker
+
+
+class WordEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per word, splitting
+    multi-byte characters like byte-level BPE does."""
+
+    def __init__(self):
+        self.vocab = {}
+
+    def encode(self, text, disallowed_special=()):
+        tokens = []
+        for piece in re.findall(rb"\s*[^\s\x80-\xff]+|\s+|[\x80-\xff]", text.encode("utf-8")):
+            tokens.append(self.vocab.setdefault(piece, len(self.vocab)))
+        return tokens
+
+    def decode_tokens_bytes(self, tokens):
+        pieces = {v: k for k, v in self.vocab.items()}
+        return [pieces[t] for t in tokens]
+
+
+TEXT = """# Agents
+
+Agents plan and act.
+
+## Memory
+
+Short-term memory is the context window.
+
+```python
+def remember(x):
+
+    return x
+```
+
+Long-term memory lives in a vector store."""
+
+
+def chunk(text, **kwargs):
+    return TokenChunker(encoding=WordEncoding(), **kwargs).split_documents(
+        [Document(page_content=text, metadata={"source": "doc.md"})]
+    )
+
+
+def test_chunks_record_token_counts_and_byte_offsets() -> None:
+    data = TEXT.encode("utf-8")
+
+    chunks = chunk(TEXT, chunk_size=12)
+
+    for c in chunks:
+        assert data[c.metadata["start_byte"] : c.metadata["end_byte"]].decode() == c.page_content
+        assert 0 < c.metadata["token_count"] <= 12
+        assert c.metadata["source"] == "doc.md"
+
+
+def test_headings_start_chunks_and_code_blocks_stay_whole() -> None:
+    chunks = chunk(TEXT, chunk_size=20)
+
+    assert [c.page_content.splitlines()[0] for c in chunks[:2]] == ["# Agents", "## Memory"]
+    code = [c.page_content for c in chunks if "def remember" in c.page_content]
+    assert len(code) == 1 and "return x" in code[0]
+
+
+def test_long_text_is_cut_on_token_boundaries_with_overlap() -> None:
+    text = " ".join(f"w{i}" for i in range(30))
+
+    chunks = chunk(text, chunk_size=10, chunk_overlap=2)
+
+    assert [c.metadata["token_count"] for c in chunks] == [10, 10, 10, 6]
+    assert chunks[1].page_content.startswith("w8 w9 w10")
+
+
+def test_multibyte_characters_are_never_split() -> None:
+    text = "é" * 25
+
+    chunks = chunk(text, chunk_size=4)
+
+    assert "".join(c.page_content for c in chunks) == text
+
+
+def test_chunks_record_their_section_heading() -> None:
+    chunks = chunk(TEXT, chunk_size=20)
+
+    assert [c.metadata["section"] for c in chunks[:2]] == ["Agents", "Memory"]
+    assert chunks[-1].metadata["section"] == "Memory"
+
+
+def test_children_point_into_their_parent_and_the_document() -> None:
+    data = TEXT.encode("utf-8")
+    splitter = ParentChildSplitter(
+        TokenChunker(chunk_size=20, encoding=WordEncoding()),
+        TokenChunker(chunk_size=6, encoding=WordEncoding()),
+    )
+
+    children = splitter.split_documents(
+        [Document(page_content=TEXT, metadata={"source": "doc.md"})]
+    )
+    parents = splitter.pop_parents()
+
+    assert len(parents) < len(children) and not splitter.parents
+    for c in children:
+        assert c.page_content in parents[c.metadata["parent_id"]].page_content
+        assert data[c.metadata["start_byte"] : c.metadata["end_byte"]].decode() == c.page_content
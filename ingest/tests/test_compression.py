@@ -0,0 +1,58 @@
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingest.compression import CompressedVectorStore, CompressionConfig, recall_at_k
+
+EMBEDDING = DeterministicFakeEmbedding(size=64)
+TEXTS = [f"chunk number {i} about topic {i % 7}" for i in range(300)]
+
+
+def test_int8_codes_shrink_vectors_and_rescoring_restores_recall() -> None:
+    config = CompressionConfig(quantization="int8", dimension=32, reduction="pca")
+    store = CompressedVectorStore.from_texts(TEXTS, EMBEDDING, config=config)
+
+    report = recall_at_k(store, k=5)
+
+    assert store.codes.dtype == np.int8 and store.codes.shape == (300, 32)
+    assert report["compressed_bytes"] * 5 < report["float32_bytes"]
+    assert report["recall@5"] > report["recall@5_without_rescoring"]
+    assert report["recall@5"] >= 0.85
+
+
+def test_exact_text_is_found_first_and_scores_are_cosine() -> None:
+    store = CompressedVectorStore.from_texts(
+        TEXTS, EMBEDDING, config=CompressionConfig(quantization="int8")
+    )
+
+    doc, score = store.similarity_search_with_score(TEXTS[42], k=1)[0]
+
+    assert doc.page_content == TEXTS[42]
+    assert abs(score - 1.0) < 1e-5
+
+
+def test_dumped_store_memory_maps_full_vectors(tmp_path) -> None:
+    config = CompressionConfig(quantization="int8", dimension=16)
+    ids = [str(i) for i in range(300)]
+    store = CompressedVectorStore.from_texts(TEXTS, EMBEDDING, config=config, ids=ids)
+    store.dump(str(tmp_path))
+
+    loaded = CompressedVectorStore.load(str(tmp_path), EMBEDDING, config)
+
+    assert isinstance(loaded.full, np.memmap)
+    assert [d.id for d in loaded.similarity_search(TEXTS[7], k=3)] == [
+        d.id for d in store.similarity_search(TEXTS[7], k=3)
+    ]
+    loaded.add_texts([TEXTS[7]], ids=["7"])
+    assert len(loaded.documents) == 300
+
+
+def test_filter_restricts_candidates() -> None:
+    metadatas = [{"topic": i % 7} for i in range(300)]
+    store = CompressedVectorStore.from_texts(
+        TEXTS, EMBEDDING, metadatas=metadatas, config=CompressionConfig(quantization="int8")
+    )
+
+    results = store.similarity_search(TEXTS[0], k=50, filter=lambda d: d.metadata["topic"] == 3)
+
+    assert len(results) == 43
+    assert {d.metadata["topic"] for d in results} == {3}
@@ -0,0 +1,49 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ingest.dedup import DedupConfig, NearDuplicateFilter
+from ingest.pipeline import run_pipeline
+
+FOOTER = (
+    "Cited as: Weng, Lilian. Posts on LLM agents and prompting. Lil'Log, 2023. "
+    "Please cite this work when you reuse it. All rights reserved by the author."
+)
+
+
+def doc(text: str, **metadata) -> Document:
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_near_duplicates_are_flagged_and_distinct_chunks_kept() -> None:
+    dedup = NearDuplicateFilter()
+
+    verdicts = [
+        dedup.is_duplicate(doc(FOOTER)),
+        dedup.is_duplicate(doc(FOOTER.replace("2023", "2024"), token_count=40)),
+        dedup.is_duplicate(doc("Agents combine planning, memory and tool use to act.")),
+    ]
+
+    assert verdicts == [False, True, False]
+    assert (dedup.seen, dedup.skipped, dedup.skipped_tokens) == (3, 1, 40)
+
+
+def test_threshold_controls_how_similar_chunks_must_be() -> None:
+    strict = NearDuplicateFilter(DedupConfig(threshold=1.0))
+    edited = FOOTER.replace("Please cite this work", "Kindly reference this post")
+
+    assert not strict.is_duplicate(doc(FOOTER))
+    assert not strict.is_duplicate(doc(edited))
+
+
+def test_pipeline_skips_duplicates_before_embedding() -> None:
+    store = InMemoryVectorStore(DeterministicFakeEmbedding(size=16))
+    pages = [doc(f"Page {i} is about topic number {i}.\n\n{FOOTER}") for i in range(3)]
+    splitter = RecursiveCharacterTextSplitter(chunk_size=160, chunk_overlap=0)
+    dedup = NearDuplicateFilter()
+
+    added = run_pipeline(pages, splitter, store, dedup=dedup)
+
+    assert added == 4
+    assert dedup.skipped == 2
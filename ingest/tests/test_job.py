@@ -0,0 +1,136 @@
+import json
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingest.chunking import ChunkingConfig
+from ingest.compression import CompressionConfig
+from ingest.job import run_ingestion_job, stable_chunk_id
+from ingest.manifest import load_manifest, manifest_sources
+from ingest.snapshot import (
+    latest_snapshot,
+    load_parents,
+    new_snapshot,
+    open_vectorstore,
+    persist_vectorstore,
+    save_parents,
+    save_snapshot,
+)
+
+EMBEDDING = DeterministicFakeEmbedding(size=32)
+
+
+def write_corpus(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "nested").mkdir(parents=True)
+    (docs / "agents.md").write_text("Agents plan, remember and use tools.", encoding="utf-8")
+    (docs / "nested" / "memory.txt").write_text("Memory can be short-term or long-term.", encoding="utf-8")
+    (docs / "image.png").write_bytes(b"not a document")
+    (tmp_path / "extra.md").write_text("Prompt engineering steers model behaviour.", encoding="utf-8")
+    manifest = tmp_path / "manifest.json"
+    chunking = {"splitter": "characters", "chunk_size": 50}
+    manifest.write_text(
+        json.dumps({"name": "test-index", "paths": ["docs", "*.md"], "chunking": chunking}),
+        encoding="utf-8",
+    )
+    return str(manifest)
+
+
+def test_manifest_expands_directories_and_globs(tmp_path) -> None:
+    manifest = load_manifest(write_corpus(tmp_path))
+
+    sources = manifest_sources(manifest)
+
+    assert [s.rsplit("/", 1)[-1] for s in sources] == ["agents.md", "memory.txt", "extra.md"]
+    assert manifest.chunking == ChunkingConfig(splitter="characters", chunk_size=50)
+
+
+def test_job_publishes_a_snapshot_servers_can_open(tmp_path) -> None:
+    manifest = load_manifest(write_corpus(tmp_path))
+    root = str(tmp_path / "indexes")
+
+    snapshot = run_ingestion_job(manifest, "local", root=root, embedding=EMBEDDING)
+
+    assert snapshot.status == "published"
+    assert snapshot.chunk_count == 3
+    current = latest_snapshot("test-index", root)
+    assert current.version == snapshot.version
+    store = open_vectorstore(current, EMBEDDING)
+    assert len(store.similarity_search("memory", k=10)) == 3
+
+
+def test_resume_only_loads_pending_sources(tmp_path) -> None:
+    manifest = load_manifest(write_corpus(tmp_path))
+    root = str(tmp_path / "indexes")
+    sources = manifest_sources(manifest)
+    interrupted = new_snapshot("test-index", "local", manifest.chunking, sources, root)
+    interrupted.completed_sources = sources[:2]
+    save_snapshot(interrupted)
+
+    snapshot = run_ingestion_job(manifest, "local", root=root, resume=True, embedding=EMBEDDING)
+
+    assert snapshot.version == interrupted.version
+    assert snapshot.chunk_count == 1
+    assert latest_snapshot("test-index", root).version == interrupted.version
+
+
+def test_resume_counts_stored_chunks_once_and_skips_their_duplicates(tmp_path) -> None:
+    manifest = load_manifest(write_corpus(tmp_path))
+    root = str(tmp_path / "indexes")
+    sources = manifest_sources(manifest)
+    (tmp_path / "extra.md").write_text("Agents plan, remember and use tools!", encoding="utf-8")
+    interrupted = new_snapshot("test-index", "local", manifest.chunking, sources, root)
+    # the job crashed in its second group, after embedding memory.txt
+    store = open_vectorstore(interrupted, EMBEDDING)
+    for source in sources[:2]:
+        with open(source, encoding="utf-8") as f:
+            doc = Document(page_content=f.read(), metadata={"source": source})
+        store.add_documents([doc], ids=[stable_chunk_id(doc)])
+    persist_vectorstore(interrupted, store)
+    interrupted.completed_sources = sources[:1]
+    interrupted.chunk_count = 1
+    save_snapshot(interrupted)
+
+    snapshot = run_ingestion_job(manifest, "local", root=root, resume=True, embedding=EMBEDDING)
+
+    # memory.txt is upserted again, extra.md repeats agents.md
+    assert snapshot.chunk_count == 2
+    assert snapshot.duplicates_skipped == 1
+    assert len(open_vectorstore(snapshot, EMBEDDING).store) == 2
+
+
+def test_compressed_local_snapshot_reports_recall(tmp_path) -> None:
+    manifest = load_manifest(write_corpus(tmp_path))
+    manifest.compression = CompressionConfig(quantization="int8", dimension=8)
+    root = str(tmp_path / "indexes")
+
+    snapshot = run_ingestion_job(manifest, "local", root=root, embedding=EMBEDDING)
+
+    assert snapshot.compression_report["queries"] == 3
+    store = open_vectorstore(latest_snapshot("test-index", root), EMBEDDING)
+    assert store.codes.shape == (3, 8)
+
+
+def test_job_stores_parents_once_for_their_children(tmp_path) -> None:
+    manifest = load_manifest(write_corpus(tmp_path))
+    manifest.chunking = ChunkingConfig(splitter="characters", chunk_size=20, parent_chunk_size=50)
+    root = str(tmp_path / "indexes")
+
+    snapshot = run_ingestion_job(manifest, "local", root=root, embedding=EMBEDDING)
+
+    parents = load_parents(snapshot)
+    children = open_vectorstore(snapshot, EMBEDDING).similarity_search("memory", k=20)
+    assert snapshot.parent_count == len(parents) == 3
+    assert len(children) > 3
+    for c in children:
+        assert c.page_content in parents[c.metadata["parent_id"]].page_content
+
+
+def test_parents_can_be_kept_in_a_directory_without_snapshot(tmp_path) -> None:
+    directory = str(tmp_path)
+    save_parents(directory, {"a": Document(page_content="Memory.", metadata={"source": "a.md"})})
+    save_parents(directory, {"b": Document(page_content="Planning.", metadata={})})
+
+    parents = load_parents(directory)
+    assert sorted(parents) == ["a", "b"]
+    assert parents["a"].metadata == {"source": "a.md"}
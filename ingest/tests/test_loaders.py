@@ -0,0 +1,96 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import docx
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ingest.loaders import html_to_document, iter_sources
+from ingest.pipeline import run_pipeline
+
+PAGE = b"""<html lang="en"><head><title>Agents</title></head>
+<body><p>Agent memory has short-term and long-term parts.</p></body></html>"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        Handler.requests_seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/post"
+    server.shutdown()
+
+
+def test_html_to_document_matches_web_base_loader_metadata() -> None:
+    doc = html_to_document(PAGE.decode(), "https://example.com")
+    assert doc.metadata == {"source": "https://example.com", "title": "Agents", "language": "en"}
+    assert "Agent memory" in doc.page_content
+
+
+def test_conditional_requests_reuse_cached_page(server_url, tmp_path) -> None:
+    Handler.requests_seen = []
+
+    first = list(iter_sources(urls=[server_url], http_cache_dir=str(tmp_path)))
+    second = list(iter_sources(urls=[server_url], http_cache_dir=str(tmp_path)))
+
+    assert Handler.requests_seen == [None, '"v1"']
+    assert first[0].page_content == second[0].page_content
+
+
+def test_missing_cached_body_is_fetched_again(server_url, tmp_path) -> None:
+    Handler.requests_seen = []
+    list(iter_sources(urls=[server_url], http_cache_dir=str(tmp_path)))
+    for name in os.listdir(tmp_path):
+        if name.endswith(".html"):
+            os.remove(tmp_path / name)
+
+    again = list(iter_sources(urls=[server_url], http_cache_dir=str(tmp_path)))
+
+    # no conditional request without a body to fall back on
+    assert Handler.requests_seen == [None, None]
+    assert "Agent memory" in again[0].page_content
+
+
+def test_files_are_parsed_and_embedded(tmp_path) -> None:
+    paths = []
+    for i in range(2):
+        document = docx.Document()
+        document.add_paragraph(f"Uploaded file {i} about agent planning.")
+        path = tmp_path / f"file{i}.docx"
+        document.save(path)
+        paths.append(str(path))
+    errors = []
+
+    vectorstore = InMemoryVectorStore(DeterministicFakeEmbedding(size=8))
+    count = run_pipeline(
+        iter_sources(files=[*paths, str(tmp_path / "missing.pdf")], on_error=lambda s, e: errors.append(s)),
+        RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=0),
+        vectorstore,
+        batch_size=1,
+    )
+
+    assert count == 2
+    assert len(vectorstore.store) == 2
+    assert errors == [str(tmp_path / "missing.pdf")]
@@ -0,0 +1,113 @@
+import json
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from graph.chunk_store import chunk_id
+from ingest import precompute
+from ingest.job import run_ingestion_job
+from ingest.manifest import load_manifest
+from ingest.snapshot import latest_snapshot, open_vectorstore
+
+EMBEDDING = DeterministicFakeEmbedding(size=32)
+
+
+def ingest(tmp_path, memory_text: str, chunk_size: int = 250):
+    docs = tmp_path / "docs"
+    docs.mkdir(exist_ok=True)
+    (docs / "agents.md").write_text("Agents plan, remember and use tools.", encoding="utf-8")
+    (docs / "memory.md").write_text(memory_text, encoding="utf-8")
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "name": "test-index",
+                "paths": ["docs"],
+                "chunking": {"splitter": "characters", "chunk_size": chunk_size},
+            }
+        ),
+        encoding="utf-8",
+    )
+    root = str(tmp_path / "indexes")
+    run_ingestion_job(load_manifest(str(manifest)), "local", root=root, embedding=EMBEDDING)
+    return latest_snapshot("test-index", root), root
+
+
+def test_answers_are_carried_over_only_while_their_chunks_are_unchanged(
+    tmp_path, monkeypatch
+) -> None:
+    answered = []
+
+    def answer_each_section(sections, per_section, concurrency):
+        answered.extend(source.rsplit("/", 1)[-1] for source, _ in sections)
+        return [(f"what is in {source}?", (source, section)) for source, section in sections]
+
+    async def verified_answers(questions, retriever, embedding, concurrency):
+        store = open_vectorstore(snapshot, EMBEDDING)
+        return [
+            {
+                "question": question,
+                "answer": "An answer.",
+                "section": list(key),
+                "chunk_ids": [
+                    chunk_id(d)
+                    for d in precompute.snapshot_chunks(store)
+                    if d.metadata["source"] == key[0]
+                ],
+            }
+            for question, key in questions
+        ]
+
+    monkeypatch.setattr(precompute, "generate_questions", answer_each_section)
+    monkeypatch.setattr(precompute, "answer_questions", verified_answers)
+
+    snapshot, root = ingest(tmp_path, "Memory can be short-term or long-term.")
+    report = precompute.precompute_answers(snapshot, root=root, embedding=EMBEDDING)
+    assert report == {"carried_over": 0, "questions": 2, "verified": 2}
+
+    answered.clear()
+    snapshot, root = ingest(tmp_path, "Memory can be episodic.")
+    report = precompute.precompute_answers(snapshot, root=root, embedding=EMBEDDING)
+
+    # only the changed document is asked about again
+    assert answered == ["memory.md"]
+    assert report == {"carried_over": 1, "questions": 1, "verified": 1}
+    with open(f"{snapshot.path}/{precompute.ANSWERS_FILE}", encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+
+
+def test_a_section_with_a_carried_answer_is_asked_about_again_when_it_changed(
+    tmp_path, monkeypatch
+) -> None:
+    answered = []
+
+    def answer_each_section(sections, per_section, concurrency):
+        answered.extend(source.rsplit("/", 1)[-1] for source, _ in sections)
+        return [(f"what is in {source}?", (source, section)) for source, section in sections]
+
+    async def first_chunk_answers(questions, retriever, embedding, concurrency):
+        # each answer is supported by the first chunk of its section only
+        store = open_vectorstore(snapshot, EMBEDDING)
+        sections = precompute.group_sections(precompute.snapshot_chunks(store))
+        return [
+            {
+                "question": question,
+                "answer": "An answer.",
+                "section": list(key),
+                "chunk_ids": [chunk_id(sections[key][0])],
+            }
+            for question, key in questions
+        ]
+
+    monkeypatch.setattr(precompute, "generate_questions", answer_each_section)
+    monkeypatch.setattr(precompute, "answer_questions", first_chunk_answers)
+
+    snapshot, root = ingest(tmp_path, "Memory is short-term.\n\nMemory uses vectors.", 25)
+    precompute.precompute_answers(snapshot, root=root, embedding=EMBEDDING)
+
+    answered.clear()
+    snapshot, root = ingest(tmp_path, "Memory is short-term.\n\nMemory uses graphs.", 25)
+    report = precompute.precompute_answers(snapshot, root=root, embedding=EMBEDDING)
+
+    # the memory answer is still valid, but its section changed
+    assert answered == ["memory.md"]
+    assert report == {"carried_over": 2, "questions": 1, "verified": 1}
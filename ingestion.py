@@ -1,43 +1,70 @@
+"""
+Read-only access to the published index for the serving apps.
+
+Indexes are built by the ingestion CLI (`python -m ingest`); running this file
+builds the default Chroma index from manifests/lilianweng.json. Importing it
+only opens the CURRENT snapshot of SELF_RAG_INDEX_NAME, falling back to a
+legacy ./.chroma directory, or with SELF_RAG_INDEX_SHARDS the snapshots of
+several indexes behind one federated store.
+"""
 from dotenv import load_dotenv
 
 load_dotenv()
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
 import os
+from typing import List, Optional
 
-urls = [
-    "https://lilianweng.github.io/posts/2023-06-23-agent/",
-    "https://lilianweng.github.io/posts/2023-03-15-prompt-engineering/",
-    "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
-]
-
-docs = [WebBaseLoader(url).load() for url in urls]
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 
-docs_list = [item for sublist in docs for item in sublist]
+from graph.chains.llm import get_embeddings
+from graph.config import INDEX_SHARDS
+from graph.vectors import QueryCachingEmbeddings
+from ingest.snapshot import DEFAULT_INDEX, INDEX_DIR, latest_snapshot, open_vectorstore
 
-text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-    chunk_size=250, chunk_overlap=0
+DEFAULT_MANIFEST = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "manifests", "lilianweng.json"
 )
+LEGACY_DIRECTORY = "./.chroma"
 
-doc_splits = text_splitter.split_documents(docs_list)
-data_directory = "./.chroma"
 
-if os.path.exists(data_directory):
-    print(f"Data_Directory does exist")
-else:
-    print(f"Data_Directory doesn't exists, creating one...")
-    vectorstore = Chroma.from_documents(
-        documents=doc_splits,
-        collection_name="rag-chroma",
-        embedding=OpenAIEmbeddings(),
-        persist_directory=data_directory,
+def load_vectorstore(
+    name: str = DEFAULT_INDEX, embedding: Optional[Embeddings] = None
+) -> VectorStore:
+    # retrieval's query vectors are reused by the answer lookup and local grader
+    embedding = embedding or QueryCachingEmbeddings(get_embeddings())
+    snapshot = latest_snapshot(name)
+    if snapshot is not None:
+        print(
+            f"📚 Serving {snapshot.name}@{snapshot.version} "
+            f"({snapshot.backend}, {snapshot.chunk_count} chunks)"
+        )
+        return open_vectorstore(snapshot, embedding)
+    if os.path.exists(LEGACY_DIRECTORY):
+        return Chroma(
+            collection_name="rag-chroma",
+            persist_directory=LEGACY_DIRECTORY,
+            embedding_function=embedding,
+        )
+    raise FileNotFoundError(
+        f"No published snapshot of {name!r} in {INDEX_DIR}; build one with "
+        f"`python -m ingest {DEFAULT_MANIFEST} --backend chroma`"
     )
-    print("Done!")
 
-retriever = Chroma(
-    collection_name="rag-chroma",
-    persist_directory="./.chroma",
-    embedding_function=OpenAIEmbeddings(),
-).as_retriever()
+
+def load_federated_vectorstore(names: List[str] = INDEX_SHARDS) -> VectorStore:
+    """The CURRENT snapshots of several indexes behind one federated store."""
+    from graph.federated import FederatedVectorStore
+
+    embedding = QueryCachingEmbeddings(get_embeddings())
+    shards = {name: load_vectorstore(name, embedding) for name in names}
+    return FederatedVectorStore(shards, embedding)
+
+
+if __name__ == "__main__":
+    from ingest.cli import main
+
+    raise SystemExit(main([DEFAULT_MANIFEST, "--backend", "chroma"]))
+else:
+    vectorstore = load_federated_vectorstore() if INDEX_SHARDS else load_vectorstore()
+    retriever = vectorstore.as_retriever()
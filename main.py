@@ -1,10 +1,48 @@
+import argparse
+
 from dotenv import load_dotenv
 
 load_dotenv()
-from langchain_core.output_parsers import StrOutputParser
 
+from graph import warmup
+from graph.chat import resume_run, run_chat_turn
+from graph.checkpoint import one_off_config
+from graph.config import WARM_START
 from graph.graph import app
+from graph.metrics import print_fast_path_report, print_grader_report, print_routing_report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Self-RAG graph")
+    parser.add_argument("question", nargs="?", default="what is lcel?")
+    parser.add_argument(
+        "--thread-id",
+        help="checkpoint the run under this thread id (needs SELF_RAG_CHECKPOINT_DB)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the interrupted run of --thread-id from its last checkpoint",
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    if (args.thread_id or args.resume) and app.checkpointer is None:
+        raise SystemExit("--thread-id/--resume need SELF_RAG_CHECKPOINT_DB to be set")
+    if args.resume and not args.thread_id:
+        raise SystemExit("--resume needs --thread-id")
+
+    if WARM_START:
+        warmup.warm_up()
     print("Self_RAG in work...")
-    print(app.invoke(input={"question": "what is lcel?"}))
+    if args.resume:
+        print(resume_run(app, args.thread_id))
+    elif args.thread_id:
+        print(run_chat_turn(app, args.question, args.thread_id))
+    else:
+        print(app.invoke(input={"question": args.question}, config=one_off_config()))
+    print_routing_report()
+    print_grader_report()
+    print_fast_path_report()
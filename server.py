@@ -0,0 +1,181 @@
+"""
+Async HTTP API for the Self-RAG graph.
+
+Endpoints:
+    GET  /healthz            liveness, never touches the graph or the index
+    GET  /readyz             200 once the index is loaded and warmed and the graph is built,
+                             503 while loading or with the error when loading failed
+    POST /v1/answer          JSON answer; identical in-flight questions share one run
+    POST /v1/answer/stream   Server-Sent Events: one event per graph node, then the answer
+
+Set SELF_RAG_FAKE_MODELS=true to run locally without API keys.
+"""
+import argparse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from langgraph.graph.state import CompiledStateGraph
+from pydantic import BaseModel
+
+from graph import warmup
+from graph.chunk_store import get_documents
+from graph.graph import build_graph
+from graph.serving import AdmissionQueue, Coalescer, ServerBusy, coalescing_key
+
+
+class QuestionRequest(BaseModel):
+    question: str
+    filter: Optional[Dict[str, Any]] = None
+
+    def graph_input(self) -> Dict[str, Any]:
+        return {"question": self.question, "filter": self.filter or {}}
+
+
+class GraphService:
+    """The compiled graph plus this worker's admission queue and coalescer."""
+
+    def __init__(self):
+        self.graph: Optional[CompiledStateGraph] = None
+        self.error: Optional[str] = None
+        self.admission = AdmissionQueue()
+        self.coalescer = Coalescer()
+
+    @property
+    def ready(self) -> bool:
+        return self.graph is not None
+
+    async def load(self) -> None:
+        # opening and warming the index is blocking, keep it off the event loop
+        self.graph = await asyncio.to_thread(build_graph, warm_up=True)
+        print("✅ Self-RAG graph ready")
+
+    def loaded(self, task: "asyncio.Task[None]") -> None:
+        """Done-callback of the load task: keep and log why loading failed."""
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        self.error = f"{type(error).__name__}: {error}"
+        print(f"❌ Self-RAG graph failed to load: {self.error}")
+
+    def require_graph(self) -> CompiledStateGraph:
+        if self.error is not None:
+            raise HTTPException(status_code=503, detail=f"Graph failed to load: {self.error}")
+        if self.graph is None:
+            raise HTTPException(status_code=503, detail="Graph is still loading")
+        return self.graph
+
+    async def answer(self, request: QuestionRequest) -> Dict[str, Any]:
+        graph = self.require_graph()
+        async with self.admission.slot():
+            return await graph.ainvoke(request.graph_input())
+
+
+def result_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "question": result.get("question"),
+        "generation": result.get("generation"),
+        "web_search": result.get("web_search", False),
+        "sources": [
+            {
+                "source": doc.metadata.get("source", "web search"),
+                "content": doc.page_content,
+            }
+            for doc in get_documents(result)
+        ],
+    }
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+service = GraphService()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    loading = asyncio.create_task(service.load())
+    loading.add_done_callback(service.loaded)
+    yield
+    loading.cancel()
+
+
+api = FastAPI(title="Self-RAG", lifespan=lifespan)
+
+
+@api.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@api.get("/readyz")
+async def readyz() -> Dict[str, Any]:
+    service.require_graph()
+    return {"status": "ready", **service.admission.stats(), "warmup": warmup.last_report}
+
+
+@api.post("/v1/answer")
+async def answer(request: QuestionRequest) -> Dict[str, Any]:
+    if not request.question.strip():
+        raise HTTPException(status_code=422, detail="Question must not be empty")
+    try:
+        result, coalesced = await service.coalescer.run(
+            coalescing_key(request.question, request.filter),
+            lambda: service.answer(request),
+        )
+    except ServerBusy:
+        raise busy()
+    return {**result_payload(result), "coalesced": coalesced}
+
+
+@api.post("/v1/answer/stream")
+async def answer_stream(request: QuestionRequest) -> StreamingResponse:
+    graph = service.require_graph()
+    if service.admission.waiting >= service.admission.max_queued:
+        raise busy()
+
+    async def events() -> AsyncIterator[str]:
+        final: Dict[str, Any] = {}
+        try:
+            async with service.admission.slot():
+                async for mode, chunk in graph.astream(
+                    request.graph_input(), stream_mode=["updates", "values"]
+                ):
+                    if mode == "values":
+                        final = chunk
+                        continue
+                    for node, update in chunk.items():
+                        yield sse("node", {"node": node, "update": update})
+        except ServerBusy:
+            yield sse("error", {"detail": "Server is busy, please retry shortly"})
+            return
+        yield sse("answer", result_payload(final))
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the Self-RAG graph over HTTP")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    uvicorn.run(api, host=args.host, port=args.port)
@@ -1,40 +1,49 @@
 import streamlit as st
+import itertools
 import os
 import tempfile
+import uuid
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from typing import Any, Dict
+from graph.chat import get_chat_history, run_chat_turn
+from graph.chunk_store import get_documents
+from graph.checkpoint import get_checkpointer
+from graph.graph import build_graph
+from graph.vectors import QueryCachingEmbeddings
+from graph.metrics import frontend_report
+from graph.parents import get_parent_store
+from graph.serving import ServerBusy, get_frontend_pool
+from ingest.chunking import ChunkingConfig, ParentChildSplitter, make_splitter
+from ingest.dedup import NearDuplicateFilter
+from ingest.job import stamp_ingested, trim_metadata
+from ingest.loaders import SUPPORTED_FILE_TYPES, iter_sources
+from ingest.pipeline import run_pipeline
+from ingest.snapshot import INDEX_DIR, PARENTS_FILE, load_parents, save_parents
 
-from graph.chains.generation import generation_chain
-from graph.chains.retrieval_grader import retrieval_grader
-from graph.chains.hallucination_grader import hallucination_grader
-from graph.chains.answer_grader import answer_grader
-from graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
-from graph.state import GraphState
-
-from langgraph.graph import END, StateGraph
 from langchain_openai import OpenAIEmbeddings
 from langchain_endee import EndeeVectorStore
-from langchain_core.documents import Document
-from langchain_tavily import TavilySearch
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from endee import Endee
 
 INDEX_NAME = "rag_streamlit"
 EMBEDDING_DIM = 1536
-CHUNK_SIZE = 500
-CHUNK_OVERLAP = 50
+# same chunking as the ingestion CLI's default manifests
+CHUNKING = ChunkingConfig(parent_chunk_size=1000)
+# the Endee index keeps the child chunks across restarts; their parents are
+# kept next to it so parent expansion still finds them
+PARENTS_DIR = os.path.join(INDEX_DIR, INDEX_NAME)
 base_url = os.getenv("ENDEE_BASE_URL", "http://localhost:8080/api/v1")
 
 if "ready" not in st.session_state:
     st.session_state.ready = False
 if "app" not in st.session_state:
     st.session_state.app = None
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = str(uuid.uuid4())
+if "user_id" not in st.session_state:
+    # survives Clear & Reset, so per-user limits hold across chat threads
+    st.session_state.user_id = str(uuid.uuid4())
 if "ingested_files" not in st.session_state:
     st.session_state.ingested_files = []
 if "ingested_chunks" not in st.session_state:
@@ -49,6 +58,9 @@ def clear_index():
         print(f"🗑️ Deleted index '{INDEX_NAME}'")
     except Exception as e:
         print(f"Note: Could not delete index ({e})")
+    parents = os.path.join(PARENTS_DIR, PARENTS_FILE)
+    if os.path.exists(parents):
+        os.remove(parents)
 
 
 def verify_retrieval(retriever, test_query="what is this document about?"):
@@ -60,180 +72,82 @@ def verify_retrieval(retriever, test_query="what is this document about?"):
     return test_results
 
 
-def build_graph(retriever):
-    web_search_tool = TavilySearch(max_result=3)
-
-    def retrieve(state: GraphState) -> Dict[str, Any]:
-        print("⬇️ Retrieving documents from Endee...")
-        question = state["question"]
-        documents = retriever.invoke(question)
-        print(f"   Retrieved {len(documents)} docs")
-        return {"documents": documents, "question": question}
-
-    def grade_documents(state: GraphState) -> Dict[str, Any]:
-        print("🔍 CHECK DOCUMENT RELEVANCE TO QUESTION...")
-        question = state["question"]
-        documents = state["documents"]
-        filtered_docs = []
-        web_search = False
-        for i, doc in enumerate(documents):
-            score = retrieval_grader.invoke(
-                {"question": question, "document": doc.page_content}
-            )
-            grade = score.binary_score
-            if grade.lower() == "yes":
-                print(f"GRADE: ✅ DOCUMENT({i+1}) RELEVANT ")
-                filtered_docs.append(doc)
-            else:
-                print("GRADE: ❌ DOCUMENT NOT RELEVANT ")
-                web_search = True
-                continue
-        print("▶️ FINISHED CHECKING DOCUMENT RELEVANCE TO QUESTION...")
-        return {"document": filtered_docs, "question": question, "web_search": web_search}
-
-    def generate(state: GraphState) -> Dict[str, Any]:
-        print("🤖 Generating...")
-        question = state["question"]
-        documents = state["documents"]
-        retry_count = state.get("retry_count", 0) + 1
-        if retry_count >= 3:
-            generation = "I could not find a reliable answer in the uploaded documents for this question."
-        else:
-            generation = generation_chain.invoke({"question": question, "context": documents})
-        return {"documents": documents, "question": question, "generation": generation, "retry_count": retry_count}
-
-    def web_search(state: GraphState) -> Dict[str, Any]:
-        print("🔍 Searching web for relevant documents...")
-        question = state["question"]
-        documents = state["documents"]
-        tavily_results = web_search_tool.invoke({"query": question})["results"]
-        joined_tavily_result = "\n".join(
-            [tavily_result["content"] for tavily_result in tavily_results]
-        )
-        web_results = Document(page_content=joined_tavily_result)
-        if documents is not None:
-            documents.append(web_results)
-        else:
-            documents = [web_results]
-
-    def decide_to_generate(state):
-        print("🔍 ASSESS GRADED DOCUMENTS...")
-        if state["web_search"]:
-            print("DECISION: ⭕ NOT ALL DOCUMENTS ARE RELEVANT TO QUESTION, INCLUDE WEB_SEARCH")
-            return WEBSEARCH
-        else:
-            print("🤖 DECISION: GENERATE...")
-            return GENERATE
-
-    def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-        retry_count = state.get("retry_count", 0)
-        if retry_count >= 3:
-            print("⛔ MAX RETRIES REACHED. FORCING END.")
-            return "useful"
-
-        print("🔍 CHECK HALLUCINATION...")
-        question = state["question"]
-        documents = state["documents"]
-        generation = state["generation"]
-        score = hallucination_grader.invoke(
-            {"documents": documents, "generation": generation}
-        )
-        grade = score.binary_score
-        if grade.lower() == "yes":
-            print("✅ DECISION: GENERATION IS GROUNDED IN DOCUMENTS")
-            print("🔍 GRADE GENERATION VS QUESTION...")
-            score = answer_grader.invoke({"question": question, "generation": generation})
-            grade = score.binary_score
-            if grade.lower() == "yes":
-                print("✅ GRADE: GENERATION IS ANSWER TO QUESTION")
-                return "useful"
-            else:
-                print("⭕ GRADE: GENERATION IS NOT ANSWER TO QUESTION")
-                return "not useful"
-        else:
-            print("⭕ DECISION : GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY...")
-            return "not supported"
-
-    workflow = StateGraph(GraphState)
-    workflow.add_node(RETRIEVE, retrieve)
-    workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-    workflow.add_node(GENERATE, generate)
-    workflow.add_node(WEBSEARCH, web_search)
-    workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
-    workflow.add_conditional_edges(
-        GRADE_DOCUMENTS,
-        decide_to_generate,
-        {WEBSEARCH: WEBSEARCH, GENERATE: GENERATE},
-    )
-    workflow.add_conditional_edges(
-        GENERATE,
-        grade_generation_grounded_in_documents_and_question,
-        {"useful": END, "not useful": WEBSEARCH, "not supported": GENERATE},
-    )
-    workflow.add_edge(WEBSEARCH, GENERATE)
-    workflow.add_edge(GENERATE, END)
-    workflow.set_entry_point(RETRIEVE)
-    return workflow.compile()
+@st.cache_resource
+def load_upload_parents():
+    # once per process: parents of the chunks ingested before a restart
+    parents = load_parents(PARENTS_DIR)
+    get_parent_store().update(parents)
+    return len(parents)
+
+
+@st.cache_resource
+def shared_checkpointer():
+    # one saver for all sessions; chat history is stored per thread id
+    return get_checkpointer(in_memory_fallback=True)
 
 
 def ingest_files(uploaded_files):
     print(f"📥 Starting ingestion of {len(uploaded_files)} file(s)...")
-    all_docs = []
+    paths = {}
     for f in uploaded_files:
-        print(f"  Processing: {f.name}")
+        if not f.name.lower().endswith(SUPPORTED_FILE_TYPES):
+            print(f"  -> Skipped unsupported type: {f.name}")
+            st.warning(f"Skipped unsupported file: {f.name}")
+            continue
         with tempfile.NamedTemporaryFile(delete=False, suffix=f.name) as tmp:
             tmp.write(f.getvalue())
-            path = tmp.name
-        try:
-            if f.name.lower().endswith(".pdf"):
-                print(f"  -> Loading as PDF...")
-                loader = PyPDFLoader(path)
-            elif f.name.lower().endswith(".docx"):
-                print(f"  -> Loading as DOCX...")
-                loader = Docx2txtLoader(path)
-            else:
-                print(f"  -> Skipped unsupported type")
-                st.warning(f"Skipped unsupported file: {f.name}")
-                continue
-            loaded = loader.load()
-            print(f"  -> Loaded {len(loaded)} page(s)")
-            all_docs.extend(loaded)
-        except Exception as e:
-            print(f"  ❌ Error loading file: {e}")
-            st.error(f"Error loading {f.name}: {e}")
-        finally:
-            os.unlink(path)
+            paths[tmp.name] = f.name
 
-    if not all_docs:
-        print("❌ No docs loaded from any file")
-        st.error("No documents could be loaded from the uploaded files.")
-        return
+    def report_error(path, error):
+        print(f"  ❌ Error loading file: {error}")
+        st.error(f"Error loading {paths[path]}: {error}")
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
-    )
-    chunks = splitter.split_documents(all_docs)
-    print(f"✂️ Split into {len(chunks)} chunks")
-
-    for d in chunks:
-        src = d.metadata.get("source", "upload")
-        d.metadata = {"source": src[:200]}
-
-    print("🗑️ Clearing old index...")
-    clear_index()
-
-    print("🔗 Creating EndeeVectorStore...")
-    vs = EndeeVectorStore(
-        index_name=INDEX_NAME,
-        embedding=OpenAIEmbeddings(),
-        dimension=EMBEDDING_DIM,
-        space_type="cosine",
-        precision="int8",
-        base_url=base_url,
-    )
-    print(f"📤 Adding {len(chunks)} chunks to Endee...")
-    vs.add_documents(chunks)
-    print("✅ Documents added to Endee")
+    def prepare(chunk):
+        # chunks name the uploaded file, not the temp copy, so they can be filtered on
+        chunk.metadata["source"] = paths.get(chunk.metadata.get("source"), "upload")
+        return trim_metadata(stamp_ingested(chunk))
+
+    try:
+        # files are parsed in a process pool; chunks are embedded as pages arrive
+        documents = iter_sources(files=list(paths), on_error=report_error)
+        first = next(documents, None)
+        if first is None:
+            print("❌ No docs loaded from any file")
+            st.error("No documents could be loaded from the uploaded files.")
+            return
+
+        print("🗑️ Clearing old index...")
+        clear_index()
+
+        print("🔗 Creating EndeeVectorStore...")
+        vs = EndeeVectorStore(
+            index_name=INDEX_NAME,
+            embedding=QueryCachingEmbeddings(OpenAIEmbeddings()),
+            dimension=EMBEDDING_DIM,
+            space_type="cosine",
+            precision="int8",
+            base_url=base_url,
+        )
+        splitter = make_splitter(CHUNKING)
+        dedup = NearDuplicateFilter()
+        chunk_count = run_pipeline(
+            itertools.chain([first], documents),
+            splitter,
+            vs,
+            prepare=prepare,
+            dedup=dedup,
+        )
+        print(dedup.report())
+        if isinstance(splitter, ParentChildSplitter):
+            # uploads have no snapshot; their parents are saved next to the index
+            parents = splitter.pop_parents()
+            os.makedirs(PARENTS_DIR, exist_ok=True)
+            save_parents(PARENTS_DIR, parents)
+            get_parent_store().update(parents)
+        print(f"✅ {chunk_count} chunks added to Endee")
+    finally:
+        for path in paths:
+            os.unlink(path)
 
     retriever = vs.as_retriever(search_kwargs={"k": 4})
 
@@ -246,11 +160,11 @@ def ingest_files(uploaded_files):
         print(f"✅ VERIFICATION OK: {len(test_results)} docs retrieved")
 
     print("🤖 Building Self-RAG graph...")
-    st.session_state.app = build_graph(retriever)
+    st.session_state.app = build_graph(retriever, checkpointer=shared_checkpointer())
     st.session_state.ready = True
     st.session_state.ingested_files = [f.name for f in uploaded_files]
-    st.session_state.ingested_chunks = len(chunks)
-    st.session_state.messages = []
+    st.session_state.ingested_chunks = chunk_count
+    st.session_state.thread_id = str(uuid.uuid4())
     print("🎉 Ingestion complete!")
 
 
@@ -260,6 +174,8 @@ st.set_page_config(
     layout="wide",
 )
 
+load_upload_parents()
+
 st.title("🤖 Self-RAG with Endee")
 st.markdown("Upload **PDF** or **DOCX** documents and ask questions about their content.")
 
@@ -288,11 +204,19 @@ with st.sidebar:
         for name in st.session_state.ingested_files:
             st.write(f"- {name}")
         st.caption(f"📊 {st.session_state.ingested_chunks} text chunks indexed in Endee")
+        search_in = st.selectbox(
+            "🔎 Search in",
+            ["All files", *st.session_state.ingested_files],
+            help="Restrict retrieval to one file; the filter is applied inside Endee",
+        )
+        st.session_state.metadata_filter = (
+            {} if search_in == "All files" else {"source": search_in}
+        )
 
         if st.button("🔄 Clear & Reset", use_container_width=True):
             st.session_state.ready = False
             st.session_state.app = None
-            st.session_state.messages = []
+            st.session_state.thread_id = str(uuid.uuid4())
             st.session_state.ingested_files = []
             st.session_state.ingested_chunks = 0
             try:
@@ -305,6 +229,12 @@ with st.sidebar:
     st.divider()
     st.caption(f"**Endee index:** `{INDEX_NAME}`")
     st.caption(f"**Server:** `{base_url}`")
+    load = get_frontend_pool().stats()
+    report = frontend_report()
+    st.caption(
+        f"**Load:** {load['running']}/{load['max_concurrent']} running, "
+        f"{load['waiting']} waiting, mean queue wait {report['mean_queue_wait_s']:.1f}s"
+    )
 
 st.divider()
 
@@ -314,15 +244,19 @@ if not st.session_state.ready:
         "Upload PDF or DOCX files in the sidebar and click **Ingest Documents** to begin."
     )
 else:
-    for msg in st.session_state.messages:
+    for msg in get_chat_history(st.session_state.app, st.session_state.thread_id):
         with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
-            if "details" in msg:
-                with st.expander("📋 Workflow Details"):
-                    st.markdown(msg["details"])
+            if msg["role"] == "user":
+                st.markdown(msg["content"])
+                continue
+            st.markdown(f"**Answer:**\n{msg['content']}")
+            with st.expander("📋 Workflow Details"):
+                st.markdown(
+                    f"- **Web Search Triggered:** {'Yes' if msg['web_search'] else 'No'}\n"
+                    f"- **Sources:** {', '.join(msg['sources']) or 'none'}"
+                )
 
     if prompt := st.chat_input("Ask a question about your documents..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
@@ -330,10 +264,17 @@ else:
             with st.spinner("Running Self-RAG workflow..."):
                 try:
                     print(f"\n🔹 USER QUESTION: '{prompt}'")
-                    result = st.session_state.app.invoke(input={"question": prompt, "retry_count": 0})
+                    result, queue_wait = get_frontend_pool().run(
+                        st.session_state.user_id,
+                        run_chat_turn,
+                        st.session_state.app,
+                        prompt,
+                        st.session_state.thread_id,
+                        st.session_state.get("metadata_filter"),
+                    )
 
                     generation = result.get("generation", "No answer generated.")
-                    documents = result.get("documents", [])
+                    documents = get_documents(result)
                     web_search_triggered = result.get("web_search", False)
                     print(f"🔹 RESULT: {len(documents)} docs, web_search={web_search_triggered}")
                     print(f"🔹 GENERATION: {generation[:100]}...")
@@ -342,8 +283,11 @@ else:
                     st.markdown(answer)
 
                     details = ""
+                    if result.get("asked_question"):
+                        details += f"- **Standalone Question:** {result['question']}\n"
                     details += f"- **Web Search Triggered:** {'Yes' if web_search_triggered else 'No'}\n"
-                    details += f"- **Documents Retrieved:** {len(documents)}\n\n"
+                    details += f"- **Documents Retrieved:** {len(documents)}\n"
+                    details += f"- **Queue Wait:** {queue_wait:.1f}s\n\n"
 
                     if documents:
                         details += "**Retrieved Documents:**\n\n"
@@ -354,16 +298,8 @@ else:
                     with st.expander("📋 Workflow Details"):
                         st.markdown(details)
 
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": answer,
-                        "details": details,
-                    })
-
+                except ServerBusy as e:
+                    st.warning(str(e))
                 except Exception as e:
                     error_msg = f"❌ **Error:** {str(e)}"
                     st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_msg,
-                    })
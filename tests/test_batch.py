@@ -0,0 +1,98 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+
+@pytest.fixture
+def batch(web_search_key):
+    return importlib.import_module("batch")
+
+
+def test_load_questions_from_jsonl(batch, tmp_path) -> None:
+    path = tmp_path / "questions.jsonl"
+    path.write_text(
+        '{"id": "a", "question": "what is memory?", "filter": {"source": "x"}}\n'
+        '"what is planning?"\n'
+        "\n"
+        '{"id": "c"}\n',
+        encoding="utf-8",
+    )
+
+    assert batch.load_questions(str(path)) == [
+        {"id": "a", "question": "what is memory?", "filter": {"source": "x"}},
+        {"id": "2", "question": "what is planning?", "filter": {}},
+    ]
+
+
+def test_load_questions_from_csv(batch, tmp_path) -> None:
+    path = tmp_path / "questions.csv"
+    path.write_text("id,question\nq1,what is memory?\n,what is planning?\n", encoding="utf-8")
+
+    questions = batch.load_questions(str(path))
+
+    assert [(q["id"], q["question"]) for q in questions] == [
+        ("q1", "what is memory?"),
+        ("2", "what is planning?"),
+    ]
+
+
+def test_load_questions_from_csv_with_filters(batch, tmp_path) -> None:
+    path = tmp_path / "questions.csv"
+    path.write_text(
+        'question,filter\nwhat is memory?,"{""source"": ""a.md""}"\nwhat is planning?,\n',
+        encoding="utf-8",
+    )
+
+    assert [q["filter"] for q in batch.load_questions(str(path))] == [{"source": "a.md"}, {}]
+
+    path.write_text('question,filter\nwhat is memory?,"[""a.md""]"\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="Row 1: filter must be a JSON object"):
+        batch.load_questions(str(path))
+    path.write_text("question,filter\nwhat is memory?,source=a.md\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Row 1: filter is not valid JSON"):
+        batch.load_questions(str(path))
+
+
+def test_percentile(batch) -> None:
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+    assert batch.percentile([], 50) == 0.0
+    assert batch.percentile(values, 50) == 0.3
+    assert batch.percentile(values, 90) == 0.5
+    assert batch.percentile(values, 0) == 0.1
+
+
+class FakeGraph:
+    """Counts how many runs overlap; fails the question "boom"."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def ainvoke(self, state):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if state["question"] == "boom":
+            raise RuntimeError("model unavailable")
+        return {"question": state["question"], "generation": state["question"].upper()}
+
+
+def test_run_batch_bounds_concurrency_and_records_errors(batch, tmp_path) -> None:
+    questions = [
+        {"id": str(i), "question": "boom" if i == 3 else f"q{i}", "filter": {}}
+        for i in range(8)
+    ]
+    output = tmp_path / "answers.jsonl"
+    graph = FakeGraph()
+
+    latencies, errors, _ = asyncio.run(batch.run_batch(questions, str(output), 2, graph))
+
+    assert len(latencies) == 7 and errors == 1
+    assert graph.peak == 2
+    records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert len(records) == 8
+    assert "RuntimeError" in records["3"]["error"]
+    assert records["0"]["generation"] == "Q0" and records["0"]["sources"] == []
@@ -0,0 +1,147 @@
+import asyncio
+import importlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+FRESH_MODULES = ("graph", "server", "ingestion")
+
+
+@pytest.fixture
+def server(web_search_key, monkeypatch):
+    """
+    server.py imported with SELF_RAG_FAKE_MODELS set. The chains pick their
+    models at import time, so the graph modules are imported afresh for this
+    test and the earlier ones are put back afterwards.
+    """
+    monkeypatch.setenv("SELF_RAG_FAKE_MODELS", "true")
+
+    def pop_fresh_modules():
+        return {
+            name: sys.modules.pop(name)
+            for name in list(sys.modules)
+            if name.split(".")[0] in FRESH_MODULES
+        }
+
+    saved = pop_fresh_modules()
+    try:
+        yield importlib.import_module("server")
+    finally:
+        pop_fresh_modules()
+        sys.modules.update(saved)
+
+
+@pytest.fixture
+def client(server):
+    with TestClient(server.api) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, "graph did not become ready"
+            time.sleep(0.05)
+        yield client
+
+
+def test_a_failed_load_is_reported_by_readyz(server, monkeypatch) -> None:
+    def missing_index(**kwargs):
+        raise FileNotFoundError("no snapshot of rag-chroma")
+
+    monkeypatch.setattr(server, "build_graph", missing_index)
+    with TestClient(server.api) as client:
+        wait_for(lambda: server.service.error is not None)
+        response = client.get("/readyz")
+        answer = client.post("/v1/answer", json={"question": "what is agent memory?"})
+
+    assert response.status_code == 503
+    assert "FileNotFoundError: no snapshot of rag-chroma" in response.json()["detail"]
+    assert answer.status_code == 503
+
+
+class GatedGraph:
+    """Wraps the served graph so runs wait until the test releases them."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.release = threading.Event()
+        self.calls = 0
+
+    async def ainvoke(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.to_thread(self.release.wait, 10)
+        return await self.graph.ainvoke(*args, **kwargs)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_answer(client) -> None:
+    response = client.post("/v1/answer", json={"question": "what is agent memory?"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["generation"] and body["coalesced"] is False
+    assert body["sources"] and all(source["content"] for source in body["sources"])
+
+
+def test_answer_stream(client) -> None:
+    with client.stream(
+        "POST", "/v1/answer/stream", json={"question": "what is agent memory?"}
+    ) as response:
+        assert response.status_code == 200
+        events = [
+            line.removeprefix("event: ")
+            for line in response.iter_lines()
+            if line.startswith("event: ")
+        ]
+
+    assert "node" in events and events[-1] == "answer"
+
+
+def test_identical_questions_share_one_run(server, client) -> None:
+    gated = GatedGraph(server.service.graph)
+    server.service.graph = gated
+    ask = lambda: client.post("/v1/answer", json={"question": "What is agent memory?"})
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(ask)
+        wait_for(lambda: gated.calls == 1)
+        second = pool.submit(ask)
+        time.sleep(0.2)
+        gated.release.set()
+        responses = [first.result(), second.result()]
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert [r.json()["coalesced"] for r in responses] == [False, True]
+    assert gated.calls == 1
+
+
+def test_busy_server_rejects_with_503(server, client) -> None:
+    gated = GatedGraph(server.service.graph)
+    server.service.graph = gated
+    server.service.admission = server.AdmissionQueue(max_concurrent=1, max_queued=1)
+    admission = server.service.admission
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        running = pool.submit(client.post, "/v1/answer", json={"question": "memory?"})
+        wait_for(lambda: admission.running == 1)
+        queued = pool.submit(client.post, "/v1/answer", json={"question": "planning?"})
+        wait_for(lambda: admission.waiting == 1)
+
+        rejected = client.post("/v1/answer", json={"question": "prompting?"})
+        rejected_stream = client.post("/v1/answer/stream", json={"question": "prompting?"})
+
+        gated.release.set()
+        assert running.result().status_code == 200
+        assert queued.result().status_code == 200
+
+    assert rejected.status_code == 503 and rejected.headers["Retry-After"] == "1"
+    assert rejected_stream.status_code == 503
+    assert json.loads(rejected.content)["detail"].startswith("Server is busy")